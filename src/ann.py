@@ -0,0 +1,155 @@
+# ann.py
+import os
+
+import joblib
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.decomposition import TruncatedSVD
+
+from metrics import stage
+
+# Yaklaşık en yakın komşu (ANN) modu; varsayılan kapalıdır, tam kosinüs taraması kullanılır
+ANN_MODE = os.getenv("ANN_MODE", "0") == "1"
+
+# TF-IDF vektörlerinin indirgendiği yoğun boyut sayısı (TruncatedSVD)
+ANN_COMPONENTS = int(os.getenv("ANN_COMPONENTS", "64"))
+# IVF küme (liste) sayısı; 0 ise ilan sayısının karekökü (en az 16)
+ANN_LISTS = int(os.getenv("ANN_LISTS", "0"))
+# Sorgu başına taranan en yakın küme sayısı. Artırıldıkça recall yükselir, gecikme artar
+ANN_NPROBE = int(os.getenv("ANN_NPROBE", "8"))
+# Filtreden geçen aday sayısı bunun altındaysa ANN atlanır, tam yol kullanılır
+ANN_MIN_CANDIDATES = int(os.getenv("ANN_MIN_CANDIDATES", "20000"))
+# SVD ve k-means eğitimi için kullanılan en fazla satır (örneklem)
+ANN_TRAIN_SAMPLE = int(os.getenv("ANN_TRAIN_SAMPLE", "200000"))
+
+ASSIGN_CHUNK_SIZE = 65536
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1)
+
+
+class AnnIndex:
+    """
+    TF-IDF satırları üzerinde IVF (inverted file) tarzı yaklaşık arama indeksi.
+
+    Satırlar TruncatedSVD ile düşük boyutlu yoğun vektörlere indirgenir ve küresel k-means
+    ile n_lists kümeye ayrılır; bellekte yalnızca SVD bileşenleri, küme merkezleri ve satır
+    başına küme numarası tutulur. Sorguda kullanıcı metnine en yakın nprobe küme seçilir ve
+    filtreden geçen adaylar bu kümelerdekilerle sınırlandırılır. Kısa listedeki adaylar
+    yine tam TF-IDF kosinüs benzerliğiyle puanlanır; yaklaşıklık yalnızca hangi adayların
+    puanlandığındadır.
+    """
+
+    def __init__(self, svd, centroids, assignments, nprobe=None, min_candidates=None):
+        self.svd = svd
+        self.centroids = centroids
+        self.assignments = assignments
+        self.nprobe = nprobe or ANN_NPROBE
+        self.min_candidates = ANN_MIN_CANDIDATES if min_candidates is None else min_candidates
+
+    @property
+    def n_lists(self):
+        return len(self.centroids)
+
+    @classmethod
+    def build(cls, tfidf_matrix, n_components=None, n_lists=None, seed=0, **kwargs):
+        """
+        Satır sırası tfidf_matrix ile aynı olan indeksi kurar. Eğitim en fazla
+        ANN_TRAIN_SAMPLE satırlık rastgele örneklem üzerinde yapılır, tüm satırlar
+        ardından parça parça en yakın kümeye atanır.
+        """
+        n_rows = tfidf_matrix.shape[0]
+        n_components = min(n_components or ANN_COMPONENTS, tfidf_matrix.shape[1] - 1)
+        n_lists = n_lists or ANN_LISTS or max(16, int(np.sqrt(n_rows)))
+        rng = np.random.default_rng(seed)
+        sample = np.sort(rng.choice(n_rows, min(n_rows, ANN_TRAIN_SAMPLE), replace=False))
+        n_lists = min(n_lists, len(sample))
+
+        svd = TruncatedSVD(n_components=n_components, random_state=seed)
+        embedded = _normalize(svd.fit_transform(tfidf_matrix[sample]).astype(np.float32))
+        kmeans = MiniBatchKMeans(n_clusters=n_lists, random_state=seed, n_init=3,
+                                 batch_size=max(1024, 4 * n_lists))
+        kmeans.fit(embedded)
+        index = cls(svd, _normalize(kmeans.cluster_centers_.astype(np.float32)),
+                    np.empty(0, dtype=np.int32), **kwargs)
+        return index.extend(tfidf_matrix)
+
+    def embed(self, matrix):
+        # TruncatedSVD.transform ile aynı (X @ bileşenler^T); tek satırlık sorgularda doğrulama maliyeti olmaz
+        return _normalize(np.asarray(matrix @ self.svd.components_.T, dtype=np.float32))
+
+    def extend(self, tfidf_matrix):
+        """
+        tfidf_matrix'in henüz atanmamış (sondaki) satırlarını en yakın kümeye atar ve yeni bir
+        indeks döndürür; SVD ve kümeler yeniden eğitilmez. Artımlı alımda kullanılır.
+        """
+        parts = [self.assignments]
+        for start in range(len(self.assignments), tfidf_matrix.shape[0], ASSIGN_CHUNK_SIZE):
+            chunk = self.embed(tfidf_matrix[start:start + ASSIGN_CHUNK_SIZE])
+            parts.append(np.argmax(chunk @ self.centroids.T, axis=1).astype(np.int32))
+        return AnnIndex(self.svd, self.centroids, np.concatenate(parts), self.nprobe, self.min_candidates)
+
+    def shortlist(self, user_vec, positions, top_n, nprobe=None):
+        """
+        Filtreden geçen konumları, kullanıcı metninin TF-IDF vektörüne (user_vec, 1 satırlık
+        seyrek matris) en yakın nprobe kümedeki adaylarla sınırlar.
+
+        Seçilen kümelerde top_n'den az aday kalırsa sonraki en yakın kümeler de eklenir.
+        Aday sayısı min_candidates'in altındaysa, top_n None/negatifse veya metin
+        sözlükte hiç geçmiyorsa konumlar aynen döner (tam yol).
+        """
+        if len(positions) < self.min_candidates or top_n is None or top_n <= 0:
+            return positions
+        with stage('ann_probe'):
+            query = self.embed(user_vec)[0]
+            if not query.any():
+                return positions
+            order = np.argsort(-(self.centroids @ query))
+            lists = self.assignments[positions]
+            # Kümeler yakınlık sırasıyla eklendiğinde biriken aday sayısı
+            counts = np.cumsum(np.bincount(lists, minlength=self.n_lists)[order])
+            probes = max(nprobe or self.nprobe, int(np.searchsorted(counts, top_n)) + 1)
+            if probes >= self.n_lists:
+                return positions
+            selected = np.zeros(self.n_lists, dtype=bool)
+            selected[order[:probes]] = True
+            return positions[selected[lists]]
+
+    def stats(self):
+        sizes = np.bincount(self.assignments, minlength=self.n_lists)
+        return {
+            'rows': int(len(self.assignments)),
+            'components': int(self.svd.n_components),
+            'lists': int(self.n_lists),
+            'nprobe': int(self.nprobe),
+            'min_candidates': int(self.min_candidates),
+            'largest_list': int(sizes.max()) if len(sizes) else 0,
+        }
+
+
+def save_ann_index(path, ann_index, fingerprint):
+    """
+    ANN indeksini, üretildiği verinin ve parametrelerin parmak izi ile diske kaydeder.
+    """
+    tmp_path = f"{path}.tmp"
+    joblib.dump({'fingerprint': fingerprint, 'svd': ann_index.svd, 'centroids': ann_index.centroids,
+                 'assignments': ann_index.assignments}, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def load_ann_index(path, fingerprint):
+    """
+    Diskteki ANN indeksini yükler. Dosya yoksa, okunamıyorsa veya parmak izi uyuşmuyorsa None döner.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        payload = joblib.load(path)
+    except Exception as e:
+        print(f"Uyarı: ANN indeksi okunamadı ({e}), yeniden oluşturulacak.")
+        return None
+    if payload.get('fingerprint') != fingerprint:
+        return None
+    return AnnIndex(payload['svd'], payload['centroids'], payload['assignments'])
@@ -1,26 +1,116 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header, Response
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, NamedTuple
 import pandas as pd
-import sqlite3
 import os
-import sqlalchemy as sa
+import hashlib
+import json
+import asyncio
+import numpy as np
+import threading
 from contextlib import asynccontextmanager
-from preprocessing import load_and_preprocess_from_db
-from recommendation import recommend_cars
+from preprocessing import load_and_preprocess_from_db, build_listings_store, memory_report
+from recommendation import recommend_cars, recommend_cars_batch
+from filters import FilterEngine
+from cache import ResultCache
+from scoring_pool import ScoringPool, PoolOverloaded
+from reloader import DataReloader
+from ingest import IncrementalIngestor, stream_csv_to_sqlite
+from sql_store import SqlListingStore, get_engine, dispose_engine
+from metrics import stage, count_request, render_metrics, profile_call, PROFILE_REQUESTS, PROMETHEUS_CONTENT_TYPE
+from snapshot import read_snapshot, write_snapshot, snapshots_available
+from features import build_tfidf_index, save_tfidf_index, load_tfidf_index
+from favorites import FavoritesStore
+from ann import AnnIndex, save_ann_index, load_ann_index, ANN_MODE, ANN_COMPONENTS, ANN_LISTS
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from starlette.responses import RedirectResponse
+from starlette.responses import RedirectResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
 
-# Global olarak veriyi saklamak için değişkenler
-DF_CLEAN = None  # Orijinal arabam.csv
-DF_OTOSOR = None  # Yeni otosor.csv
+try:
+    import orjson
+except ImportError:  # orjson yoksa yanıtlar standart json ile yazılır
+    orjson = None
+
+# Bir veri sürümüne ait, birlikte kurulan ve birlikte değiştirilen nesneler
+class ServingData(NamedTuple):
+    version: int
+    # arabam.csv ve otosor.csv ilanlarının birleştirildiği değişmez depo ('source', temizlenmiş
+    # 'link' ve sabit 'row_id' sütunlarıyla). İstekler bu DataFrame'i kopyalamaz, yalnızca
+    # konum dizileriyle okur.
+    listings: pd.DataFrame
+    # listings satırlarıyla aynı sırada eğitilmiş (tfidf_matrix, vectorizer) ya da None
+    tfidf_index: Optional[tuple]
+    # listings üzerindeki kategorik ve sayısal filtre indeksleri
+    filter_engine: FilterEngine
+    # QUERY_MODE=sql iken ilanlar belleğe alınmaz; listings, tfidf_index ve filter_engine None olur
+    sql_store: Optional[SqlListingStore] = None
+    # ANN_MODE=1 iken tfidf_index satırları üzerinde kurulmuş yaklaşık arama indeksi
+    ann_index: Optional[AnnIndex] = None
+
+# Global olarak veriyi saklamak için değişken. Yeniden yüklemede yeni ServingData tek bir
+# atama ile değiştirilir; istekler başta aldıkları referansla çalıştığından devam eden
+# istekler eski sürümle tamamlanır.
+SERVING_DATA: Optional[ServingData] = None
+# Devreye alınan her veri sürümüne verilen artan numara; yalnızca swap_serving_data içinde,
+# SWAP_LOCK altında artırılır. Kurulan ServingData'ların sürümü devreye alınırken atanır.
+DATA_VERSION = 0
+SWAP_LOCK = threading.Lock()
 
 # Veritabanı ve CSV yolları
 ARABAM_DB_PATH = "data/arabam.db"
 ARABAM_CSV_PATH = "data/arabam.csv"
 OTOSOR_DB_PATH = "data/otosor.db"
 OTOSOR_CSV_PATH = "data/otosor.csv"
+TFIDF_INDEX_PATH = "data/tfidf_index.joblib"
+ANN_INDEX_PATH = "data/ann_index.joblib"
+FAVORITES_DB_PATH = "data/favorites.db"
+ARABAM_SNAPSHOT_PATH = "data/arabam.arrow"
+OTOSOR_SNAPSHOT_PATH = "data/otosor.arrow"
+
+# (tablo adı, CSV yolu, veritabanı yolu, anlık görüntü yolu); sıralama ilan deposundaki satır sırasını belirler
+DATA_SOURCES = [
+    ('arabam', ARABAM_CSV_PATH, ARABAM_DB_PATH, ARABAM_SNAPSHOT_PATH),
+    ('otosor', OTOSOR_CSV_PATH, OTOSOR_DB_PATH, OTOSOR_SNAPSHOT_PATH),
+]
+
+# /recommend sonuç önbelleği; veri her yeniden yüklendiğinde temizlenir
+RESULT_CACHE = ResultCache(
+    max_entries=int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "1024")),
+    ttl_seconds=float(os.getenv("RESULT_CACHE_TTL_SECONDS", "300")),
+    max_bytes=int(os.getenv("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+)
+
+# 'memory': tüm ilanlar belleğe alınır ve indekslenir (varsayılan). 'sql': bellek kısıtlı
+# kurulumlar için filtreler SQLite'ta çalışır, her istekte yalnızca aday satırlar okunur.
+QUERY_MODE = os.getenv("QUERY_MODE", "memory")
+
+# Veri yeniden yükleme (admin uç noktası veya DATA_WATCH_INTERVAL > 0 ise dosya izleme)
+RELOADER = None
+DATA_WATCH_INTERVAL = float(os.getenv("DATA_WATCH_INTERVAL", "0"))
+
+# Öneri hesaplamalarının çalıştığı sınırlı havuz ('thread' veya 'process'); veri yüklendikten
+# sonra lifespan içinde oluşturulur
+SCORING_POOL = None
+SCORING_MODE = os.getenv("SCORING_MODE", "thread")
+SCORING_WORKERS = int(os.getenv("SCORING_WORKERS", "0")) or (os.cpu_count() or 1)
+SCORING_QUEUE = int(os.getenv("SCORING_QUEUE", "32"))
+SCORING_TIMEOUT = float(os.getenv("SCORING_TIMEOUT", "10"))
+
+# /recommend/batch isteği başına en fazla sorgu sayısı
+RECOMMEND_BATCH_MAX = int(os.getenv("RECOMMEND_BATCH_MAX", "100"))
+
+# Scraper'ın ara CSV'sinden artımlı veri alımı; son tam eğitimden beri değişen satır oranı
+# INGEST_DRIFT_THRESHOLD'u aşınca arka planda tam yeniden yükleme (vektörleyiciyi yeniden eğitme) tetiklenir
+SCRAPER_CSV_PATH = "data/deneme/cars_scraped_intermediate.csv"
+INGESTOR = IncrementalIngestor(
+    source='arabam',
+    db_path=ARABAM_DB_PATH,
+    drift_threshold=float(os.getenv("INGEST_DRIFT_THRESHOLD", "0.2")),
+)
+# Artımlı alım ve tam yeniden yükleme aynı anda çalışmaz: alım bu kilidi boyunca tutar,
+# yeniden yükleme de veriyi okumadan önce bu kilidi alır
+INGEST_LOCK = threading.Lock()
 
 # Belirli bir CSV için veritabanını oluştur/kontrol et
 def ensure_db_for_csv(csv_path: str, db_path: str, table_name: str):
@@ -28,46 +118,174 @@ def ensure_db_for_csv(csv_path: str, db_path: str, table_name: str):
         if not os.path.exists(csv_path):
             print(f"Uyarı: CSV dosyası '{csv_path}' bulunamadı. Veritabanı oluşturulmadı.")
             return False
-        df = pd.read_csv(csv_path)
-        conn = sqlite3.connect(db_path)
-        df.to_sql(table_name, conn, if_exists='replace', index=False)
-        conn.close()
+        # Parça parça, tipli şema ve indekslerle aktar; bellek kullanımı dosya boyutundan bağımsız
+        stream_csv_to_sqlite(csv_path, db_path, table_name)
+        dispose_engine(db_path)
         print(f"Veritabanı '{db_path}' başarıyla oluşturuldu (tablo: {table_name}).")
         return True
     return True
 
-# Veriyi yükle ve önbelleğe al
-def load_data_and_cache():
-    global DF_CLEAN, DF_OTOSOR
-    try:
-        # Orijinal dataset
-        ensure_db_for_csv(ARABAM_CSV_PATH, ARABAM_DB_PATH, 'arabam')
-        if os.path.exists(ARABAM_DB_PATH):
-            with sa.create_engine(f'sqlite:///{ARABAM_DB_PATH}').connect() as conn:
-                DF_CLEAN = load_and_preprocess_from_db(conn, table_name='arabam')
+# Dosyaların boyut ve değişiklik zamanından parmak izi üret. Veritabanları WAL modunda
+# olduğundan commit'ler checkpoint'e kadar yalnızca '-wal' dosyasına yazılır; ana dosya
+# değişmeyebileceği için boş olmayan '-wal' dosyası da parmak izine katılır.
+def data_fingerprint(*paths: str) -> str:
+    h = hashlib.sha256()
+    for path in paths:
+        if os.path.exists(path):
+            st = os.stat(path)
+            h.update(f"{path}:{st.st_size}:{st.st_mtime_ns};".encode())
         else:
-            DF_CLEAN = None
+            h.update(f"{path}:-;".encode())
+        wal_path = f"{path}-wal"
+        try:
+            st = os.stat(wal_path)
+        except FileNotFoundError:
+            continue
+        if st.st_size > 0:
+            h.update(f"{wal_path}:{st.st_size}:{st.st_mtime_ns};".encode())
+    return h.hexdigest()
 
-        # Yeni dataset (otosor)
-        ensure_db_for_csv(OTOSOR_CSV_PATH, OTOSOR_DB_PATH, 'otosor')
-        if os.path.exists(OTOSOR_DB_PATH):
-            with sa.create_engine(f'sqlite:///{OTOSOR_DB_PATH}').connect() as conn:
-                DF_OTOSOR = load_and_preprocess_from_db(conn, table_name='otosor')
-        else:
-            DF_OTOSOR = None
+# Tüm kaynak dosyaların parmak izi (dosya izleme için)
+def sources_fingerprint() -> str:
+    return data_fingerprint(*[path for source in DATA_SOURCES for path in source[1:3]])
 
+# TF-IDF indeksini diskten yükle, güncel değilse yeniden oluştur ve kaydet
+def load_or_build_tfidf_index(listings):
+    fingerprint = data_fingerprint(ARABAM_DB_PATH, OTOSOR_DB_PATH)
+    cached = load_tfidf_index(TFIDF_INDEX_PATH, fingerprint)
+    if cached is not None:
+        print(f"TF-IDF indeksi '{TFIDF_INDEX_PATH}' dosyasından yüklendi.")
+        return cached
+    tfidf_index = build_tfidf_index(listings)
+    try:
+        save_tfidf_index(TFIDF_INDEX_PATH, *tfidf_index, fingerprint)
+        print(f"TF-IDF indeksi oluşturuldu ve '{TFIDF_INDEX_PATH}' dosyasına kaydedildi.")
+    except Exception as e:
+        print(f"Uyarı: TF-IDF indeksi diske kaydedilemedi: {e}")
+    return tfidf_index
+
+# ANN indeksini diskten yükle; veri veya indeks parametreleri değiştiyse yeniden kur ve kaydet
+def load_or_build_ann_index(tfidf_index):
+    fingerprint = f"{data_fingerprint(ARABAM_DB_PATH, OTOSOR_DB_PATH)}:{ANN_COMPONENTS}:{ANN_LISTS}"
+    cached = load_ann_index(ANN_INDEX_PATH, fingerprint)
+    if cached is not None and len(cached.assignments) == tfidf_index[0].shape[0]:
+        print(f"ANN indeksi '{ANN_INDEX_PATH}' dosyasından yüklendi.")
+        return cached
+    ann_index = AnnIndex.build(tfidf_index[0])
+    try:
+        save_ann_index(ANN_INDEX_PATH, ann_index, fingerprint)
+        print(f"ANN indeksi oluşturuldu ({ann_index.n_lists} küme) ve '{ANN_INDEX_PATH}' dosyasına kaydedildi.")
+    except Exception as e:
+        print(f"Uyarı: ANN indeksi diske kaydedilemedi: {e}")
+    return ann_index
+
+# Tek bir kaynağın ön işlenmiş verisini yükle: kaynak değişmediyse anlık görüntüden,
+# değiştiyse CSV -> SQLite -> ön işleme hattından (ve anlık görüntüyü yenile)
+def load_source_frame(table_name: str, csv_path: str, db_path: str, snapshot_path: str):
+    ensure_db_for_csv(csv_path, db_path, table_name)
+    if not os.path.exists(db_path):
+        return None
+
+    fingerprint = data_fingerprint(csv_path, db_path)
+    df = read_snapshot(snapshot_path, fingerprint)
+    if df is not None:
+        return df
+
+    with get_engine(db_path).connect() as conn:
+        df = load_and_preprocess_from_db(conn, table_name=table_name)
+    if snapshots_available():
+        try:
+            write_snapshot(df, snapshot_path, fingerprint)
+            print(f"Anlık görüntü '{snapshot_path}' oluşturuldu.")
+        except Exception as e:
+            print(f"Uyarı: Anlık görüntü '{snapshot_path}' yazılamadı: {e}")
+    return df
+
+# Başlangıç raporu: depodaki sütun başına bellek kullanımı
+def print_memory_report(listings):
+    report = memory_report(listings)
+    print(f"İlan deposu bellek kullanımı ({len(listings)} satır):")
+    for column, size in sorted(report['columns'].items(), key=lambda item: -item[1]):
+        print(f"  {column:<22} {str(listings[column].dtype) if column in listings else '-':<10} {size / 1024 ** 2:>9.2f} MB")
+    print(f"  {'TOPLAM':<33} {report['total'] / 1024 ** 2:>9.2f} MB")
+
+# Yeni bir veri sürümünü kur; hiçbir global değiştirilmez
+def build_serving_data() -> Optional[ServingData]:
+    if QUERY_MODE == 'sql':
+        return build_sql_serving_data()
+    frames = {source[0]: load_source_frame(*source) for source in DATA_SOURCES}
+
+    # Tek birleşik depo; kaynak DataFrame'ler bundan sonra tutulmaz
+    listings = build_listings_store(frames)
+    if listings is None:
+        return None
+    tfidf_index = load_or_build_tfidf_index(listings)
+    filter_engine = FilterEngine(listings)
+    ann_index = load_or_build_ann_index(tfidf_index) if ANN_MODE else None
+    print_memory_report(listings)
+    return ServingData(0, listings, tfidf_index, filter_engine, ann_index=ann_index)
+
+# SQL modu: veritabanlarını hazırla, yalnızca şema ve indeksleri kontrol et
+def build_sql_serving_data() -> Optional[ServingData]:
+    for table_name, csv_path, db_path, _ in DATA_SOURCES:
+        ensure_db_for_csv(csv_path, db_path, table_name)
+    sql_store = SqlListingStore([(table_name, db_path) for table_name, _, db_path, _ in DATA_SOURCES])
+    if not sql_store.sources:
+        return None
+    print(f"SQL sorgu modu: {', '.join(table for table, _ in sql_store.sources)} tabloları doğrudan sorgulanacak.")
+    return ServingData(0, None, None, None, sql_store)
+
+# Yeni veri sürümünü atomik olarak devreye al; sürüm numarası burada atanır, böylece iki
+# farklı veri aynı numarayla devreye alınamaz
+def swap_serving_data(data: Optional[ServingData]):
+    global SERVING_DATA, SCORING_POOL, DATA_VERSION
+    with SWAP_LOCK:
+        if data is not None:
+            DATA_VERSION += 1
+            data = data._replace(version=DATA_VERSION)
+        SERVING_DATA = data
+        # Önbellek anahtarları sürüm içerdiğinden eski girdiler zaten kullanılmaz; yer açmak için temizle
+        RESULT_CACHE.clear()
+        # Süreç çalışanları veriyi fork anında devralır; yeni sürüm için havuzu yenile.
+        # Eski havuzdaki işler eski veriyle tamamlanır.
+        if SCORING_POOL is not None and SCORING_POOL.mode == 'process':
+            old_pool = SCORING_POOL
+            SCORING_POOL = ScoringPool(SCORING_MODE, SCORING_WORKERS, SCORING_QUEUE, SCORING_TIMEOUT)
+            old_pool.shutdown(wait=False, cancel_futures=False)
+    print(f"Veri sürümü {data.version if data else '-'} devreye alındı.")
+
+# Veriyi yükle ve önbelleğe al
+def load_data_and_cache():
+    try:
+        swap_serving_data(build_serving_data())
         print("Veritabanı verileri başarıyla yüklendi ve önbelleğe alındı (hem arabam hem otosor).")
     except Exception as e:
-        DF_CLEAN = None
-        DF_OTOSOR = None
+        swap_serving_data(None)
         print(f"Veritabanı yüklenirken hata: {e}")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    global SCORING_POOL, RELOADER
     # Uygulama başladığında veriyi yükle
     load_data_and_cache()
+    # Havuz veriden sonra oluşturulur; 'process' modunda çalışanlar veriyi fork ile devralır
+    SCORING_POOL = ScoringPool(SCORING_MODE, SCORING_WORKERS, SCORING_QUEUE, SCORING_TIMEOUT)
+    # Sonraki yüklemeler arka planda kurulur ve hazır olunca değiştirilir
+    RELOADER = DataReloader(
+        build=build_serving_data,
+        swap=swap_serving_data,
+        fingerprint=sources_fingerprint,
+        watch_interval=DATA_WATCH_INTERVAL,
+        exclusive=INGEST_LOCK,
+    )
+    RELOADER.start()
     yield
     # Uygulama kapandığında yapılacak işlemler (varsa)
+    RELOADER.stop()
+    RELOADER = None
+    SCORING_POOL.shutdown(wait=False)
+    SCORING_POOL = None
+    FAVORITES.close()
     print("API kapatılıyor...")
 
 app = FastAPI(
@@ -114,8 +332,37 @@ class CarResponse(BaseModel):
     yakit_tipi: Optional[str] = None
     link: Optional[str] = None
 
-# Favoriler için in-memory depolama
-FAVORITES: List[Dict[str, Any]] = []
+# Filtrelerde regex deseni olarak (str.contains) uygulanan alanlar. Eşleşme zaten büyük/küçük
+# harf duyarsızdır; desenin kendisi küçük harfe çevrilirse anlamı değişebilir (\D -> \d, \S -> \s)
+PATTERN_FIELDS = ('seri', 'model', 'yakit')
+
+# İsteği normalize et: metinler kırpılır, desen olmayan metinler küçük harfe çevrilir,
+# boş metinler None olur, sayısal sınırlar tek tipe getirilir
+def normalize_request(request: RecommendationRequest) -> RecommendationRequest:
+    values = request.dict()
+    for key in ('marka', 'seri', 'model', 'vites', 'yakit', 'ekstra'):
+        text = values.get(key)
+        if isinstance(text, str):
+            text = text.strip() if key in PATTERN_FIELDS else text.strip().lower()
+            values[key] = text or None
+    values['marka'] = values['marka'] or ''
+    for key in ('alt_fiyat', 'ust_fiyat', 'min_km', 'max_km'):
+        if values[key] is not None:
+            values[key] = float(values[key])
+    return RecommendationRequest(**values)
+
+# Anahtar veri sürümünü de içerir; yeniden yükleme sırasında eski sürümle hesaplanan
+# sonuçlar yeni sürüm için kullanılmaz. Kaçış dizisi içermeyen desenler yalnızca anahtarda
+# küçük harfe çevrilir ('Clio' ile 'clio' aynı sonucu paylaşır, '\D' ile '\d' paylaşmaz).
+def request_cache_key(request: RecommendationRequest, version: int) -> tuple:
+    values = request.dict()
+    for key in PATTERN_FIELDS:
+        if values[key] and '\\' not in values[key]:
+            values[key] = values[key].lower()
+    return (version,) + tuple(sorted(values.items()))
+
+# Favoriler SQLite'ta (WAL) kalıcı tutulur; tüm çalışanlar aynı dosyayı paylaşır
+FAVORITES = FavoritesStore(FAVORITES_DB_PATH)
 
 # Statik dosyaları API rotalarından ayrı bir prefix altında sunmak
 app.mount("/static", StaticFiles(directory="frontend"), name="static")
@@ -124,84 +371,299 @@ app.mount("/static", StaticFiles(directory="frontend"), name="static")
 def read_root():
     return RedirectResponse(url="/static/index.html")
 
+# recommend_cars için kullanıcı metni ve filtre argümanları
+def recommendation_query(request: RecommendationRequest) -> Dict[str, Any]:
+    user_desc = f"{request.marka} {request.seri or ''} {request.model or ''} {request.ekstra or ''}".lower().strip()
+    return dict(
+        user_desc=user_desc, marka=request.marka, seri=request.seri, model=request.model,
+        alt_fiyat=request.alt_fiyat, ust_fiyat=request.ust_fiyat, min_km=request.min_km,
+        max_km=request.max_km, min_yil=request.min_yil, max_yil=request.max_yil,
+        vites=request.vites, yakit=request.yakit, top_n=request.top_n
+    )
+
+# CarResponse alanı -> ilan deposu sütunu (alan sırası yanıt şemasıyla aynı)
+RESPONSE_COLUMNS = {
+    'ilan_no': 'İlan No', 'marka': 'Marka', 'seri': 'Seri', 'model': 'Model', 'fiyat': 'Fiyat',
+    'kilometre': 'Kilometre', 'yil': 'Yıl', 'vites_tipi': 'Vites Tipi', 'yakit_tipi': 'Yakıt Tipi', 'link': 'link',
+}
+NUMBER_FIELDS = {'ilan_no': int, 'fiyat': float, 'kilometre': float, 'yil': int}
+
+def _column_values(recommended: pd.DataFrame, field: str) -> list:
+    column = RESPONSE_COLUMNS[field]
+    if column not in recommended.columns:
+        return [None] * len(recommended)
+    series = recommended[column]
+    if field in NUMBER_FIELDS:
+        cast = NUMBER_FIELDS[field]
+        values = series.to_numpy(dtype=float, na_value=np.nan)
+        return [None if value != value else cast(value) for value in values.tolist()]
+    missing = series.isna().to_numpy()
+    return [None if is_missing else value for value, is_missing in zip(series.to_numpy(dtype=object), missing)]
+
+# Önerilen satırları yanıt şemasındaki sözlüklere dönüştür. Satır satır dolaşmak yerine her
+# sütun bir kez yerel Python tiplerine çevrilir; link'i olmayan ilanlara arabam.com linki verilir.
+def to_car_records(recommended: pd.DataFrame) -> List[Dict[str, Any]]:
+    columns = {field: _column_values(recommended, field) for field in RESPONSE_COLUMNS}
+    links = np.array(columns['link'], dtype=object)
+    ilan_nos = np.array(columns['ilan_no'], dtype=object)
+    missing = pd.isna(links)
+    fallback = missing & (ilan_nos != None) & (ilan_nos != 0)  # noqa: E711
+    links[fallback] = [f"https://www.arabam.com/ilan/{ilan_no}" for ilan_no in ilan_nos[fallback]]
+    links[missing & ~fallback] = None
+    columns['link'] = links.tolist()
+    return [dict(zip(RESPONSE_COLUMNS, values)) for values in zip(*columns.values())]
+
+# Yanıt gövdesini JSON baytlarına çevir (orjson varsa onunla)
+def dump_json(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def json_response(body: bytes) -> Response:
+    return Response(content=body, media_type="application/json")
+
+# Havuz çalışanlarında çalışan hesaplamalar; yalnızca sorgu sözlükleri ve yanıtlar aktarılır.
+# data None ise çalışanın kendi SERVING_DATA referansı kullanılır ('process' modunda fork ile gelen)
+def compute_recommendation(query: Dict[str, Any], data: Optional[ServingData] = None) -> bytes:
+    data = data or SERVING_DATA
+    if data.sql_store is not None:
+        recommended = data.sql_store.recommend(query)
+    else:
+        recommended = recommend_cars(
+            data.listings, **query, tfidf_index=data.tfidf_index, filter_engine=data.filter_engine,
+            ann_index=data.ann_index
+        )
+    with stage('serialize'):
+        return dump_json(to_car_records(recommended) if not recommended.empty else [])
+
+def compute_batch_recommendations(queries: List[Dict[str, Any]],
+                                  data: Optional[ServingData] = None) -> List[bytes]:
+    data = data or SERVING_DATA
+    if data.sql_store is not None:
+        recommended_list = [data.sql_store.recommend(query) for query in queries]
+    else:
+        recommended_list = recommend_cars_batch(
+            data.listings, queries, tfidf_index=data.tfidf_index, filter_engine=data.filter_engine,
+            ann_index=data.ann_index
+        )
+    with stage('serialize'):
+        return [dump_json(to_car_records(recommended) if not recommended.empty else [])
+                for recommended in recommended_list]
+
+# Süreç çalışanında, fork ile devralınan veri sürümüyle hesaplar ve o sürümün numarasını da döndürür
+def score_with_version(func, arg):
+    return SERVING_DATA.version, func(arg)
+
+# Hesaplamayı havuzda çalıştır; (kullanılan veri sürümü, sonuç) döndürür. Aşırı yükte 429,
+# zaman aşımında 504 döndür. İsteğin başında alınan veri sürümü iş parçacığı modunda doğrudan
+# aktarılır; süreç modunda büyük nesneler pickle edilmesin diye aktarılmaz (çalışanlar sürümü
+# fork ile devralır, bu yüzden eski havuzda kuyruktaki işler eski sürümle sonuçlanabilir)
+async def run_scoring(func, arg, data: ServingData):
+    if SCORING_POOL is None:
+        return data.version, await run_in_threadpool(func, arg, data)
+    try:
+        if SCORING_POOL.mode == 'process':
+            return await SCORING_POOL.run(score_with_version, func, arg)
+        return data.version, await SCORING_POOL.run(func, arg, data)
+    except PoolOverloaded:
+        raise HTTPException(status_code=429, detail="Sunucu şu anda çok yoğun, lütfen daha sonra tekrar deneyin.")
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Öneri hesaplaması zaman aşımına uğradı.")
+
+# Sonuç yalnızca önbellek anahtarındaki sürümle hesaplandıysa ve o sürüm hâlâ devredeyse saklanır
+def is_cacheable(version: int, data: ServingData) -> bool:
+    current = SERVING_DATA
+    return current is not None and version == data.version == current.version
+
+# Yanıtlar çalışanda JSON baytlarına çevrilip önbellekte bu haliyle tutulur; response_model
+# yalnızca şema belgesi içindir, gövde yeniden doğrulanmaz ve yeniden serileştirilmez.
+# X-Profile başlığı gönderilen istekler (PROFILE_REQUESTS=1 iken) önbellek ve havuz atlanarak
+# örnekleyici profiler altında hesaplanır; profil dosyasının yolu X-Profile-File başlığında döner
 @app.post("/recommend", response_model=List[CarResponse])
-def get_recommendations(request: RecommendationRequest):
-    if DF_CLEAN is None and DF_OTOSOR is None:
+async def get_recommendations(request: RecommendationRequest, x_profile: Optional[str] = Header(None)):
+    with stage('request'):
+        data = SERVING_DATA
+        if data is None:
+            raise HTTPException(status_code=500, detail="Veritabanı verisi belleğe yüklenemedi. Lütfen API sunucusunu kontrol edin.")
+
+        if not request.marka.strip():
+            raise HTTPException(status_code=400, detail="Marka zorunlu!")
+
+        request = normalize_request(request)
+        if x_profile and PROFILE_REQUESTS:
+            body, profile_path = await run_in_threadpool(
+                profile_call, compute_recommendation, recommendation_query(request), data
+            )
+            response = json_response(body)
+            response.headers["X-Profile-File"] = profile_path
+            return response
+
+        # Aynı (normalize edilmiş) istek için önceden hesaplanmış sonucu kullan
+        with stage('cache_lookup'):
+            cache_key = request_cache_key(request, data.version)
+            cached = RESULT_CACHE.get(cache_key)
+        if cached is not None:
+            count_request('hit')
+            return json_response(cached)
+        count_request('miss')
+
+        with stage('scoring'):
+            version, body = await run_scoring(compute_recommendation, recommendation_query(request), data)
+        if is_cacheable(version, data):
+            RESULT_CACHE.put(cache_key, body, len(body))
+        return json_response(body)
+
+@app.post("/recommend/batch", response_model=List[List[CarResponse]])
+async def get_batch_recommendations(requests: List[RecommendationRequest]):
+    data = SERVING_DATA
+    if data is None:
         raise HTTPException(status_code=500, detail="Veritabanı verisi belleğe yüklenemedi. Lütfen API sunucusunu kontrol edin.")
 
-    if not request.marka.strip():
-        raise HTTPException(status_code=400, detail="Marka zorunlu!")
+    if len(requests) > RECOMMEND_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"Tek seferde en fazla {RECOMMEND_BATCH_MAX} istek gönderilebilir.")
+    for i, request in enumerate(requests):
+        if not request.marka.strip():
+            raise HTTPException(status_code=400, detail=f"Marka zorunlu! (istek {i})")
 
-    # İki DF'i birleştir
-    combined_df = pd.DataFrame()
-    if DF_CLEAN is not None:
-        combined_df = pd.concat([combined_df, DF_CLEAN], ignore_index=True)
-    if DF_OTOSOR is not None:
-        combined_df = pd.concat([combined_df, DF_OTOSOR], ignore_index=True)
+    # Önbellekte olanları al, kalanları tek bir toplu çalıştırmada hesapla
+    requests = [normalize_request(request) for request in requests]
+    cache_keys = [request_cache_key(request, data.version) for request in requests]
+    results = [RESULT_CACHE.get(key) for key in cache_keys]
+    missing = [i for i, result in enumerate(results) if result is None]
+    for result in results:
+        count_request('hit' if result is not None else 'miss')
 
-    if combined_df.empty:
-        raise HTTPException(status_code=500, detail="Hiç veri yüklenemedi.")
+    if missing:
+        with stage('batch_scoring'):
+            version, bodies = await run_scoring(
+                compute_batch_recommendations, [recommendation_query(requests[i]) for i in missing], data
+            )
+        cacheable = is_cacheable(version, data)
+        for i, body in zip(missing, bodies):
+            if cacheable:
+                RESULT_CACHE.put(cache_keys[i], body, len(body))
+            results[i] = body
 
-    # Link sütununu temizle: NaN veya geçersiz değerleri None yap
-    if 'link' in combined_df.columns:
-        combined_df['link'] = combined_df['link'].apply(lambda x: x if isinstance(x, str) and x.strip() else None)
+    # Her sorgunun hazır JSON gövdesi tek bir diziye birleştirilir
+    return json_response(b'[' + b','.join(results) + b']')
 
-    user_desc = f"{request.marka} {request.seri or ''} {request.model or ''} {request.ekstra or ''}".lower().strip()
+@app.get("/recommend/cache/stats", response_model=dict)
+def get_cache_stats():
+    return RESULT_CACHE.stats()
 
-    recommended = recommend_cars(
-        combined_df, user_desc, marka=request.marka, seri=request.seri, model=request.model,
-        alt_fiyat=request.alt_fiyat, ust_fiyat=request.ust_fiyat, min_km=request.min_km,
-        max_km=request.max_km, min_yil=request.min_yil, max_yil=request.max_yil,
-        vites=request.vites, yakit=request.yakit, top_n=request.top_n
-    )
+@app.get("/recommend/pool/stats", response_model=dict)
+def get_pool_stats():
+    return SCORING_POOL.stats() if SCORING_POOL is not None else {}
 
-    if recommended.empty:
-        return []
-
-    response_list = []
-    for _, row in recommended.iterrows():
-        ilan_no = int(row.get('İlan No', 0)) if pd.notna(row.get('İlan No')) else None
-        # Link'i kontrol et: Yeni dataset'ten doğrudan varsa kullan, yoksa arabam.com formatı
-        link = row.get('link') if pd.notna(row.get('link')) and isinstance(row.get('link'), str) else None
-        if not link and ilan_no:
-            link = f"https://www.arabam.com/ilan/{ilan_no}"
-        response_list.append(CarResponse(
-            ilan_no=ilan_no,
-            marka=row.get('Marka'),
-            seri=row.get('Seri'),
-            model=row.get('Model'),
-            fiyat=float(row.get('Fiyat')) if pd.notna(row.get('Fiyat')) else None,
-            kilometre=float(row.get('Kilometre')) if pd.notna(row.get('Kilometre')) else None,
-            yil=int(row.get('Yıl')) if pd.notna(row.get('Yıl')) else None,
-            vites_tipi=row.get('Vites Tipi'),
-            yakit_tipi=row.get('Yakıt Tipi'),
-            link=link
-        ))
-
-    return response_list
+@app.get("/recommend/ann/stats", response_model=dict)
+def get_ann_stats():
+    data = SERVING_DATA
+    return data.ann_index.stats() if data is not None and data.ann_index is not None else {}
+
+# Prometheus metin biçiminde aşama süreleri, aday sayıları, istek sayaçları ve
+# önbellek/havuz durum değerleri
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    gauges = {"serving_data_version": SERVING_DATA.version if SERVING_DATA else 0}
+    stats = {f"result_cache_{key}": value for key, value in RESULT_CACHE.stats().items()}
+    if SCORING_POOL is not None:
+        stats.update({f"scoring_pool_{key}": value for key, value in SCORING_POOL.stats().items()})
+    gauges.update({key: value for key, value in stats.items()
+                   if isinstance(value, (int, float)) and not isinstance(value, bool)})
+    return PlainTextResponse(render_metrics(gauges), media_type=PROMETHEUS_CONTENT_TYPE)
+
+@app.post("/admin/reload", status_code=202, response_model=dict)
+def reload_data():
+    if RELOADER is None:
+        raise HTTPException(status_code=503, detail="Yeniden yükleme şu anda kullanılamıyor.")
+    if not RELOADER.trigger(reason="admin"):
+        raise HTTPException(status_code=409, detail="Yeniden yükleme zaten devam ediyor.")
+    return {"message": "Veri arka planda yeniden yükleniyor.", "current_version": SERVING_DATA.version if SERVING_DATA else None}
+
+@app.get("/admin/reload/status", response_model=dict)
+def get_reload_status():
+    status = RELOADER.stats() if RELOADER is not None else {}
+    status["current_version"] = SERVING_DATA.version if SERVING_DATA else None
+    return status
+
+class IngestRequest(BaseModel):
+    csv_path: Optional[str] = None
+    removed: List[int] = []
+
+# Scraper CSV'sine eklenen yeni/değişmiş ilanları ve kaldırılan ilanları tam yeniden yükleme
+# yapmadan yeni bir veri sürümü olarak devreye al
+@app.post("/admin/ingest", response_model=dict)
+def ingest_listings(request: IngestRequest):
+    # Kilit alım boyunca tutulur; yeniden yükleme bu sürede veriyi okuyamaz ve devreye alamaz
+    if not INGEST_LOCK.acquire(blocking=False):
+        if RELOADER is not None and RELOADER.stats()["running"]:
+            raise HTTPException(status_code=409, detail="Yeniden yükleme devam ediyor; artımlı alım yapılamaz.")
+        raise HTTPException(status_code=409, detail="Artımlı veri alımı zaten devam ediyor.")
+    try:
+        data = SERVING_DATA
+        if data is None:
+            raise HTTPException(status_code=503, detail="Veri henüz yüklenmedi.")
+        if data.sql_store is not None:
+            raise HTTPException(status_code=409, detail="SQL sorgu modunda artımlı alım yapılmaz; "
+                                                        "veritabanı doğrudan sorgulanır, /admin/reload kullanın.")
+        if RELOADER is not None and RELOADER.stats()["running"]:
+            raise HTTPException(status_code=409, detail="Yeniden yükleme devam ediyor; artımlı alım yapılamaz.")
+        try:
+            raw, csv_offset = INGESTOR.read_new_rows(request.csv_path or SCRAPER_CSV_PATH)
+            listings, tfidf_index, filter_engine, report = INGESTOR.ingest(data, raw, request.removed, csv_offset)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Artımlı veri alımı başarısız: {e}")
+        if listings is not None:
+            # Yeni satırlar mevcut ANN kümelerine atanır; silinenler filtre motorunca elenir
+            ann_index = data.ann_index.extend(tfidf_index[0]) if data.ann_index is not None else None
+            swap_serving_data(ServingData(0, listings, tfidf_index, filter_engine, ann_index=ann_index))
+        if RELOADER is not None:
+            # Veritabanına yazılan değişiklikler (ve CSV konumu) zaten bellekte; dosya izleme tekrar yüklemesin
+            RELOADER.mark_current()
+            if listings is not None and report["needs_refit"]:
+                report["refit_triggered"] = RELOADER.trigger(reason="drift")
+        report["current_version"] = SERVING_DATA.version if SERVING_DATA else None
+        return report
+    finally:
+        INGEST_LOCK.release()
+
+@app.get("/admin/ingest/stats", response_model=dict)
+def get_ingest_stats():
+    return INGESTOR.stats
 
 @app.get("/favorites", response_model=List[CarResponse])
 def get_favorites():
-    return [CarResponse(**fav) for fav in FAVORITES]
+    return FAVORITES.all()
 
 @app.post("/favorites", response_model=dict)
 def add_favorite(car: CarResponse):
-    if any(fav.get('ilan_no') == car.ilan_no for fav in FAVORITES):
+    if car.ilan_no is None:
+        raise HTTPException(status_code=400, detail="Favorilere eklemek için ilan_no gerekli.")
+    if not FAVORITES.add(car.dict()):
         raise HTTPException(status_code=400, detail="Bu ilan zaten favorilerde.")
-    FAVORITES.append(car.dict())
     return {"message": f"{car.marka} {car.model} favorilere eklendi!"}
 
+# Birden çok ilanı tek transaction ile ekle; zaten favorilerde olanlar atlanır
+@app.post("/favorites/bulk", response_model=dict)
+def add_favorites_bulk(cars: List[CarResponse]):
+    if any(car.ilan_no is None for car in cars):
+        raise HTTPException(status_code=400, detail="Favorilere eklemek için ilan_no gerekli.")
+    added, skipped = FAVORITES.add_many([car.dict() for car in cars])
+    return {"message": f"{len(added)} ilan favorilere eklendi!", "added": added, "skipped": skipped}
+
+# Birden çok ilanı tek transaction ile sil; favorilerde olmayanlar 'missing' olarak döner
+@app.post("/favorites/bulk/delete", response_model=dict)
+def delete_favorites_bulk(ilan_nos: List[int]):
+    removed, missing = FAVORITES.remove_many(ilan_nos)
+    return {"message": f"{len(removed)} ilan favorilerden silindi!", "removed": removed, "missing": missing}
+
 @app.delete("/favorites/{ilan_no}", response_model=dict)
 def delete_favorite(ilan_no: int):
-    global FAVORITES
-    initial_len = len(FAVORITES)
-    FAVORITES = [fav for fav in FAVORITES if fav.get('ilan_no') != ilan_no]
-    if len(FAVORITES) < initial_len:
+    if FAVORITES.remove(ilan_no):
         return {"message": "Favorilerden silindi!"}
     raise HTTPException(status_code=404, detail="İlan favorilerde bulunamadı.")
 
 @app.delete("/favorites", response_model=dict)
 def clear_favorites():
-    global FAVORITES
-    FAVORITES = []
-    return {"message": "Tüm favoriler temizlendi!"}
\ No newline at end of file
+    FAVORITES.clear()
+    return {"message": "Tüm favoriler temizlendi!"}
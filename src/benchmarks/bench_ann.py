@@ -0,0 +1,90 @@
+"""
+ANN (IVF) modunun tam kosinüs yoluna göre recall@k ve gecikme ölçümü.
+
+Sentetik veri bench_suite ile aynı şekilde kurulur; indeks bir kez eğitilir ve her
+--nprobe değeri için sabit tohumlu sorgular hem tam yoldan hem ANN yolundan geçirilir.
+recall@k, tam yolun ilk k sonucundan ANN yolunun ilk k sonucunda da bulunanların oranıdır
+(sorgular üzerinden ortalama). Sonuçlar 'ann.' bölümü olarak --output dosyasına eklenir.
+
+Kullanım (src dizininden):
+    python benchmarks/bench_ann.py --rows 500000 --nprobe 1 4 8 16 32 --output bench_results.json
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ann import AnnIndex  # noqa: E402
+from benchmarks import load_test  # noqa: E402
+from benchmarks.bench_suite import bench_startup, print_results, to_query  # noqa: E402
+from benchmarks.results import write_results  # noqa: E402
+from recommendation import recommend_cars  # noqa: E402
+
+
+def run_queries(listings, queries, tfidf_index, engine, ann_index=None):
+    """Her sorgu için (gecikmeler ms, önerilen satır etiketleri) döndürür."""
+    timings, labels = [], []
+    for query in queries:
+        start = time.perf_counter()
+        recommended = recommend_cars(listings, **query, tfidf_index=tfidf_index, filter_engine=engine,
+                                     ann_index=ann_index)
+        timings.append((time.perf_counter() - start) * 1000)
+        labels.append(list(recommended.index))
+    return np.array(timings), labels
+
+
+def recall_at_k(exact, approx):
+    scores = [len(set(e) & set(a)) / len(e) for e, a in zip(exact, approx) if e]
+    return float(np.mean(scores)) if scores else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    load_test.add_arguments(parser)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--top-n', type=int, default=10)
+    parser.add_argument('--components', type=int, default=None, help='SVD boyutu (varsayılan ANN_COMPONENTS)')
+    parser.add_argument('--lists', type=int, default=None, help='Küme sayısı (varsayılan ANN_LISTS / karekök)')
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[1, 4, 8, 16, 32])
+    parser.add_argument('--output', default=None, help="Sonuçların yazılacağı JSON ('ann.' bölümü güncellenir)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        _, listings, tfidf_index, engine = bench_startup(directory, args)
+
+    results = {'ann.rows': len(listings)}
+    start = time.perf_counter()
+    # Sentetik sorgular da ANN'den geçsin diye aday sınırı kapatılır
+    ann_index = AnnIndex.build(tfidf_index[0], n_components=args.components, n_lists=args.lists,
+                               seed=args.seed, min_candidates=0)
+    results['ann.build_s'] = time.perf_counter() - start
+    results['ann.lists'] = ann_index.n_lists
+    results['ann.index_mb'] = (ann_index.assignments.nbytes + ann_index.centroids.nbytes
+                               + ann_index.svd.components_.nbytes) / 1024 ** 2
+
+    # Metinsiz sorgular ANN'yi kullanmadığından yalnızca metinli sorgular ölçülür
+    bodies = [body for body in load_test.make_queries(args.queries * 2, args.seed) if body.get('ekstra')]
+    queries = [dict(to_query(body), top_n=args.top_n) for body in bodies[:args.queries]]
+    timings, exact = run_queries(listings, queries, tfidf_index, engine)
+    results['ann.exact_p50_ms'] = float(np.percentile(timings, 50))
+    results['ann.exact_p95_ms'] = float(np.percentile(timings, 95))
+
+    for nprobe in args.nprobe:
+        ann_index.nprobe = nprobe
+        timings, approx = run_queries(listings, queries, tfidf_index, engine, ann_index)
+        results[f'ann.nprobe_{nprobe}.recall_at_{args.top_n}'] = recall_at_k(exact, approx)
+        results[f'ann.nprobe_{nprobe}.p50_ms'] = float(np.percentile(timings, 50))
+        results[f'ann.nprobe_{nprobe}.p95_ms'] = float(np.percentile(timings, 95))
+
+    print_results(results)
+    if args.output:
+        write_results(args.output, results, args, section='ann')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+combine_features için eski iterrows döngüsü ile vektörel sürümün karşılaştırması.
+
+Kullanım (src dizininden):
+    python benchmarks/bench_combine_features.py --db data/arabam.db --table arabam
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+import sqlalchemy as sa
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from features import combine_features  # noqa: E402
+from preprocessing import load_and_preprocess_from_db  # noqa: E402
+
+
+def combine_features_iterrows(df):
+    """Referans: önceki satır satır uygulama."""
+    combined = []
+    desc_col = 'cleaned_description' if 'cleaned_description' in df.columns else 'Açıklama'
+    for _, row in df.iterrows():
+        text_parts = []
+        if pd.notna(row.get('Marka')):
+            text_parts.append(row['Marka'])
+        if pd.notna(row.get('Seri')):
+            text_parts.append(row['Seri'])
+        if pd.notna(row.get('Model')):
+            text_parts.append(row['Model'])
+        if desc_col in df.columns and pd.notna(row[desc_col]):
+            text_parts.append(row[desc_col])
+        combined.append(" ".join(text_parts))
+    return combined
+
+
+def best_of(func, df, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(df)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default='data/arabam.db')
+    parser.add_argument('--table', default='arabam')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with sa.create_engine(f'sqlite:///{args.db}').connect() as conn:
+        df = load_and_preprocess_from_db(conn, table_name=args.table)
+    print(f"{len(df)} satır yüklendi ({args.db}:{args.table}).")
+
+    old_time, old_result = best_of(combine_features_iterrows, df, args.repeat)
+    new_time, new_result = best_of(combine_features, df, args.repeat)
+
+    if old_result != new_result:
+        raise SystemExit("Hata: vektörel sonuç iterrows sonucu ile aynı değil!")
+    print(f"iterrows : {old_time:.3f} sn")
+    print(f"vektörel : {new_time:.3f} sn")
+    print(f"hızlanma : {old_time / new_time:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Asenkron tarama motoru ile eski sayfa başına ThreadPoolExecutor yaklaşımının yerel sahte
+site (stub_site) üzerinde karşılaştırması. Ağ erişimi veya Chrome gerektirmez.
+
+Kullanım (src dizininden):
+    python benchmarks/bench_crawler.py --listings 1000 --delay 0.05 --fail-rate 0.02
+
+--windows ile ayrıca tüm fiyat penceresi döngüsü URL modunda (Selenium olmadan) çalıştırılıp
+dakikadaki pencere sayısı raporlanır.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_site import StubSite, write_fixtures  # noqa: E402
+from crawler import AsyncFetcher  # noqa: E402
+from scraper import crawl_window, fetch_detail_page, parse_listing_urls, setup_session, scrape_listings_async  # noqa: E402
+
+
+def run_threaded(origin, window_url, max_pages, max_workers):
+    """Eski döngü: her liste sayfası için yeni havuz, sayfalar arası bekleme olmadan."""
+    session = setup_session()
+    processed_urls, rows = set(), []
+    for page in range(1, max_pages + 1):
+        response = session.get(f"{window_url}&page={page}", timeout=15)
+        listing_urls = parse_listing_urls(response.text, origin)
+        if not listing_urls:
+            break
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(fetch_detail_page, session, url, page, idx, processed_urls)
+                       for idx, url in enumerate(listing_urls)]
+            rows.extend(data for data in (f.result() for f in as_completed(futures)) if data)
+    return rows
+
+
+async def run_async(origin, window_url, max_pages, max_workers, rate, burst):
+    async with AsyncFetcher(rate=rate, burst=burst, max_connections=max_workers, backoff_factor=0.05) as fetcher:
+        rows, _, _ = await crawl_window(fetcher, window_url, max_pages, max_workers, set(),
+                                        origin=origin, on_page=lambda rows, page: None)
+        return rows, dict(fetcher.stats)
+
+
+def run_windows(origin, path, max_pages, max_workers, rate, burst):
+    """Fiyat penceresi döngüsünü URL modunda çalıştırır; çıktılar path/data/deneme altına yazılır."""
+    cwd = os.getcwd()
+    os.makedirs(os.path.join(path, 'data', 'deneme'), exist_ok=True)
+    os.chdir(path)
+    try:
+        asyncio.run(scrape_listings_async(max_pages, max_workers, rate, burst, window_mode='url',
+                                          filter_url=f"{origin}/ikinci-el?sort=price.asc&take=50", origin=origin))
+        return pd.read_csv(os.path.join('data', 'deneme', 'cars_scraped_final.csv'))
+    finally:
+        os.chdir(cwd)
+
+
+def check_parity(rows, expected):
+    """Ayrıştırılan İlan No ve fiyatların fikstürlerle aynı olduğunu doğrular."""
+    got = {int(row['İlan No']): int(row['Fiyat']) for row in rows}
+    want = {int(k): int(v) for k, v in zip(expected['İlan No'], expected['Fiyat'])}
+    return got == want
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--listings', type=int, default=1000)
+    parser.add_argument('--max-pages', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=10)
+    parser.add_argument('--rate', type=float, default=1000.0, help='Host başına saniyedeki istek sınırı')
+    parser.add_argument('--burst', type=int, default=20)
+    parser.add_argument('--delay', type=float, default=0.05, help='Sahte sitenin yanıt gecikmesi (sn)')
+    parser.add_argument('--fail-rate', type=float, default=0.0)
+    parser.add_argument('--windows', action='store_true', help='Pencere döngüsünü de ölç (pencere başına 2 sayfa)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as path:
+        listings = write_fixtures(path, args.listings)
+        expected = listings.dropna(subset=['Fiyat']).sort_values(['Fiyat', 'İlan No'])
+        expected = expected.head(args.max_pages * 50)
+
+        with StubSite(path, delay=args.delay) as site:
+            window_url = f"{site.origin}/ikinci-el?sort=price.asc&take=50"
+            start = time.perf_counter()
+            rows = run_threaded(site.origin, window_url, args.max_pages, args.workers)
+            elapsed = time.perf_counter() - start
+            print(f"{'thread havuzu':<16} {len(rows):>6} ilan {elapsed:>7.2f} sn {len(rows) / elapsed:>8.1f} ilan/sn "
+                  f"parite={check_parity(rows, expected)}")
+
+        with StubSite(path, delay=args.delay, fail_rate=args.fail_rate) as site:
+            window_url = f"{site.origin}/ikinci-el?sort=price.asc&take=50"
+            start = time.perf_counter()
+            rows, stats = asyncio.run(run_async(site.origin, window_url, args.max_pages, args.workers,
+                                                args.rate, args.burst))
+            elapsed = time.perf_counter() - start
+            print(f"{'asenkron':<16} {len(rows):>6} ilan {elapsed:>7.2f} sn {len(rows) / elapsed:>8.1f} ilan/sn "
+                  f"parite={check_parity(rows, expected)} istek={stats} sunucu_hata={site.failures}")
+
+        if args.windows:
+            with StubSite(path, delay=args.delay) as site:
+                start = time.perf_counter()
+                scraped = run_windows(site.origin, path, 2, args.workers, args.rate, args.burst)
+                elapsed = time.perf_counter() - start
+                windows = -(-len(scraped) // 100)
+                print(f"{'pencereler':<16} {len(scraped):>6} ilan {elapsed:>7.2f} sn ~{windows} pencere "
+                      f"({windows / elapsed * 60:.0f} pencere/dk) tekil={scraped['İlan No'].is_unique}")
+
+
+if __name__ == '__main__':
+    pd.set_option('display.width', 120)
+    main()
@@ -0,0 +1,64 @@
+"""
+Tam sütun maskesi (filter_positions) ile indeksli FilterEngine karşılaştırması.
+
+Kullanım (src dizininden):
+    python benchmarks/bench_filters.py --rows 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_listings  # noqa: E402
+from filters import FilterEngine  # noqa: E402
+from recommendation import filter_positions  # noqa: E402
+
+QUERIES = {
+    'marka': dict(marka='Renault'),
+    'marka+fiyat': dict(marka='Renault', alt_fiyat=500_000, ust_fiyat=900_000),
+    'fiyat+km+yil': dict(marka='Volkswagen', alt_fiyat=1_000_000, ust_fiyat=1_200_000,
+                         max_km=50_000, min_yil=2020),
+    'tum_filtreler': dict(marka='Ford', seri='focus', model='1.6', vites='otomatik', yakit='dizel',
+                          alt_fiyat=300_000, ust_fiyat=3_000_000, min_km=10_000, max_km=200_000,
+                          min_yil=2010, max_yil=2022),
+    'dar_fiyat': dict(marka='Toyota', alt_fiyat=2_000_000, ust_fiyat=2_001_000),
+}
+
+
+def best_of(func, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    df = make_listings(args.rows)
+    start = time.perf_counter()
+    engine = FilterEngine(df)
+    print(f"{len(df)} satır, indeks kurulumu {time.perf_counter() - start:.2f} sn")
+
+    print(f"{'sorgu':<15}{'eşleşme':>10}{'maske (ms)':>14}{'indeks (ms)':>14}{'hızlanma':>10}")
+    for name, query in QUERIES.items():
+        mask_time, expected = best_of(lambda: filter_positions(df, **query), args.repeat)
+        index_time, actual = best_of(lambda: engine.query(**query), args.repeat)
+        if not np.array_equal(expected, actual):
+            raise SystemExit(f"Hata: '{name}' sorgusunda indeks sonucu maske sonucu ile aynı değil!")
+        print(f"{name:<15}{len(actual):>10}{mask_time * 1000:>14.2f}{index_time * 1000:>14.2f}"
+              f"{mask_time / index_time:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Detay ve liste sayfası ayrıştırıcı arka uçlarının (parsers.py) parite kontrolü ve hız ölçümü.
+
+Önce her arka ucun çıktısı benchmarks/fixtures altındaki kaydedilmiş sayfalar ve sentetik
+detay sayfaları üzerinde referans BeautifulSoup çıktısıyla özellik, fiyat ve açıklama
+bazında karşılaştırılır; farklı çıkan arka uç ölçülmez ve betik 1 ile çıkar. Ardından tek
+süreçte (tek çekirdek) saniyede ayrıştırılan sayfa sayısı raporlanır.
+
+Kullanım (src dizininden):
+    python benchmarks/bench_parsers.py --synthetic 200 --repeat 3
+"""
+import argparse
+import glob
+import logging
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_site import render_detail  # noqa: E402
+from benchmarks.synthetic import make_listings  # noqa: E402
+from parsers import available_backends, get_backend  # noqa: E402
+from scraper import parse_detail_page, parse_listing_urls  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+FIXTURE_URL = "https://www.arabam.com/ilan/galeriden-satilik-otomobil/ornek-ilan/{}"
+
+
+def load_pages(synthetic):
+    """(ad, url, html) üçlüleri: kaydedilmiş fikstürler + sentetik detay sayfaları."""
+    pages = []
+    for i, path in enumerate(sorted(glob.glob(os.path.join(FIXTURES_DIR, 'detail_*.html')))):
+        with open(path, encoding='utf-8') as f:
+            pages.append((os.path.basename(path), FIXTURE_URL.format(90000000 + i), f.read()))
+    if synthetic:
+        for row in make_listings(synthetic, seed=7).to_dict('records'):
+            pages.append((f"sentetik/{row['İlan No']}", FIXTURE_URL.format(row['İlan No']), render_detail(row)))
+    return pages
+
+
+def split_extractors(data):
+    """Ayrıştırma çıktısını özellikler, fiyat ve açıklama olarak ayırır."""
+    normalize = lambda value: None if value is pd.NA else value  # noqa: E731
+    properties = {k: normalize(v) for k, v in data.items() if k not in ('Fiyat', 'Açıklama')}
+    return {
+        'özellikler': properties,
+        'fiyat': normalize(data.get('Fiyat')),
+        'açıklama': normalize(data.get('Açıklama')),
+    }
+
+
+def check_parity(backend_name, pages, listing_html):
+    """Arka ucun referansla farklı çıktığı (sayfa, çıkarıcı, beklenen, bulunan) listesini döndürür."""
+    reference, backend = get_backend('bs4'), get_backend(backend_name)
+    mismatches = []
+    for name, url, html in pages:
+        expected = split_extractors(parse_detail_page(html, url, backend=reference))
+        got = split_extractors(parse_detail_page(html, url, backend=backend))
+        for extractor in expected:
+            if expected[extractor] != got[extractor]:
+                mismatches.append((name, extractor, expected[extractor], got[extractor]))
+    expected_urls = parse_listing_urls(listing_html, backend=reference)
+    got_urls = parse_listing_urls(listing_html, backend=backend)
+    if expected_urls != got_urls:
+        mismatches.append(('listing_page.html', 'linkler', expected_urls, got_urls))
+    return mismatches
+
+
+def measure(backend_name, pages, repeat):
+    """Tek çekirdekte saniyede ayrıştırılan detay sayfası sayısı (CPU süresine göre)."""
+    backend = get_backend(backend_name)
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.process_time()
+        for _, url, html in pages:
+            parse_detail_page(html, url, backend=backend)
+        best = min(best, time.process_time() - start)
+    return len(pages) / best if best else float('inf')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--synthetic', type=int, default=200, help='Eklenecek sentetik detay sayfası sayısı')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--backends', nargs='*', default=None)
+    args = parser.parse_args()
+
+    # Eksik konteyner vb. uyarıları ölçümü etkilemesin
+    logging.disable(logging.WARNING)
+    pages = load_pages(args.synthetic)
+    with open(os.path.join(FIXTURES_DIR, 'listing_page.html'), encoding='utf-8') as f:
+        listing_html = f.read()
+
+    backends = args.backends or available_backends()
+    print(f"{len(pages)} detay sayfası, arka uçlar: {', '.join(backends)}")
+    failed = False
+    results = {}
+    for name in backends:
+        mismatches = check_parity(name, pages, listing_html) if name != 'bs4' else []
+        if mismatches:
+            failed = True
+            print(f"{name:<12} PARİTE HATASI ({len(mismatches)} fark), ölçülmedi")
+            for page, extractor, expected, got in mismatches[:10]:
+                print(f"    {page} [{extractor}]\n      beklenen: {expected!r}\n      bulunan:  {got!r}")
+            continue
+        results[name] = measure(name, pages, args.repeat)
+
+    reference = results.get('bs4')
+    for name, rate in results.items():
+        speedup = f"{rate / reference:>5.1f}x" if reference else ''
+        print(f"{name:<12} parite OK  {rate:>9.0f} sayfa/sn/çekirdek {speedup}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+"""
+Öneri servisi için tekrarlanabilir benchmark paketi.
+
+Bölümler:
+  startup    Sentetik arabam/otosor CSV'leri -> SQLite aktarımı, load_and_preprocess_from_db,
+             ilan deposu, TF-IDF indeksi ve filtre indeksi kurulum süreleri, en yüksek bellek.
+  filter     Tam sütun maskesi ile FilterEngine karşılaştırması (bench_filters sorguları).
+  tfidf      İndeks satırı seçimi, tek/toplu kosinüs benzerliği ve adaylar üzerinde eğitim.
+  topk       argpartition tabanlı top_k_order ile tüm adayların sıralanması.
+  recommend  Sabit tohumlu istek karışımıyla uçtan uca recommend_cars / recommend_cars_batch.
+  load       (--load-test) yerel uvicorn örneğine karşı yük testi (load_test.py).
+
+Süreler tekrarların ortancasıdır. Sonuçlar --output ile JSON'a yazılır; iki çalıştırma
+--compare ile karşılaştırılır ve --threshold'dan fazla kötüleşme varsa çıkış kodu 1 olur.
+
+Kullanım (src dizininden):
+    python benchmarks/bench_suite.py --rows 200000 --output bench_results.json
+    python benchmarks/bench_suite.py --rows 50000 --load-test --concurrency 16 --output bench_results.json
+    python benchmarks/bench_suite.py --compare eski.json yeni.json
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import load_test  # noqa: E402
+from benchmarks.bench_filters import QUERIES  # noqa: E402
+from benchmarks.results import compare, write_results  # noqa: E402
+from benchmarks.synthetic import parse_brand_weights, write_source_csvs  # noqa: E402
+from features import build_tfidf_index, compute_similarity, compute_similarity_batch, compute_tfidf  # noqa: E402
+from filters import FilterEngine  # noqa: E402
+from ingest import stream_csv_to_sqlite  # noqa: E402
+from preprocessing import build_listings_store, load_and_preprocess_from_db, memory_report  # noqa: E402
+from recommendation import filter_positions, recommend_cars, recommend_cars_batch, top_k_order  # noqa: E402
+from reloader import peak_rss_mb  # noqa: E402
+from sql_store import get_engine  # noqa: E402
+
+
+def timed(func, repeat):
+    """func'u repeat kez çalıştırır; (ortanca süre ms, son sonuç) döndürür."""
+    timings, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings)), result
+
+
+def to_query(body):
+    """İstek gövdesini app.recommendation_query ile aynı recommend_cars argümanlarına çevirir."""
+    body = {key: value.strip().lower() if isinstance(value, str) else value for key, value in body.items()}
+    user_desc = f"{body['marka']} {body.get('seri') or ''} {body.get('model') or ''} {body.get('ekstra') or ''}"
+    query = dict(user_desc=user_desc.lower().strip(), top_n=body.get('top_n', 5))
+    for key in ('marka', 'seri', 'model', 'alt_fiyat', 'ust_fiyat', 'min_km', 'max_km', 'min_yil', 'max_yil',
+                'vites', 'yakit'):
+        query[key] = body.get(key)
+    return query
+
+
+def bench_startup(directory, args):
+    results, frames = {}, {}
+    start = time.perf_counter()
+    paths = write_source_csvs(directory, args.rows, args.otosor_share, parse_brand_weights(args.brand_weights),
+                              tuple(args.description_words), args.seed)
+    results['startup.synthetic_csv_s'] = time.perf_counter() - start
+
+    total = time.perf_counter()
+    for source, csv_path in paths.items():
+        db_path = os.path.join(directory, f'{source}.db')
+        start = time.perf_counter()
+        stream_csv_to_sqlite(csv_path, db_path, source)
+        results[f'startup.csv_to_sqlite.{source}_s'] = time.perf_counter() - start
+        start = time.perf_counter()
+        with get_engine(db_path).connect() as conn:
+            frames[source] = load_and_preprocess_from_db(conn, table_name=source)
+        results[f'startup.preprocess.{source}_s'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    listings = build_listings_store(frames)
+    results['startup.listings_store_s'] = time.perf_counter() - start
+    start = time.perf_counter()
+    tfidf_index = build_tfidf_index(listings)
+    results['startup.tfidf_index_s'] = time.perf_counter() - start
+    start = time.perf_counter()
+    engine = FilterEngine(listings)
+    results['startup.filter_index_s'] = time.perf_counter() - start
+    results['startup.total_s'] = time.perf_counter() - total
+    results['startup.rows'] = len(listings)
+    results['startup.listings_mb'] = memory_report(listings)['total'] / 1024 ** 2
+    results['startup.peak_rss_mb'] = peak_rss_mb()
+    return results, listings, tfidf_index, engine
+
+
+def bench_filters(listings, engine, repeat):
+    results = {}
+    for name, query in QUERIES.items():
+        mask_ms, expected = timed(lambda: filter_positions(listings, **query), repeat)
+        index_ms, actual = timed(lambda: engine.query(**query), repeat)
+        if not np.array_equal(expected, actual):
+            raise SystemExit(f"Hata: '{name}' sorgusunda indeks sonucu maske sonucu ile aynı değil!")
+        results[f'filter.{name}.candidates'] = len(actual)
+        results[f'filter.{name}.mask_ms'] = mask_ms
+        results[f'filter.{name}.index_ms'] = index_ms
+    return results
+
+
+def bench_tfidf(listings, tfidf_index, engine, repeat):
+    tfidf_matrix, vectorizer = tfidf_index
+    positions = engine.query(**QUERIES['marka'])
+    text = 'renault temiz bakımlı hatasız'
+    results = {'tfidf.candidates': len(positions)}
+    results['tfidf.rows_slice_ms'], rows = timed(lambda: tfidf_matrix[positions], repeat)
+    results['tfidf.similarity_ms'], _ = timed(lambda: compute_similarity(vectorizer, rows, text), repeat)
+    results['tfidf.fit_candidates_ms'], _ = timed(lambda: compute_tfidf(listings.iloc[positions]), repeat)
+
+    positions_list = [engine.query(**query) for query in QUERIES.values()] * 7
+    texts = [f"{query['marka'].lower()} temiz {i}" for i, query in enumerate(list(QUERIES.values()) * 7)]
+    results['tfidf.batch_similarity_35_ms'], _ = timed(
+        lambda: compute_similarity_batch(vectorizer, tfidf_matrix, texts, positions_list), repeat)
+    return results
+
+
+def bench_topk(rows, repeat, seed):
+    rng = np.random.default_rng(seed)
+    # Eşitliklerin de çözülmesi için benzerlikler yuvarlanır
+    similarities = rng.random(rows).round(2)
+    prices = rng.integers(100_000, 5_000_000, size=rows).astype(float)
+    years = rng.integers(1995, 2026, size=rows).astype(float)
+    results = {'topk.candidates': rows}
+    results['topk.partition_top10_ms'], top = timed(lambda: top_k_order(similarities, prices, years, 10), repeat)
+    results['topk.full_sort_ms'], order = timed(lambda: top_k_order(similarities, prices, years, None), repeat)
+    if not np.array_equal(top, order[:10]):
+        raise SystemExit("Hata: top_k_order sonucu tam sıralamanın ilk 10'u ile aynı değil!")
+    return results
+
+
+def bench_recommend(listings, tfidf_index, engine, repeat, seed):
+    queries = [to_query(body) for body in load_test.make_queries(50, seed)]
+    timings = []
+    for query in queries:
+        elapsed, _ = timed(lambda: recommend_cars(listings, **query, tfidf_index=tfidf_index,
+                                                  filter_engine=engine), repeat)
+        timings.append(elapsed)
+    results = {
+        'recommend.single_p50_ms': float(np.percentile(timings, 50)),
+        'recommend.single_p95_ms': float(np.percentile(timings, 95)),
+    }
+    results['recommend.batch_50_ms'], _ = timed(
+        lambda: recommend_cars_batch(listings, queries, tfidf_index=tfidf_index, filter_engine=engine), repeat)
+    return results
+
+
+def print_results(results):
+    for key, value in results.items():
+        print(f"{key:<48} {value:>12.3f}" if isinstance(value, float) else f"{key:<48} {value:>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    load_test.add_arguments(parser)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--load-test', action='store_true', help='Yük testini de çalıştır')
+    parser.add_argument('--output', default=None, help='Sonuçların yazılacağı JSON dosyası')
+    parser.add_argument('--compare', nargs=2, metavar=('ESKI', 'YENI'), help='İki sonuç dosyasını karşılaştır')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Kötüleşme sayılan değişim oranı')
+    args = parser.parse_args()
+
+    if args.compare:
+        regressions = compare(*args.compare, threshold=args.threshold)
+        if regressions:
+            print(f"{len(regressions)} ölçüm %{args.threshold * 100:.0f}'dan fazla kötüleşti.")
+        sys.exit(1 if regressions else 0)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        startup, listings, tfidf_index, engine = bench_startup(directory, args)
+        results.update(startup)
+    results.update(bench_filters(listings, engine, args.repeat))
+    results.update(bench_tfidf(listings, tfidf_index, engine, args.repeat))
+    results.update(bench_topk(len(listings), args.repeat, args.seed))
+    results.update(bench_recommend(listings, tfidf_index, engine, args.repeat, args.seed))
+    if args.load_test:
+        del listings, tfidf_index, engine
+        results.update(load_test.run(args))
+
+    print_results(results)
+    if args.output:
+        write_results(args.output, results, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+"""
+Öneri servisine karşı çevrimdışı yük testi.
+
+Geçici bir dizinde sentetik arabam.csv/otosor.csv ile yerel bir uvicorn örneği başlatılır
+(veri yüklenene kadar beklenir), ardından sabit tohumla üretilen /recommend istekleri
+belirtilen eşzamanlılıkla gönderilir. Verim (istek/sn) ve p50/p95/p99 gecikmeler raporlanır.
+--url verilirse sunucu başlatılmaz, çalışan örnek kullanılır.
+
+Kullanım (src dizininden):
+    python benchmarks/load_test.py --rows 50000 --concurrency 16 --requests 2000 --output bench_results.json
+    python benchmarks/load_test.py --env QUERY_MODE=sql --env SCORING_MODE=process
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.results import write_results  # noqa: E402
+from benchmarks.synthetic import BRANDS, FUELS, GEARS, WORDS, parse_brand_weights, write_source_csvs  # noqa: E402
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_queries(count, seed=0):
+    """Sentetik markalar üzerinde, farklı filtre kombinasyonlarına sahip istek gövdeleri."""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        brand = rng.choice(list(BRANDS))
+        query = {'marka': brand, 'top_n': rng.choice([5, 10, 20])}
+        if rng.random() < 0.5:
+            query['seri'] = rng.choice(BRANDS[brand])
+        if rng.random() < 0.5:
+            low = rng.randrange(100_000, 3_000_000, 50_000)
+            query.update(alt_fiyat=low, ust_fiyat=low + rng.randrange(200_000, 2_000_000, 50_000))
+        if rng.random() < 0.3:
+            query['max_km'] = rng.randrange(50_000, 400_000, 10_000)
+        if rng.random() < 0.3:
+            query['min_yil'] = rng.randrange(1995, 2024)
+        if rng.random() < 0.2:
+            query['vites'] = rng.choice(GEARS)
+        if rng.random() < 0.2:
+            query['yakit'] = rng.choice(FUELS)
+        if rng.random() < 0.7:
+            query['ekstra'] = ' '.join(rng.sample(WORDS, rng.randint(1, 4)))
+        queries.append(query)
+    return queries
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(directory, args):
+    """directory altında veri ve frontend hazırlayıp uvicorn'u başlatır; (süreç, url, log yolu) döndürür."""
+    write_source_csvs(os.path.join(directory, 'data'), args.rows, args.otosor_share,
+                      parse_brand_weights(args.brand_weights), tuple(args.description_words), args.seed)
+    os.symlink(os.path.join(SRC_DIR, 'frontend'), os.path.join(directory, 'frontend'))
+    port = free_port()
+    env = dict(os.environ, PYTHONPATH=SRC_DIR + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    env.update(item.split('=', 1) for item in args.env)
+    log_path = os.path.join(directory, 'server.log')
+    with open(log_path, 'w') as log:
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'uvicorn', 'app:app', '--host', '127.0.0.1', '--port', str(port),
+             '--workers', str(args.workers), '--log-level', 'warning'],
+            cwd=directory, env=env, stdout=log, stderr=subprocess.STDOUT,
+        )
+    return process, f"http://127.0.0.1:{port}", log_path
+
+
+def wait_ready(url, timeout, process=None):
+    """Sunucu veri yükleyip yanıt verene kadar bekler; başlangıç süresini (sn) döndürür."""
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"Sunucu başlatılamadı (çıkış kodu {process.returncode}).")
+        try:
+            if httpx.get(f"{url}/admin/reload/status", timeout=1).json().get('current_version'):
+                return time.perf_counter() - start
+        except (httpx.HTTPError, ValueError):
+            pass
+        time.sleep(0.2)
+    raise TimeoutError(f"Sunucu {timeout} sn içinde hazır olmadı.")
+
+
+async def drive(url, queries, total, concurrency, timeout):
+    """total isteği concurrency kadar eşzamanlı istemciyle gönderir; (gecikmeler, durum kodları, süre)."""
+    latencies, statuses = [], {}
+    counter = iter(range(total))
+
+    async def worker(client):
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                response = await client.post(f"{url}/recommend", json=queries[i % len(queries)])
+                status = response.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return np.array(latencies), statuses, elapsed
+
+
+def summarize(latencies, statuses, elapsed):
+    ok = statuses.get(200, 0)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000 if len(latencies) else (0.0, 0.0, 0.0)
+    return {
+        'load.requests': int(len(latencies)),
+        'load.errors': int(len(latencies) - ok),
+        'load.throughput_rps': ok / elapsed if elapsed else 0.0,
+        'load.latency_p50_ms': float(p50),
+        'load.latency_p95_ms': float(p95),
+        'load.latency_p99_ms': float(p99),
+        'load.latency_max_ms': float(latencies.max() * 1000) if len(latencies) else 0.0,
+    }
+
+
+def run(args):
+    """Yük testini çalıştırır ve 'load.' önekli sonuç sözlüğünü döndürür."""
+    queries = make_queries(args.distinct or args.requests, args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        process, log_path = None, None
+        url = args.url
+        try:
+            if url is None:
+                process, url, log_path = start_server(directory, args)
+            startup = wait_ready(url, args.startup_timeout, process)
+            if args.warmup:
+                asyncio.run(drive(url, make_queries(args.warmup, args.seed + 1), args.warmup, args.concurrency,
+                                  args.timeout))
+            latencies, statuses, elapsed = asyncio.run(
+                drive(url, queries, args.requests, args.concurrency, args.timeout))
+            results = summarize(latencies, statuses, elapsed)
+            if process is not None:
+                results['load.startup_s'] = startup
+            cache = httpx.get(f"{url}/recommend/cache/stats", timeout=5).json()
+            results['load.cache_hit_ratio'] = cache.get('hit_ratio', 0.0)
+            print(f"durum kodları: {statuses}")
+            return results
+        except Exception:
+            if log_path and os.path.exists(log_path):
+                with open(log_path) as f:
+                    print(''.join(f.readlines()[-30:]), file=sys.stderr)
+            raise
+        finally:
+            if process is not None:
+                process.terminate()
+                try:
+                    process.wait(timeout=15)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+
+
+def add_arguments(parser):
+    parser.add_argument('--rows', type=int, default=50_000, help='Sentetik ilan sayısı (arabam + otosor)')
+    parser.add_argument('--otosor-share', type=float, default=0.2)
+    parser.add_argument('--brand-weights', default='', help="Ör. 'Renault=3,Fiat=1'; boşsa Zipf benzeri dağılım")
+    parser.add_argument('--description-words', type=int, nargs=2, default=[5, 40], metavar=('MIN', 'MAX'))
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--distinct', type=int, default=0,
+                        help='Farklı istek gövdesi sayısı; 0 ise her istek farklıdır (önbellek isabeti olmaz)')
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--startup-timeout', type=float, default=300.0)
+    parser.add_argument('--workers', type=int, default=1, help='uvicorn çalışan süreç sayısı')
+    parser.add_argument('--env', action='append', default=[], metavar='AD=DEĞER',
+                        help='Sunucu ortam değişkeni (tekrarlanabilir), ör. --env QUERY_MODE=sql')
+    parser.add_argument('--url', default=None, help='Çalışan bir sunucuya bağlan (başlatma)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    parser.add_argument('--output', default=None, help="Sonuçların yazılacağı JSON ('load.' bölümü güncellenir)")
+    args = parser.parse_args()
+
+    results = run(args)
+    for key, value in results.items():
+        print(f"{key:<28} {value:>12.2f}" if isinstance(value, float) else f"{key:<28} {value:>12}")
+    if args.output:
+        write_results(args.output, results, args, section='load')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark sonuçlarının makine tarafından okunabilir JSON dosyasına yazılması ve iki
+çalıştırmanın karşılaştırılması.
+
+Dosya biçimi: {"meta": {...}, "results": {"bölüm.ölçüm.ad": sayı, ...}}. Anahtarlar düz ve
+sıralı tutulur; böylece iki dosya doğrudan diff'lenebilir. Sonu '_ms', '_s' veya '_mb' ile
+biten değerlerde düşük, '_rps' ve '_per_s' ile bitenlerde yüksek değer daha iyidir.
+"""
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+
+LOWER_IS_BETTER = ('_ms', '_s', '_mb')
+HIGHER_IS_BETTER = ('_rps', '_per_s')
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                               cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def collect_meta(args):
+    import numpy as np
+    import pandas as pd
+    import sklearn
+    return {
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'git_commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'scikit-learn': sklearn.__version__,
+        'argv': sys.argv[1:],
+        'args': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+    }
+
+
+def write_results(path, results, args, section=None):
+    """
+    Sonuçları path'e yazar. section verilirse (ör. 'load') dosyadaki diğer bölümler ve
+    meta bilgisi korunur, yalnızca o bölümün anahtarları değiştirilir.
+    """
+    payload = {'meta': collect_meta(args), 'results': {}}
+    if section and os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            previous = json.load(f)
+        # Önceki çalıştırmanın bilgileri korunur, bu bölümün argümanları ayrıca eklenir
+        payload['meta'] = dict(previous.get('meta', {}), **{f'{section}_args': payload['meta']['args']})
+        payload['results'] = {key: value for key, value in previous.get('results', {}).items()
+                              if not key.startswith(f'{section}.')}
+    payload['results'].update(results)
+    payload['results'] = dict(sorted(payload['results'].items()))
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+        f.write('\n')
+    print(f"Sonuçlar '{path}' dosyasına yazıldı ({len(results)} ölçüm).")
+
+
+def load_results(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(old_path, new_path, threshold=0.10):
+    """
+    İki sonuç dosyasını karşılaştırır ve tablo olarak yazdırır. threshold oranından fazla
+    kötüleşen ölçümlerin anahtarlarını döndürür.
+    """
+    old, new = load_results(old_path)['results'], load_results(new_path)['results']
+    regressions = []
+    print(f"{'ölçüm':<48}{'eski':>12}{'yeni':>12}{'değişim':>11}")
+    for key in sorted(set(old) | set(new)):
+        before, after = old.get(key), new.get(key)
+        if before is None or after is None:
+            print(f"{key:<48}{_fmt(before):>12}{_fmt(after):>12}{'-':>11}")
+            continue
+        change = (after - before) / before if before else 0.0
+        worse = (key.endswith(LOWER_IS_BETTER) and change > threshold) or \
+                (key.endswith(HIGHER_IS_BETTER) and change < -threshold)
+        if worse:
+            regressions.append(key)
+        print(f"{key:<48}{_fmt(before):>12}{_fmt(after):>12}{change:>+11.1%}{' !' if worse else ''}")
+    return regressions
+
+
+def _fmt(value):
+    if value is None:
+        return '-'
+    return f"{value:.3f}" if isinstance(value, float) else str(value)
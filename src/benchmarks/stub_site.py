@@ -0,0 +1,207 @@
+"""
+Tarayıcıyı çevrimdışı denemek için arabam.com işaretlemesini taklit eden yerel HTTP sunucusu.
+
+Fikstür dizini:
+    listings.csv         İlan No, Fiyat sütunları; liste sayfaları buradan fiyata göre sıralı üretilir
+    details/<ilan>.html  Kaydedilmiş (veya write_fixtures ile üretilmiş) detay sayfaları
+
+Liste sayfaları /ikinci-el?sort=price.asc&take=50&minPrice=...&page=N adresinden, detay
+sayfaları /ilan/<slug>/<ilan no> adresinden sunulur. fail_rate ile rastgele 503, delay ile
+sabit gecikme eklenerek tekrar deneme ve boru hattı davranışı sınanabilir.
+
+Kullanım (src dizininden):
+    python benchmarks/stub_site.py --fixtures /tmp/fixtures --generate 2000 --port 8765
+"""
+import argparse
+import html
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_listings  # noqa: E402
+
+DETAIL_KEYS = [('İlan No', 'İlan No'), ('Marka', 'Marka'), ('Seri', 'Seri'), ('Model', 'Model'),
+               ('Yıl', 'Yıl'), ('Kilometre', 'Kilometre'), ('Vites Tipi', 'Vites Tipi'),
+               ('Yakıt Tipi', 'Yakıt Tipi')]
+
+
+def _format_thousands(value):
+    return f"{int(value):,}".replace(',', '.')
+
+
+def render_detail(row):
+    """Sentetik bir ilan satırından detay sayfası HTML'i üretir."""
+    items = []
+    for key, column in DETAIL_KEYS:
+        value = row[column]
+        if pd.isna(value):
+            value = ''
+        elif column == 'Kilometre':
+            value = f"{_format_thousands(value)} km"
+        items.append(f'<li class="property-item"><div class="property-key">{html.escape(key)}</div>'
+                     f'<div class="property-value">\n  {html.escape(str(value))}\n</div></li>')
+    price = f"{_format_thousands(row['Fiyat'])} TL" if pd.notna(row['Fiyat']) else ''
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>İlan</title></head><body>'
+        '<div class="product-detail"><div class="desktop-information-price">'
+        f'{price}</div><ul class="product-properties-details linear-gradient">{"".join(items)}</ul>'
+        '<div class="tab-content-wrapper tab-description"><div class="description-content">'
+        f'<p>{html.escape(row["Açıklama"])}</p></div></div></div></body></html>'
+    )
+
+
+def render_listing(ids):
+    """Verilen ilanlar için liste sayfası HTML'i üretir."""
+    rows = ''.join(
+        f'<tr class="listing-list-item"><td><a href="/ilan/galeriden-satilik-otomobil/{ilan_no}">'
+        f'İlan {ilan_no}</a></td></tr>'
+        for ilan_no in ids
+    )
+    return f'<!DOCTYPE html><html><body><table class="listing-table">{rows}</table></body></html>'
+
+
+def write_fixtures(path, rows=2000, seed=42):
+    """Sentetik ilanlardan fikstür dizini oluşturur ve ilan tablosunu döndürür."""
+    listings = make_listings(rows, seed=seed)
+    os.makedirs(os.path.join(path, 'details'), exist_ok=True)
+    for row in listings.to_dict('records'):
+        with open(os.path.join(path, 'details', f"{row['İlan No']}.html"), 'w', encoding='utf-8') as f:
+            f.write(render_detail(row))
+    listings[['İlan No', 'Fiyat']].to_csv(os.path.join(path, 'listings.csv'), index=False)
+    return listings
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Eşzamanlı bağlantı açan istemciler dinleme kuyruğunda düşürülmesin
+    request_queue_size = 128
+
+    def handle_error(self, request, client_address):
+        # İstemci bağlantıyı kesince (ör. yarıda kesilen tarama) yığın izi basma
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class StubSite:
+    """Fikstür dizinini sunan, arka planda çalışan ThreadingHTTPServer."""
+
+    def __init__(self, path, host='127.0.0.1', port=0, delay=0.0, fail_rate=0.0, seed=0):
+        index = pd.read_csv(os.path.join(path, 'listings.csv'))
+        index = index.dropna(subset=['Fiyat']).sort_values(['Fiyat', 'İlan No'])
+        self.ids = index['İlan No'].to_numpy()
+        self.prices = index['Fiyat'].to_numpy()
+        self.path = path
+        self.delay = delay
+        self.fail_rate = fail_rate
+        self.requests = 0
+        self.failures = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), self._handler())
+        self._thread = None
+
+    @property
+    def origin(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _should_fail(self):
+        with self._lock:
+            self.requests += 1
+            if self.fail_rate and self._random.random() < self.fail_rate:
+                self.failures += 1
+                return True
+        return False
+
+    def listing_ids(self, query):
+        take = int(query.get('take', ['50'])[0])
+        page = int(query.get('page', ['1'])[0])
+        min_price = float(query.get('minPrice', ['0'])[0] or 0)
+        start = int(self.prices.searchsorted(min_price, side='left')) + (page - 1) * take
+        return self.ids[start:start + take]
+
+    def _handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive: istemcinin bağlantı havuzu gerçek sitedeki gibi yeniden kullanılabilsin
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                if site.delay:
+                    time.sleep(site.delay)
+                if site._should_fail():
+                    self._send(503, 'Service Unavailable', {'Retry-After': '0'})
+                    return
+                url = urlsplit(self.path)
+                if url.path.startswith('/ilan/'):
+                    detail = os.path.join(site.path, 'details', f"{url.path.rstrip('/').split('/')[-1]}.html")
+                    if not os.path.exists(detail):
+                        self._send(404, 'Not Found')
+                        return
+                    with open(detail, encoding='utf-8') as f:
+                        self._send(200, f.read())
+                else:
+                    self._send(200, render_listing(site.listing_ids(parse_qs(url.query))))
+
+            def _send(self, status, body, headers=None):
+                payload = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(payload)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='stub-site', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fixtures', required=True)
+    parser.add_argument('--generate', type=int, default=0, help='Bu kadar sentetik ilanla fikstür üret')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--delay', type=float, default=0.0)
+    parser.add_argument('--fail-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    if args.generate:
+        write_fixtures(args.fixtures, args.generate)
+    site = StubSite(args.fixtures, port=args.port, delay=args.delay, fail_rate=args.fail_rate).start()
+    print(f"Sahte site {site.origin} adresinde çalışıyor (Ctrl+C ile durdurun).")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        site.stop()
+
+
+if __name__ == '__main__':
+    main()
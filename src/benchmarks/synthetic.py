@@ -0,0 +1,161 @@
+"""
+Benchmark'lar için arabam/otosor şemasına benzeyen sentetik ilan üretici.
+make_listings çıktısı load_and_preprocess_from_db sonrasındaki sütunlara ve tiplere,
+make_raw_listings çıktısı ise kaynak CSV'lerin ham sütunlarına ve değer biçimlerine sahiptir.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+BRANDS = {
+    'Renault': ['Clio', 'Megane', 'Symbol', 'Fluence', 'Captur'],
+    'Fiat': ['Egea', 'Linea', 'Punto', 'Doblo'],
+    'Volkswagen': ['Passat', 'Golf', 'Polo', 'Jetta', 'Tiguan'],
+    'Ford': ['Focus', 'Fiesta', 'Mondeo', 'Kuga'],
+    'Opel': ['Astra', 'Corsa', 'Insignia'],
+    'Toyota': ['Corolla', 'Yaris', 'C-HR'],
+    'Hyundai': ['i20', 'Accent', 'Elantra'],
+    'BMW': ['3 Serisi', '5 Serisi', '1 Serisi'],
+    'Mercedes - Benz': ['C Serisi', 'E Serisi', 'A Serisi'],
+    'Peugeot': ['301', '308', '2008', '3008'],
+}
+TRIMS = ['Joy', 'Touch', 'Comfort', 'Highline', 'Comfortline', 'Icon', 'Premium', 'Urban', 'Elite', 'Active']
+ENGINES = ['1.0', '1.2', '1.3', '1.4', '1.5', '1.6', '2.0']
+GEARS = ['Manuel', 'Otomatik', 'Yarı Otomatik']
+FUELS = ['Benzin', 'Dizel', 'LPG & Benzin', 'Hibrit', 'Elektrik']
+WORDS = ['temiz', 'hatasız', 'boyasız', 'bakımlı', 'değişensiz', 'sahibinden', 'aile', 'aracı', 'acil',
+         'satılık', 'garajda', 'yatmış', 'servis', 'bakımları', 'yapıldı', 'lastikler', 'yeni', 'tramer',
+         'kaydı', 'yok', 'takas', 'olur', 'muayene', 'sunroof', 'cam', 'tavan', 'navigasyon', 'kamera']
+
+
+def make_listings(rows=100_000, brand_weights=None, description_words=(5, 40), seed=42):
+    """
+    Sentetik ilan DataFrame'i üretir.
+
+    Args:
+        rows: Satır sayısı.
+        brand_weights: Marka -> ağırlık sözlüğü. Verilmezse Zipf benzeri dağılım kullanılır.
+        description_words: Açıklamadaki kelime sayısı için (min, max) aralığı.
+        seed: Tekrarlanabilirlik için rastgele tohum.
+
+    Returns:
+        pd.DataFrame: 'İlan No', 'Marka', ..., 'cleaned_description' sütunlarına sahip tablo.
+    """
+    rng = np.random.default_rng(seed)
+    brands = list(BRANDS)
+    if brand_weights is None:
+        weights = 1.0 / np.arange(1, len(brands) + 1)
+    else:
+        weights = np.array([brand_weights.get(brand, 0.0) for brand in brands], dtype=float)
+    weights = weights / weights.sum()
+
+    brand_idx = rng.choice(len(brands), size=rows, p=weights)
+    marka = np.array(brands, dtype=object)[brand_idx]
+    seri = np.array([BRANDS[b][i % len(BRANDS[b])] for b, i in zip(marka, rng.integers(0, 10, size=rows))], dtype=object)
+    model = (np.array(ENGINES, dtype=object)[rng.integers(0, len(ENGINES), size=rows)] + ' '
+             + np.array(TRIMS, dtype=object)[rng.integers(0, len(TRIMS), size=rows)])
+
+    price = pd.array(rng.integers(100_000, 5_000_000, size=rows), dtype='Int64')
+    km = pd.array(rng.integers(0, 400_000, size=rows), dtype='Int64')
+    year = pd.array(rng.integers(1995, 2026, size=rows), dtype='Int64')
+    # Gerçek veride olduğu gibi bir miktar eksik sayısal değer
+    for column in (price, km, year):
+        column[rng.random(rows) < 0.01] = pd.NA
+
+    words = np.array(WORDS, dtype=object)
+    low, high = description_words
+    lengths = rng.integers(low, high + 1, size=rows)
+    tokens = rng.integers(0, len(words), size=lengths.sum())
+    splits = np.split(words[tokens], np.cumsum(lengths)[:-1])
+    description = [' '.join(parts) for parts in splits]
+
+    return pd.DataFrame({
+        'İlan No': np.arange(1_000_000, 1_000_000 + rows),
+        'Marka': marka,
+        'Seri': seri,
+        'Model': model,
+        'Fiyat': price,
+        'Kilometre': km,
+        'Yıl': year,
+        'Vites Tipi': np.array(GEARS, dtype=object)[rng.integers(0, len(GEARS), size=rows)],
+        'Yakıt Tipi': np.array(FUELS, dtype=object)[rng.integers(0, len(FUELS), size=rows)],
+        'Açıklama': description,
+        'link': None,
+        'cleaned_description': description,
+    })
+
+
+def _grouped(value, suffix):
+    return None if pd.isna(value) else f"{int(value):,}".replace(',', '.') + suffix
+
+
+def make_raw_listings(rows=100_000, source='arabam', brand_weights=None, description_words=(5, 40), seed=42):
+    """
+    Kaynak CSV'lerle aynı ham sütunlara sahip sentetik ilanlar üretir (ön işlemeden önceki hali).
+
+    source='arabam': metin fiyat ve kilometre ("1.250.000 TL", "159.023 km"); fiyat,
+    preprocess_frame'in 10'a bölmesinden sonra make_listings fiyatına eşit olacak şekilde yazılır.
+    source='otosor': tamsayı fiyat, bin km cinsinden ondalıklı 'KM', 'Vites'/'Yakıt' sütunları,
+    'İlan Linki' ve açıklama olmadan.
+    """
+    df = make_listings(rows, brand_weights, description_words, seed)
+    if source == 'otosor':
+        ilan_no = df['İlan No'] + 5_000_000
+        return pd.DataFrame({
+            'İlan Linki': 'https://www.otosor.com.tr/ilan/' + df['Marka'].str.lower().str.replace(' ', '-')
+                          + '-' + ilan_no.astype(str),
+            'Fiyat': df['Fiyat'],
+            'Satıcı': 'OtoSOR',
+            'İlan No': ilan_no,
+            'İlan Tarihi': '24.09.2025',
+            'Marka': df['Marka'],
+            'Seri': df['Seri'],
+            'Model': df['Model'],
+            'Yıl': df['Yıl'],
+            'Yakıt': df['Yakıt Tipi'],
+            'Vites': df['Vites Tipi'],
+            'KM': (df['Kilometre'].astype('Float64') / 1000).round(2),
+        })
+    return pd.DataFrame({
+        'İlan No': df['İlan No'],
+        'Fiyat': [_grouped(None if pd.isna(v) else int(v) * 10, ' TL') for v in df['Fiyat']],
+        'İlan Tarihi': '24 Eylül 2025',
+        'Marka': df['Marka'],
+        'Seri': df['Seri'],
+        'Model': df['Model'],
+        'Yıl': df['Yıl'],
+        'Kilometre': [_grouped(v, ' km') for v in df['Kilometre']],
+        'Vites Tipi': df['Vites Tipi'],
+        'Yakıt Tipi': df['Yakıt Tipi'],
+        'Açıklama': df['Açıklama'],
+    })
+
+
+def write_source_csvs(directory, rows, otosor_share=0.2, brand_weights=None, description_words=(5, 40), seed=42):
+    """
+    directory altına uygulamanın beklediği arabam.csv ve otosor.csv dosyalarını yazar.
+    Satırların otosor_share kadarı otosor'a düşer. {kaynak: csv yolu} döndürür.
+    """
+    os.makedirs(directory, exist_ok=True)
+    otosor_rows = int(rows * otosor_share)
+    paths = {}
+    for source, count, source_seed in (('arabam', rows - otosor_rows, seed), ('otosor', otosor_rows, seed + 1)):
+        path = os.path.join(directory, f'{source}.csv')
+        make_raw_listings(count, source, brand_weights, description_words, source_seed).to_csv(
+            path, index=False, encoding='utf-8-sig')
+        paths[source] = path
+    return paths
+
+
+def parse_brand_weights(text):
+    """'Renault=3,Fiat=1' biçimindeki marka ağırlıklarını sözlüğe çevirir; boşsa None."""
+    if not text:
+        return None
+    weights = {}
+    for part in text.split(','):
+        brand, _, weight = part.partition('=')
+        if brand.strip() not in BRANDS:
+            raise ValueError(f"Bilinmeyen marka: {brand.strip()} (seçenekler: {', '.join(BRANDS)})")
+        weights[brand.strip()] = float(weight or 1)
+    return weights
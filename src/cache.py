@@ -0,0 +1,81 @@
+# cache.py
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResultCache:
+    """
+    Öneri sonuçları için sınırlı, thread-safe LRU önbellek.
+
+    Girdiler TTL süresi dolunca geçersiz sayılır; giriş sayısı veya tahmini toplam
+    boyut sınırı aşılınca en az yakın zamanda kullanılan girdiler çıkarılır.
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=300.0, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """Anahtar önbellekte ve süresi dolmamışsa değeri, aksi halde None döndürür."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, size, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self._bytes -= size
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, size):
+        """Değeri tahmini boyutuyla (bayt) ekler; sınırlar aşılırsa eski girdileri çıkarır."""
+        if self.max_entries <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, size, value)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        """Tüm girdileri siler (ör. veri yeniden yüklendiğinde). Sayaçlar korunur."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Önbelleği boyutlandırmak için sayaçlar."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,165 @@
+# checkpoint.py
+import json
+import os
+import re
+import sqlite3
+
+import pandas as pd
+
+PREFERRED_COLUMNS = ["İlan No", "Fiyat", "İlan Tarihi", "Marka", "Seri", "Model", "Yıl", "Kilometre", "Açıklama"]
+
+
+def listing_id(url):
+    """İlan URL'sinin sonundaki ilan numarasını döndürür; bulunamazsa URL'nin kendisi."""
+    match = re.match(r'^(\d+)', url.split("/")[-1].split("?")[0].strip())
+    return match.group(1) if match else url
+
+
+class SeenListings:
+    """
+    crawl_window'un processed_urls olarak kullandığı, diskte tutulan görülmüş ilan kümesi.
+    add() ile eklenen ilanlar sayfası kaydedilene kadar bellekte bekler; commit() ile
+    veritabanına yazılır. Böylece çökme anında yarım kalan sayfanın ilanları devam
+    ederken yeniden çekilir.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._pending = set()
+
+    def __contains__(self, url):
+        key = listing_id(url)
+        if key in self._pending:
+            return True
+        return self._conn.execute("SELECT 1 FROM seen WHERE ilan_no = ?", (key,)).fetchone() is not None
+
+    def add(self, url):
+        self._pending.add(listing_id(url))
+
+    def update(self, urls):
+        for url in urls:
+            self.add(url)
+
+    def commit(self, ids):
+        ids = [str(ilan_no) for ilan_no in ids]
+        self._conn.executemany("INSERT OR IGNORE INTO seen (ilan_no) VALUES (?)", [(i,) for i in ids])
+        self._pending.difference_update(ids)
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0] + len(self._pending)
+
+
+class CrawlCheckpoint:
+    """
+    Taramanın kaldığı yerden devam edebilmesi için SQLite kontrol noktası.
+
+    Görülmüş ilan numaralarını, ayrıştırılmış satırları (İlan No'ya göre tekil), geçerli
+    min_price penceresini, pencere içindeki sayfa imlecini ve o ana kadarki en yüksek
+    fiyatı tutar. Her sayfa tek bir transaction ile kaydedilir; satırlar bellekte
+    biriktirilmez.
+    """
+
+    def __init__(self, path="data/deneme/crawl_checkpoint.db"):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS seen (ilan_no TEXT PRIMARY KEY)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS rows (ilan_no TEXT PRIMARY KEY, data TEXT NOT NULL)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self.seen = SeenListings(self._conn)
+        self._completed_pages = set()
+        self.state = self._load_state()
+
+    def _load_state(self):
+        state = {"status": "new", "min_price": None, "page": 0, "max_price": None,
+                 "total_count": 0, "rows": 0, "columns": []}
+        for key, value in self._conn.execute("SELECT key, value FROM state"):
+            state[key] = json.loads(value)
+        return state
+
+    def _save_state(self, **changes):
+        self.state.update(changes)
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)",
+            [(key, json.dumps(value)) for key, value in changes.items()],
+        )
+
+    @property
+    def resumable(self):
+        return self.state["status"] == "running" and self.state["min_price"] is not None
+
+    def reset(self):
+        """Önceki taramanın tüm kayıtlarını siler."""
+        with self._conn:
+            for table in ("seen", "rows", "state"):
+                self._conn.execute(f"DELETE FROM {table}")
+        self._completed_pages.clear()
+        self.seen = SeenListings(self._conn)
+        self.state = self._load_state()
+
+    def start_window(self, min_price, total_count):
+        """Yeni bir fiyat penceresine geçildiğini kaydeder."""
+        self._completed_pages.clear()
+        with self._conn:
+            self._save_state(status="running", min_price=int(min_price), page=0, total_count=total_count)
+
+    def commit_page(self, rows, page):
+        """
+        Bir liste sayfasının satırlarını, görülmüş ilanları, en yüksek fiyatı ve sayfa
+        imlecini tek transaction ile kaydeder. İmleç, kendisine kadarki tüm sayfaları
+        tamamlanmış en büyük sayfa numarasıdır.
+        """
+        ids, records, max_price = [], [], self.state["max_price"]
+        columns = list(self.state["columns"])
+        for row in rows:
+            ilan_no = row.get("İlan No")
+            if ilan_no is None or pd.isna(ilan_no):
+                continue
+            record = {key: (None if value is pd.NA else value) for key, value in row.items()}
+            ids.append(str(ilan_no))
+            records.append((str(ilan_no), json.dumps(record, ensure_ascii=False)))
+            columns.extend(key for key in record if key not in columns)
+            price = pd.to_numeric(record.get("Fiyat"), errors="coerce")
+            if pd.notna(price) and (max_price is None or price > max_price):
+                max_price = int(price)
+
+        self._completed_pages.add(page)
+        cursor = self.state["page"]
+        while cursor + 1 in self._completed_pages:
+            cursor += 1
+        with self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO rows (ilan_no, data) VALUES (?, ?)", records)
+            self.seen.commit(ids)
+            rows_total = self._conn.execute("SELECT COUNT(*) FROM rows").fetchone()[0]
+            self._save_state(page=cursor, max_price=max_price, rows=rows_total, columns=columns)
+
+    def finish(self):
+        with self._conn:
+            self._save_state(status="done")
+
+    def export_csv(self, file_path, chunk_size=5000):
+        """Kayıtlı satırları parça parça tek bir CSV'ye yazar; yazılan satır sayısını döndürür."""
+        if not self.state["rows"]:
+            return 0
+        columns = self.state["columns"]
+        final_columns = [col for col in PREFERRED_COLUMNS if col in columns] + \
+                        [col for col in columns if col not in PREFERRED_COLUMNS]
+        written = 0
+        cursor = self._conn.execute("SELECT data FROM rows ORDER BY rowid")
+        tmp_path = f"{file_path}.tmp"
+        while True:
+            chunk = cursor.fetchmany(chunk_size)
+            if not chunk:
+                break
+            df = pd.DataFrame([json.loads(data) for (data,) in chunk]).reindex(columns=final_columns)
+            df.to_csv(tmp_path, index=False, encoding="utf-8-sig" if written == 0 else "utf-8",
+                      mode="w" if written == 0 else "a", header=written == 0)
+            written += len(df)
+        os.replace(tmp_path, file_path)
+        return written
+
+    def close(self):
+        self._conn.close()
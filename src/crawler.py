@@ -0,0 +1,138 @@
+# crawler.py
+import asyncio
+import email.utils
+import logging
+import time
+from urllib.parse import urlsplit
+
+import httpx
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Connection": "keep-alive",
+}
+# setup_session'daki urllib3 Retry ayarlarıyla aynı
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+RETRY_AFTER_STATUSES = frozenset({413, 429, 503})
+BACKOFF_MAX = 120.0
+
+
+class TokenBucket:
+    """
+    Saniyede rate adet, en fazla burst kadar birikebilen istek hakkı. acquire() hak yoksa
+    bir sonraki hak oluşana kadar bekler.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.waited_seconds = 0.0
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / self.rate
+                self.waited_seconds += delay
+                await asyncio.sleep(delay)
+
+
+class AsyncFetcher:
+    """
+    Bağlantı havuzlu, host başına token bucket ile hız sınırlı asenkron HTTP istemcisi.
+
+    Tekrar deneme davranışı setup_session'daki Retry(total=3, backoff_factor=1,
+    status_forcelist=[429, 500, 502, 503, 504]) ile eşdeğerdir: bağlantı/okuma hataları ve
+    listedeki durum kodları en fazla retries kez, backoff_factor * 2 ** (n - 1) saniye
+    (Retry-After başlığı varsa ona uyularak) beklenip tekrar denenir.
+
+    transport parametresi testlerde httpx.MockTransport vermek içindir.
+    """
+
+    def __init__(self, rate=2.0, burst=4, max_connections=10, retries=3, backoff_factor=1.0,
+                 timeout=15.0, headers=None, transport=None):
+        self.rate = rate
+        self.burst = burst
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self._client = httpx.AsyncClient(
+            headers=headers or DEFAULT_HEADERS,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            follow_redirects=True,
+            transport=transport,
+        )
+        self._buckets = {}
+        self.stats = {"requests": 0, "retries": 0, "failures": 0, "bytes": 0}
+
+    def _bucket(self, url):
+        host = urlsplit(url).netloc
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+        return bucket
+
+    def _backoff(self, attempt, response=None):
+        if response is not None and response.status_code in RETRY_AFTER_STATUSES:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after:
+                if retry_after.strip().isdigit():
+                    return float(retry_after)
+                parsed = email.utils.parsedate_to_datetime(retry_after)
+                if parsed is not None:
+                    return max(0.0, parsed.timestamp() - time.time())
+        return min(BACKOFF_MAX, self.backoff_factor * (2 ** (attempt - 1)))
+
+    async def get(self, url):
+        """
+        URL'yi çeker ve gövdeyi metin olarak döndürür.
+
+        Raises:
+            httpx.HTTPError: Tekrar denemeler tükendiğinde veya tekrar denenmeyen bir
+            hata durum kodunda.
+        """
+        bucket = self._bucket(url)
+        attempt = 0
+        while True:
+            await bucket.acquire()
+            self.stats["requests"] += 1
+            try:
+                response = await self._client.get(url)
+            except httpx.TransportError:
+                if attempt >= self.retries:
+                    self.stats["failures"] += 1
+                    raise
+                response = None
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.retries:
+                    if response.is_error:
+                        self.stats["failures"] += 1
+                    response.raise_for_status()
+                    self.stats["bytes"] += len(response.content)
+                    return response.text
+            attempt += 1
+            self.stats["retries"] += 1
+            delay = self._backoff(attempt, response)
+            logging.info(f"{url} tekrar deneniyor ({attempt}/{self.retries}), {delay:.1f} sn bekleniyor...")
+            await asyncio.sleep(delay)
+
+    def throttled_seconds(self):
+        return sum(bucket.waited_seconds for bucket in self._buckets.values())
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
@@ -0,0 +1,131 @@
+# favorites.py
+import os
+import sqlite3
+import threading
+
+# Favori kaydının alanları (app.CarResponse ile aynı sırada)
+FAVORITE_FIELDS = ('ilan_no', 'marka', 'seri', 'model', 'fiyat', 'kilometre', 'yil', 'vites_tipi', 'yakit_tipi', 'link')
+
+# Başka bir çalışanın yazma kilidi için beklenecek en uzun süre (sn)
+FAVORITES_BUSY_TIMEOUT = float(os.getenv("FAVORITES_BUSY_TIMEOUT", "5"))
+
+_COLUMNS = ', '.join(FAVORITE_FIELDS)
+_PLACEHOLDERS = ', '.join('?' * len(FAVORITE_FIELDS))
+
+
+class FavoritesStore:
+    """
+    SQLite (WAL) üzerinde tutulan favoriler, önünde süreç içi bir sözlük önbelleği ile.
+
+    Favoriler ilan_no'ya göre tekildir (UNIQUE indeks); eklenme sırası 'seq' ile korunur.
+    Okumalar önbellekten yapılır. Birden çok uvicorn çalışanı aynı dosyayı paylaşır: her
+    işlemden önce 'PRAGMA data_version' kontrol edilir, başka bir bağlantı değişiklik
+    yaptıysa önbellek veritabanından yeniden yüklenir. Bu sürecin kendi yazmaları önbelleğe
+    doğrudan uygulanır. Bağlantı ilk kullanımda (fork sonrası çalışan içinde) açılır.
+    """
+
+    def __init__(self, path="data/favorites.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._version = None
+        self._cache = {}
+
+    def _connection(self):
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=FAVORITES_BUSY_TIMEOUT, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS favorites (seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+                    "ilan_no INTEGER NOT NULL, marka TEXT, seri TEXT, model TEXT, fiyat REAL, kilometre REAL, "
+                    "yil INTEGER, vites_tipi TEXT, yakit_tipi TEXT, link TEXT)"
+                )
+                conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_favorites_ilan_no ON favorites (ilan_no)")
+            self._conn, self._pid, self._version = conn, os.getpid(), None
+        return self._conn
+
+    def _refresh(self):
+        """Veritabanı başka bir bağlantıdan değiştiyse önbelleği yeniden yükler."""
+        conn = self._connection()
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._version:
+            rows = conn.execute(f"SELECT {_COLUMNS} FROM favorites ORDER BY seq")
+            self._cache = {row[0]: dict(zip(FAVORITE_FIELDS, row)) for row in rows}
+            self._version = version
+        return conn
+
+    def all(self):
+        with self._lock:
+            self._refresh()
+            return list(self._cache.values())
+
+    def __contains__(self, ilan_no):
+        with self._lock:
+            self._refresh()
+            return ilan_no in self._cache
+
+    def add_many(self, records):
+        """
+        Kayıtları tek transaction ile ekler; zaten favorilerde olanlar (ve aynı listede
+        tekrarlananlar) atlanır. (eklenen ilan_no'lar, atlanan ilan_no'lar) döndürür.
+        """
+        records = [{field: record.get(field) for field in FAVORITE_FIELDS} for record in records]
+        added, skipped = [], []
+        with self._lock:
+            conn = self._refresh()
+            with conn:
+                for record in records:
+                    cursor = conn.execute(
+                        f"INSERT OR IGNORE INTO favorites ({_COLUMNS}) VALUES ({_PLACEHOLDERS})",
+                        tuple(record[field] for field in FAVORITE_FIELDS),
+                    )
+                    (added if cursor.rowcount else skipped).append(record['ilan_no'])
+            # Transaction sırasında başka bir çalışan yazdıysa önbellek yeniden yüklenir
+            self._refresh()
+            added_set = set(added)
+            for record in records:
+                if record['ilan_no'] in added_set:
+                    self._cache.setdefault(record['ilan_no'], record)
+        return added, skipped
+
+    def add(self, record):
+        """Kaydı ekler; ilan zaten favorilerdeyse False döner."""
+        added, _ = self.add_many([record])
+        return bool(added)
+
+    def remove_many(self, ilan_nos):
+        """İlanları tek transaction ile siler; (silinen, bulunamayan) ilan_no listelerini döndürür."""
+        removed, missing = [], []
+        with self._lock:
+            conn = self._refresh()
+            with conn:
+                for ilan_no in ilan_nos:
+                    cursor = conn.execute("DELETE FROM favorites WHERE ilan_no = ?", (ilan_no,))
+                    (removed if cursor.rowcount else missing).append(ilan_no)
+            self._refresh()
+            for ilan_no in removed:
+                self._cache.pop(ilan_no, None)
+        return removed, missing
+
+    def remove(self, ilan_no):
+        """İlanı siler; favorilerde yoksa False döner."""
+        removed, _ = self.remove_many([ilan_no])
+        return bool(removed)
+
+    def clear(self):
+        with self._lock:
+            conn = self._refresh()
+            with conn:
+                conn.execute("DELETE FROM favorites")
+            self._refresh()
+            self._cache = {}
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn, self._version, self._cache = None, None, {}
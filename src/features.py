@@ -1,47 +1,125 @@
 # features.py
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
+import numpy as np
 import pandas as pd
+import joblib
+import os
+import scipy.sparse as sp
+from metrics import stage
 
 def combine_features(df):
     """
     Özellikle metin tabanlı sütunları birleştirerek TF-IDF için tek bir metin oluşturur.
+    Satır satır dolaşmak yerine sütunlar üzerinde vektörel string işlemleri kullanır.
     """
-    combined = []
     # Temizlenmiş açıklama sütununu tercih et
     desc_col = 'cleaned_description' if 'cleaned_description' in df.columns else 'Açıklama'
 
-    # Sadece ilgili sütunları birleştir
-    for _, row in df.iterrows():
-        text_parts = []
-        # Marka, Seri ve Model kesinlikle dahil edilsin
-        if pd.notna(row.get('Marka')):
-            text_parts.append(row['Marka'])
-        if pd.notna(row.get('Seri')):
-            text_parts.append(row['Seri'])
-        if pd.notna(row.get('Model')):
-            text_parts.append(row['Model'])
-        # Açıklama metni en önemli kısım, bunu da ekle
-        if desc_col in df.columns and pd.notna(row[desc_col]):
-            text_parts.append(row[desc_col])
-
-        combined.append(" ".join(text_parts))
-    return combined
+    # Marka, Seri ve Model kesinlikle dahil edilsin; açıklama metni en önemli kısım
+    cols = [col for col in ('Marka', 'Seri', 'Model', desc_col) if col in df.columns]
+
+    combined = np.full(len(df), '', dtype=object)
+    has_text = np.zeros(len(df), dtype=bool)
+    for col in cols:
+        values = df[col].to_numpy(dtype=object)
+        present = pd.notna(values)
+        # Boş olmayan önceki parçalar ile yeni parça arasına tek boşluk koy
+        sep = np.where(has_text & present, ' ', '')
+        combined = combined + sep + np.where(present, values, '')
+        has_text |= present
+    return combined.tolist()
 
 def compute_tfidf(df):
     """
     DataFrame için TF-IDF matrisi ve vektörleyiciyi hesaplar.
     """
-    combined_texts = combine_features(df)
-    vectorizer = TfidfVectorizer(max_features=2000, stop_words='english', token_pattern=r'\b\w+\b')  # Performans için limit artırıldı ve daha iyi tokenizasyon için
-    tfidf_matrix = vectorizer.fit_transform(combined_texts)
+    with stage('tfidf_fit'):
+        combined_texts = combine_features(df)
+        vectorizer = TfidfVectorizer(max_features=2000, stop_words='english', token_pattern=r'\b\w+\b')  # Performans için limit artırıldı ve daha iyi tokenizasyon için
+        tfidf_matrix = vectorizer.fit_transform(combined_texts)
     return tfidf_matrix, vectorizer
 
-def compute_similarity(vectorizer, tfidf_matrix, user_input):
+def compute_similarity(vectorizer, tfidf_matrix, user_input, user_vec=None):
     """
     Kullanıcı girdisinin TF-IDF vektörünü oluşturur ve mevcut matrisle benzerliğini hesaplar.
+    user_vec verilirse (aynı girdinin önceden hesaplanmış vektörü) yeniden dönüştürülmez.
+    """
+    with stage('cosine_similarity'):
+        # Kullanıcı girdisini bir liste olarak transform et
+        if user_vec is None:
+            user_vec = vectorizer.transform([user_input])
+        similarities = cosine_similarity(user_vec, tfidf_matrix).flatten()
+    return similarities
+
+def compute_similarity_batch(vectorizer, tfidf_matrix, user_inputs, positions_list, user_vecs=None):
+    """
+    Birden çok kullanıcı girdisi için benzerlikleri tek bir seyrek matris çarpımıyla hesaplar.
+
+    Args:
+        vectorizer: Eğitilmiş TfidfVectorizer.
+        tfidf_matrix: Tüm ilanların L2 normalize TF-IDF matrisi (CSR).
+        user_inputs: Kullanıcı metinleri listesi.
+        positions_list: Her girdi için puanlanacak satır konumları (artan sırada).
+        user_vecs: Girdilerin önceden hesaplanmış TF-IDF vektörleri (isteğe bağlı).
+
+    Returns:
+        list: Her girdi için, konumlarıyla aynı sırada kosinüs benzerlikleri.
+    """
+    if not user_inputs:
+        return []
+    with stage('cosine_similarity_batch'):
+        # Tüm girdiler tek geçişte vektörleştirilir; TF-IDF satırları L2 normalize olduğundan
+        # nokta çarpımı kosinüs benzerliğine eşittir
+        if user_vecs is None:
+            user_vecs = vectorizer.transform(user_inputs)
+        union = np.unique(np.concatenate([np.asarray(p, dtype=np.int64) for p in positions_list]))
+        if len(union) == 0:
+            return [np.empty(0) for _ in user_inputs]
+        scores = (tfidf_matrix[union] @ user_vecs.T).tocsc()
+
+        similarities = []
+        for j, positions in enumerate(positions_list):
+            column = scores[:, j].toarray().ravel()
+            similarities.append(column[np.searchsorted(union, positions)])
+    return similarities
+
+def build_tfidf_index(df):
+    """
+    Tüm ilanlar için vektörleyiciyi bir kez eğitir ve satır sırası df ile aynı olan CSR matrisini döndürür.
+    """
+    tfidf_matrix, vectorizer = compute_tfidf(df)
+    return tfidf_matrix.tocsr(), vectorizer
+
+def extend_tfidf_index(tfidf_index, new_df):
+    """
+    Yeni satırları mevcut vektörleyiciyle (yeniden eğitmeden) dönüştürür ve matrisin
+    sonuna ekleyerek yeni bir (tfidf_matrix, vectorizer) döndürür.
+    """
+    tfidf_matrix, vectorizer = tfidf_index
+    new_matrix = vectorizer.transform(combine_features(new_df))
+    return sp.vstack([tfidf_matrix, new_matrix], format='csr'), vectorizer
+
+def save_tfidf_index(path, tfidf_matrix, vectorizer, fingerprint):
+    """
+    TF-IDF indeksini, üretildiği verinin parmak izi ile birlikte diske kaydeder.
+    """
+    tmp_path = f"{path}.tmp"
+    joblib.dump({'fingerprint': fingerprint, 'matrix': tfidf_matrix, 'vectorizer': vectorizer}, tmp_path)
+    os.replace(tmp_path, path)
+
+def load_tfidf_index(path, fingerprint):
+    """
+    Diskteki TF-IDF indeksini yükler. Dosya yoksa, okunamıyorsa veya parmak izi
+    güncel veriyle uyuşmuyorsa None döner.
     """
-    # Kullanıcı girdisini bir liste olarak transform et
-    user_vec = vectorizer.transform([user_input])
-    similarities = cosine_similarity(user_vec, tfidf_matrix).flatten()
-    return similarities
\ No newline at end of file
+    if not os.path.exists(path):
+        return None
+    try:
+        payload = joblib.load(path)
+    except Exception as e:
+        print(f"Uyarı: TF-IDF indeksi okunamadı ({e}), yeniden oluşturulacak.")
+        return None
+    if payload.get('fingerprint') != fingerprint:
+        return None
+    return payload['matrix'], payload['vectorizer']
\ No newline at end of file
@@ -0,0 +1,311 @@
+# filters.py
+import copy
+import re
+import threading
+import numpy as np
+import pandas as pd
+
+# İstek parametresi -> (sütun, eşleşme türü)
+CATEGORICAL_FILTERS = {
+    'marka': ('Marka', 'equals'),
+    'seri': ('Seri', 'contains'),
+    'model': ('Model', 'contains'),
+    'vites': ('Vites Tipi', 'equals'),
+    'yakit': ('Yakıt Tipi', 'contains'),
+}
+
+# Sütun -> (alt sınır parametresi, üst sınır parametresi); sınırlar dahildir
+RANGE_FILTERS = {
+    'Fiyat': ('alt_fiyat', 'ust_fiyat'),
+    'Kilometre': ('min_km', 'max_km'),
+    'Yıl': ('min_yil', 'max_yil'),
+}
+
+EMPTY_POSITIONS = np.empty(0, dtype=np.int64)
+
+
+class CategoricalIndex:
+    """
+    Tek bir kategorik sütun için ters indeks: her farklı değer için sıralı satır
+    konumları (posting list) yükleme sırasında bir kez hesaplanır.
+    """
+
+    def __init__(self, values, substring_cache_size=1024):
+        codes, categories = pd.factorize(values, use_na_sentinel=True)
+        self.codes = codes.astype(np.int32)
+        self.categories = np.asarray(categories, dtype=object)
+
+        # Kodlara göre kararlı sıralama ile her kategori için sıralı konum listesi
+        order = np.argsort(codes, kind='stable')
+        sorted_codes = codes[order]
+        bounds = np.searchsorted(sorted_codes, np.arange(len(self.categories) + 1))
+        self.postings = [order[bounds[i]:bounds[i + 1]].astype(np.int64) for i in range(len(self.categories))]
+
+        # Küçük harfe çevrilmiş değer -> o değere eşit olan kategori kodları
+        self._lowered = {}
+        for code, category in enumerate(self.categories):
+            self._lowered.setdefault(str(category).lower(), []).append(code)
+        self._code_of = {category: code for code, category in enumerate(self.categories)}
+
+        # Alt dize (regex) -> kategori kodları eşlemesi; aramalar kategori sayısıyla ölçeklenir.
+        # Öneri havuzunun iş parçacıkları paylaştığından ekleme/çıkarma kilit altında yapılır
+        self._substring_codes = {}
+        self._substring_lock = threading.Lock()
+        self._substring_cache_size = substring_cache_size
+
+    def union(self, codes):
+        """Verilen kategori kodlarının sıralı, birleşik satır konumları."""
+        if not codes:
+            return EMPTY_POSITIONS
+        if len(codes) == 1:
+            return self.postings[codes[0]]
+        return np.sort(np.concatenate([self.postings[code] for code in codes]))
+
+    def count(self, codes):
+        """Verilen kategori kodlarına sahip satır sayısı (liste oluşturmadan)."""
+        return sum(len(self.postings[code]) for code in codes)
+
+    def equals_codes(self, value):
+        """Büyük/küçük harf duyarsız tam eşleşen kategori kodları."""
+        return self._lowered.get(value.lower(), [])
+
+    def contains_codes(self, pattern):
+        """
+        Series.str.contains(pattern, case=False) ile aynı anlamda eşleşen kategori kodları.
+        Desen satırlar yerine farklı kategoriler üzerinde bir kez değerlendirilir ve saklanır.
+        """
+        codes = self._substring_codes.get(pattern)
+        if codes is None:
+            regex = re.compile(pattern, flags=re.IGNORECASE)
+            codes = [code for code, category in enumerate(self.categories)
+                     if isinstance(category, str) and regex.search(category)]
+            with self._substring_lock:
+                if pattern not in self._substring_codes and len(self._substring_codes) >= self._substring_cache_size:
+                    self._substring_codes.pop(next(iter(self._substring_codes)))
+                self._substring_codes[pattern] = codes
+        return codes
+
+    def equals(self, value):
+        """Büyük/küçük harf duyarsız tam eşleşen satır konumları."""
+        return self.union(self.equals_codes(value))
+
+    def contains(self, pattern):
+        """str.contains(pattern, case=False) ile eşleşen satır konumları."""
+        return self.union(self.contains_codes(pattern))
+
+    def filter(self, positions, codes):
+        """Aday konumlardan kategori kodu verilen kodlardan biri olanları tutar."""
+        candidate = self.codes[positions]
+        if len(codes) == 1:
+            return positions[candidate == codes[0]]
+        return positions[np.isin(candidate, codes)]
+
+    def extend(self, values):
+        """
+        Sona eklenen satırları içeren yeni bir indeks döndürür; bu indeks değiştirilmez.
+        Yalnızca yeni satırların dokunduğu posting list'ler kopyalanır.
+        """
+        extended = copy.copy(self)
+        offset = len(self.codes)
+        code_of = dict(self._code_of)
+        categories = list(self.categories)
+        lowered = {key: list(codes) for key, codes in self._lowered.items()}
+
+        new_codes = np.empty(len(values), dtype=np.int32)
+        for i, value in enumerate(values):
+            if pd.isna(value):
+                new_codes[i] = -1
+                continue
+            code = code_of.get(value)
+            if code is None:
+                code = code_of[value] = len(categories)
+                categories.append(value)
+                lowered.setdefault(str(value).lower(), []).append(code)
+            new_codes[i] = code
+
+        postings = list(self.postings) + [EMPTY_POSITIONS] * (len(categories) - len(self.categories))
+        for code in np.unique(new_codes[new_codes >= 0]):
+            added = np.flatnonzero(new_codes == code).astype(np.int64) + offset
+            postings[code] = np.concatenate([postings[code], added])
+
+        extended.codes = np.concatenate([self.codes, new_codes])
+        extended.categories = np.asarray(categories, dtype=object)
+        extended.postings = postings
+        extended._code_of = code_of
+        extended._lowered = lowered
+        # Yeni kategoriler eski desen eşleşmelerini geçersiz kılabilir
+        extended._substring_codes = {}
+        extended._substring_lock = threading.Lock()
+        return extended
+
+
+class NumericRangeIndex:
+    """
+    Sayısal bir sütun için sıralı indeks: NaN olmayan değerler argsort sırasıyla
+    düz NumPy dizilerinde tutulur, aralık sorguları searchsorted ile cevaplanır.
+    """
+
+    def __init__(self, values):
+        self.values = np.asarray(values, dtype=float)
+        valid = np.flatnonzero(~np.isnan(self.values))
+        order = np.argsort(self.values[valid], kind='stable')
+        self.sorted_positions = valid[order].astype(np.int64)
+        self.sorted_values = self.values[self.sorted_positions]
+
+    def bounds(self, low=None, high=None):
+        """[low, high] aralığının sıralı dizideki başlangıç/bitiş indisleri."""
+        start = 0 if low is None else np.searchsorted(self.sorted_values, low, side='left')
+        stop = len(self.sorted_values) if high is None else np.searchsorted(self.sorted_values, high, side='right')
+        return start, max(start, stop)
+
+    def range(self, low=None, high=None):
+        """Aralıktaki satır konumları, artan sırada."""
+        start, stop = self.bounds(low, high)
+        return np.sort(self.sorted_positions[start:stop])
+
+    def extend(self, values):
+        """
+        Sona eklenen satırları içeren yeni bir indeks döndürür; bu indeks değiştirilmez.
+        Yeni değerler sıralı dizilere searchsorted konumlarından eklenir (yeniden sıralama yok).
+        """
+        extended = copy.copy(self)
+        values = np.asarray(values, dtype=float)
+        offset = len(self.values)
+        valid = np.flatnonzero(~np.isnan(values))
+        order = np.argsort(values[valid], kind='stable')
+        new_positions = valid[order].astype(np.int64) + offset
+        new_values = values[valid][order]
+        # Eşit değerlerde eski satırlar önde kalır
+        insert_at = np.searchsorted(self.sorted_values, new_values, side='right')
+
+        extended.values = np.concatenate([self.values, values])
+        extended.sorted_values = np.insert(self.sorted_values, insert_at, new_values)
+        extended.sorted_positions = np.insert(self.sorted_positions, insert_at, new_positions)
+        return extended
+
+    def filter(self, positions, low=None, high=None):
+        """Aday konumlardan değeri aralıkta olanları tutar; NaN değerler elenir."""
+        candidate = self.values[positions]
+        keep = ~np.isnan(candidate)
+        if low is not None:
+            keep &= candidate >= low
+        if high is not None:
+            keep &= candidate <= high
+        return positions[keep]
+
+
+class FilterEngine:
+    """
+    İlan deposu için yükleme sırasında kurulan filtre motoru. Her sorguda önce en
+    seçici koşul (en kısa posting list ya da en dar sayısal aralık) aday kümesini
+    üretir; kalan koşullar yalnızca bu adaylar üzerinde kontrol edilir. Böylece sorgu
+    maliyeti veri boyutuyla değil eşleşme sayısıyla ölçeklenir.
+
+    Artımlı güncellemede extend() yeni satırları, tombstone() silinen ilanları içeren yeni
+    bir motor döndürür; silinen satırlar 'alive' maskesiyle sonuçlardan çıkarılır.
+    """
+
+    def __init__(self, df):
+        self.size = len(df)
+        self.alive = None  # None: tüm satırlar geçerli
+        self.categorical = {
+            column: CategoricalIndex(df[column])
+            for column, _ in CATEGORICAL_FILTERS.values() if column in df.columns
+        }
+        self.ranges = {
+            column: NumericRangeIndex(df[column].to_numpy(dtype=float, na_value=np.nan))
+            for column in RANGE_FILTERS if column in df.columns
+        }
+
+    @property
+    def tombstoned(self):
+        """Silinmiş olarak işaretlenmiş satır sayısı."""
+        return 0 if self.alive is None else int(self.size - self.alive.sum())
+
+    def extend(self, df):
+        """
+        df, bu motorun kurulduğu deponun sona satır eklenmiş hali olmalıdır; yalnızca yeni
+        satırlar indekslenir ve yeni bir motor döndürülür.
+        """
+        new_rows = df.iloc[self.size:]
+        extended = copy.copy(self)
+        extended.size = len(df)
+        extended.categorical = {
+            column: index.extend(new_rows[column].to_numpy(dtype=object))
+            for column, index in self.categorical.items()
+        }
+        extended.ranges = {
+            column: index.extend(new_rows[column].to_numpy(dtype=float, na_value=np.nan))
+            for column, index in self.ranges.items()
+        }
+        if self.alive is not None:
+            extended.alive = np.concatenate([self.alive, np.ones(len(new_rows), dtype=bool)])
+        return extended
+
+    def tombstone(self, positions):
+        """Verilen satırları sonuçlardan çıkaran yeni bir motor döndürür."""
+        if len(positions) == 0:
+            return self
+        tombstoned = copy.copy(self)
+        alive = np.ones(self.size, dtype=bool) if self.alive is None else self.alive.copy()
+        alive[np.asarray(positions, dtype=np.int64)] = False
+        tombstoned.alive = alive
+        return tombstoned
+
+    def _predicates(self, filters):
+        """
+        Sorgudaki koşulları (tahmini eşleşme sayısı, tür, sütun, argümanlar) olarak döndürür.
+        İndeksi olmayan bir sütuna filtre uygulanırsa None döner (hiçbir satır eşleşmez).
+        """
+        predicates = []
+        for name, (column, kind) in CATEGORICAL_FILTERS.items():
+            value = filters.get(name)
+            if not value:
+                continue
+            index = self.categorical.get(column)
+            if index is None:
+                return None
+            codes = index.equals_codes(value) if kind == 'equals' else index.contains_codes(value)
+            predicates.append((index.count(codes), 'categorical', column, codes))
+
+        for column, (low_name, high_name) in RANGE_FILTERS.items():
+            low, high = filters.get(low_name), filters.get(high_name)
+            if low is None and high is None:
+                continue
+            index = self.ranges.get(column)
+            if index is None:
+                return None
+            start, stop = index.bounds(low, high)
+            predicates.append((stop - start, 'range', column, (low, high)))
+        return predicates
+
+    def query(self, **filters):
+        """
+        recommend_cars filtreleriyle eşleşen satır konumlarını artan sırada döndürür.
+        Boş/None filtreler yok sayılır.
+        """
+        predicates = self._predicates(filters)
+        if predicates is None:
+            return EMPTY_POSITIONS
+        if not predicates:
+            positions = np.arange(self.size, dtype=np.int64)
+            return positions if self.alive is None else positions[self.alive]
+
+        # En seçici koşuldan başla
+        predicates.sort(key=lambda predicate: predicate[0])
+        _, kind, column, args = predicates[0]
+        if kind == 'categorical':
+            positions = self.categorical[column].union(args)
+        else:
+            positions = self.ranges[column].range(*args)
+
+        for _, kind, column, args in predicates[1:]:
+            if len(positions) == 0:
+                break
+            if kind == 'categorical':
+                positions = self.categorical[column].filter(positions, args)
+            else:
+                positions = self.ranges[column].filter(positions, *args)
+        if self.alive is not None:
+            positions = positions[self.alive[positions]]
+        return positions
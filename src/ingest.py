@@ -0,0 +1,333 @@
+# ingest.py
+import io
+import os
+import sqlite3
+import threading
+import time
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from preprocessing import preprocess_frame, append_listings
+from features import extend_tfidf_index
+from reloader import RssSampler
+
+# Ham CSV'den SQLite'a aktarılırken tamsayıya çevrilen sütunlar. Fiyat/kilometre metinlerinden
+# ("412.250 TL", "159,023 km") yalnızca rakamlar alınır; diğerleri sayı olarak ayrıştırılır.
+DIGIT_COLUMNS = ['Fiyat', 'Kilometre', 'KM']
+NUMERIC_COLUMNS = ['İlan No', 'Yıl']
+# Veritabanının filtreli sorguları kendisi yanıtlayabilmesi için oluşturulan indeksler
+INDEXED_COLUMNS = ['İlan No', 'Marka', 'Seri', 'Fiyat', 'Yıl']
+CSV_CHUNK_SIZE = int(os.getenv("CSV_CHUNK_SIZE", "50000"))
+
+# Yeni ilanın mevcut ilandan farklı olup olmadığına karar verilirken karşılaştırılan sütunlar
+CONTENT_COLUMNS = ['Marka', 'Seri', 'Model', 'Fiyat', 'Kilometre', 'Yıl', 'Vites Tipi', 'Yakıt Tipi',
+                   'cleaned_description', 'link']
+
+
+def normalize_raw_columns(df):
+    """
+    Ham ilan satırlarındaki tamsayı sütunlarını tipli değerlere çevirir (yerinde).
+    Çevrilemeyen değerler NULL olur.
+    """
+    for column in df.columns:
+        if column in DIGIT_COLUMNS:
+            digits = df[column].astype('string').str.replace(r'[^\d]', '', regex=True)
+            df[column] = pd.to_numeric(digits, errors='coerce').astype('Int64')
+        elif column in NUMERIC_COLUMNS:
+            df[column] = pd.to_numeric(df[column], errors='coerce').round().astype('Int64')
+    return df
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def stream_csv_to_sqlite(csv_path, db_path, table_name, chunk_size=CSV_CHUNK_SIZE):
+    """
+    CSV'yi sabit bellekle, parça parça tipli bir SQLite tablosuna aktarır.
+
+    Tablo, CSV başlığından tipli şema ile (Fiyat/Kilometre/Yıl/İlan No INTEGER, diğerleri
+    TEXT) oluşturulur. Her parça tek transaction içinde toplu eklenir, indeksler yükleme
+    bittikten sonra kurulur. Veritabanı geçici bir dosyada hazırlanıp atomik olarak
+    taşındığından yarıda kalan aktarım bozuk veritabanı bırakmaz.
+
+    Returns:
+        int: Aktarılan satır sayısı.
+    """
+    start = time.perf_counter()
+    header = pd.read_csv(csv_path, nrows=0, encoding='utf-8-sig').columns.tolist()
+    column_types = {column: 'INTEGER' if column in DIGIT_COLUMNS + NUMERIC_COLUMNS else 'TEXT'
+                    for column in header}
+    columns_sql = ', '.join(f'{_quote(column)} {column_types[column]}' for column in header)
+    insert_sql = (f'INSERT INTO {_quote(table_name)} ({", ".join(_quote(c) for c in header)}) '
+                  f'VALUES ({", ".join("?" for _ in header)})')
+
+    tmp_path = f"{db_path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    rows = 0
+    with RssSampler() as sampler:
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(f'CREATE TABLE {_quote(table_name)} ({columns_sql})')
+            reader = pd.read_csv(csv_path, chunksize=chunk_size, dtype=str, encoding='utf-8-sig')
+            for chunk in reader:
+                normalize_raw_columns(chunk)
+                # NA değerler SQLite'a NULL olarak gitsin
+                records = chunk.astype(object).where(chunk.notna(), None).itertuples(index=False, name=None)
+                with conn:
+                    conn.executemany(insert_sql, records)
+                rows += len(chunk)
+            with conn:
+                for column in INDEXED_COLUMNS:
+                    if column in header:
+                        conn.execute(f'CREATE INDEX {_quote(f"idx_{table_name}_{column}")} '
+                                     f'ON {_quote(table_name)} ({_quote(column)})')
+            # WAL içeriğini ana dosyaya yaz ki taşınan dosya tek başına eksiksiz olsun
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        finally:
+            conn.close()
+    for suffix in ('-wal', '-shm'):
+        if os.path.exists(tmp_path + suffix):
+            os.remove(tmp_path + suffix)
+    os.replace(tmp_path, db_path)
+
+    elapsed = time.perf_counter() - start
+    print(f"'{csv_path}' -> '{db_path}': {rows} satır {elapsed:.1f} sn'de aktarıldı "
+          f"({rows / elapsed if elapsed else 0:.0f} satır/sn, en yüksek bellek {'-' if sampler.peak_mb is None else f'{sampler.peak_mb:.0f}'} MB).")
+    return rows
+
+
+def _content_key(row):
+    return tuple(None if pd.isna(value) else (float(value) if isinstance(value, (int, float, np.number)) else str(value))
+                 for value in row)
+
+
+class IncrementalIngestor:
+    """
+    Scraper'ın sürekli büyüyen ara CSV'sindeki yeni veya değişmiş ilanları tam yeniden
+    yükleme yapmadan veri sürümüne ekler.
+
+    Yeni satırlar load_and_preprocess_from_db ile aynı preprocess_frame mantığından geçer,
+    mevcut vektörleyiciyle dönüştürülüp TF-IDF matrisine ve filtre indekslerine eklenir;
+    değişen veya kaldırılan ilanların eski satırları tombstone ile işaretlenir. Son
+    eğitimden bu yana eklenen + silinen satır oranı drift_threshold'u aşınca tam yeniden
+    kurulum (sıkıştırma ve vektörleyiciyi yeniden eğitme) gerektiği bildirilir.
+    """
+
+    def __init__(self, source='arabam', db_path=None, drift_threshold=0.2):
+        self.source = source
+        self.db_path = db_path
+        self.drift_threshold = drift_threshold
+        self._lock = threading.Lock()
+        self._offsets = None  # CSV yolu -> işlenmiş bayt sayısı (ilk kullanımda veritabanından okunur)
+        self._positions = {}  # İlan No -> depodaki geçerli satır konumu
+        # _positions'ın ait olduğu (listings, filter_engine) nesnelerine zayıf referanslar; sürüm
+        # numarası değil nesne kimliği karşılaştırılır
+        self._positions_for = None
+        self._fitted_vectorizer = None
+        self._fitted_rows = 0
+        self.churn = 0
+        self.stats = {"ingests": 0, "added": 0, "updated": 0, "removed": 0, "skipped": 0,
+                      "last_duration_ms": None}
+
+    def _load_offsets(self):
+        """Kaydedilmiş CSV konumlarını veritabanından okur (yalnızca ilk kullanımda)."""
+        if self._offsets is not None:
+            return self._offsets
+        self._offsets = {}
+        if self.db_path and os.path.exists(self.db_path):
+            conn = sqlite3.connect(self.db_path)
+            try:
+                if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'ingest_offsets'").fetchone():
+                    self._offsets = dict(conn.execute('SELECT csv_path, "offset" FROM ingest_offsets'))
+            finally:
+                conn.close()
+        return self._offsets
+
+    def read_new_rows(self, csv_path):
+        """
+        CSV'de son başarılı alımdan sonra eklenen satırları okur.
+
+        Dosya kaydedilmiş bayt konumundan itibaren okunur (baştan ayrıştırılmaz); yazımı
+        sürmekte olan yarım son satır bir sonraki okumaya bırakılır. Konum burada ilerletilmez:
+        dönen (csv_path, bayt konumu) ingest'e verilir ve değişiklikler kaydedildikten sonra
+        işlenir. Dosya küçülmüşse (yeniden yazılmışsa) baştan okunur.
+
+        Returns:
+            (DataFrame, (csv_path, yeni bayt konumu)) ya da dosya yoksa (boş DataFrame, None).
+        """
+        if not os.path.exists(csv_path):
+            return pd.DataFrame(), None
+        with open(csv_path, 'rb') as f:
+            header = f.readline()
+            offset = self._load_offsets().get(csv_path, 0)
+            if offset < len(header) or offset > os.fstat(f.fileno()).st_size:
+                offset = len(header)
+            f.seek(offset)
+            data = f.read()
+        data = data[:data.rfind(b'\n') + 1]
+        end = (csv_path, offset + len(data))
+        if not data.strip():
+            return pd.DataFrame(), end
+        return pd.read_csv(io.BytesIO(header + data), encoding='utf-8-sig'), end
+
+    def _positions_match(self, listings, filter_engine):
+        if self._positions_for is None:
+            return False
+        return self._positions_for[0]() is listings and self._positions_for[1]() is filter_engine
+
+    def _sync(self, listings, filter_engine, tfidf_index):
+        """
+        Verilen veri sürümü son alımın ürettiği sürüm değilse (ör. tam yeniden yüklemeden sonra)
+        ilan konumlarını yeniden çıkarır; vektörleyici değiştiyse drift sayaçlarını sıfırlar.
+        """
+        if tfidf_index is not None and tfidf_index[1] is not self._fitted_vectorizer:
+            self._fitted_vectorizer = tfidf_index[1]
+            self._fitted_rows = len(listings)
+            self.churn = 0
+        if not self._positions_match(listings, filter_engine):
+            mask = (listings['source'] == self.source).to_numpy()
+            if filter_engine.alive is not None:
+                mask &= filter_engine.alive
+            positions = np.flatnonzero(mask)
+            ids = listings['İlan No'].iloc[positions]
+            self._positions = {int(ilan_no): int(pos) for ilan_no, pos in zip(ids, positions) if pd.notna(ilan_no)}
+            self._positions_for = (weakref.ref(listings), weakref.ref(filter_engine))
+
+    def ingest(self, data, raw=None, removed_ids=(), csv_offset=None):
+        """
+        Yeni satırları ve silinen ilanları mevcut veri sürümüne uygular.
+
+        Args:
+            data: Mevcut (listings, tfidf_index, filter_engine) değerlerini taşıyan nesne.
+            raw: Yeni ham satırlar (scraper CSV sütunlarıyla) veya None.
+            removed_ids: Kaldırılan ilanların İlan No değerleri.
+            csv_offset: read_new_rows'un döndürdüğü (csv_path, bayt konumu); değişikliklerle
+                        aynı transaction'da kaydedilir.
+
+        Returns:
+            (listings, tfidf_index, filter_engine, rapor): Yeni sürümün bileşenleri ve özet.
+            Değişiklik yoksa bileşenler None döner. Veritabanına yazma başarısız olursa
+            ilan konumları, sayaçlar ve CSV konumu değişmez; aynı satırlar yeniden alınabilir.
+        """
+        with self._lock:
+            start = time.perf_counter()
+            listings, tfidf_index, engine = data.listings, data.tfidf_index, data.filter_engine
+            self._sync(listings, engine, tfidf_index)
+
+            frame = pd.DataFrame()
+            if raw is not None and not raw.empty:
+                frame = preprocess_frame(raw.copy(), self.source, verbose=False, workers=1)
+                frame = frame[frame['İlan No'].notna()]
+                frame = frame.drop_duplicates(subset='İlan No', keep='last').reset_index(drop=True)
+
+            # Değişmemiş ilanları at, değişenlerin eski satırlarını tombstone'a ekle
+            stale, keep, updated = [], [], 0
+            if not frame.empty:
+                existing = [self._positions.get(int(ilan_no)) for ilan_no in frame['İlan No']]
+                old_rows = [pos for pos in existing if pos is not None]
+                old_keys = {}
+                if old_rows:
+                    old = listings.iloc[old_rows][CONTENT_COLUMNS]
+                    old_keys = {pos: _content_key(row) for pos, row in zip(old_rows, old.itertuples(index=False))}
+                new_keys = frame[CONTENT_COLUMNS].itertuples(index=False)
+                for i, (pos, new_key) in enumerate(zip(existing, new_keys)):
+                    if pos is None:
+                        keep.append(i)
+                    elif old_keys[pos] != _content_key(new_key):
+                        keep.append(i)
+                        stale.append(pos)
+                        updated += 1
+                frame = frame.iloc[keep].reset_index(drop=True)
+
+            removed_ids = [int(ilan_no) for ilan_no in dict.fromkeys(removed_ids) if int(ilan_no) in self._positions]
+            removed = [self._positions[ilan_no] for ilan_no in removed_ids]
+            stale_positions = stale + removed
+            skipped = (len(raw) if raw is not None else 0) - len(frame)
+
+            if frame.empty and not stale_positions:
+                # Yalnızca değişmemiş satırlar okunduysa konum yine de ilerletilir
+                if csv_offset is not None and self._load_offsets().get(csv_offset[0]) != csv_offset[1]:
+                    self._persist(None, [], [], listings, csv_offset)
+                    self._commit_offset(csv_offset)
+                self.stats["skipped"] += skipped
+                return None, None, None, self._report(0, 0, 0, skipped, start)
+
+            # Yeni sürüm değişmez kopyalar üzerinde kurulur; mevcut durum henüz değiştirilmez
+            offset = len(listings)
+            if not frame.empty:
+                listings = append_listings(listings, frame, self.source)
+                if tfidf_index is not None:
+                    tfidf_index = extend_tfidf_index(tfidf_index, listings.iloc[offset:])
+                engine = engine.extend(listings)
+            engine = engine.tombstone(stale_positions)
+            self._persist(raw, frame['İlan No'].tolist() if not frame.empty else [], stale_positions, listings,
+                          csv_offset)
+
+            # Veritabanı güncellendi; bellekteki durum ve CSV konumu artık ilerletilebilir
+            self._commit_offset(csv_offset)
+            for ilan_no in removed_ids:
+                del self._positions[ilan_no]
+            for i, ilan_no in enumerate(frame['İlan No'] if not frame.empty else []):
+                self._positions[int(ilan_no)] = offset + i
+            self._positions_for = (weakref.ref(listings), weakref.ref(engine))
+
+            self.churn += len(frame) + len(removed)
+            added = len(frame) - updated
+            self.stats["ingests"] += 1
+            self.stats["added"] += added
+            self.stats["updated"] += updated
+            self.stats["removed"] += len(removed)
+            self.stats["skipped"] += skipped
+            return listings, tfidf_index, engine, self._report(added, updated, len(removed), skipped, start)
+
+    def _commit_offset(self, csv_offset):
+        if csv_offset is not None:
+            csv_path, offset = csv_offset
+            self._load_offsets()[csv_path] = offset
+
+    def _persist(self, raw, new_ids, stale_positions, listings, csv_offset=None):
+        """
+        Değişiklikleri ve CSV konumunu tek transaction ile kaynak veritabanına yazar; böylece
+        sonraki tam yeniden yükleme aynı veriyi görür, yeniden başlatmada alım kaldığı yerden sürer.
+        """
+        if not self.db_path:
+            return
+        conn = sqlite3.connect(self.db_path)
+        try:
+            columns = [row[1] for row in conn.execute(f'PRAGMA table_info("{self.source}")')]
+            with conn:
+                if csv_offset is not None:
+                    conn.execute('CREATE TABLE IF NOT EXISTS ingest_offsets (csv_path TEXT PRIMARY KEY, "offset" INTEGER)')
+                    conn.execute('INSERT OR REPLACE INTO ingest_offsets (csv_path, "offset") VALUES (?, ?)', csv_offset)
+                stale_ids = listings['İlan No'].iloc[stale_positions].dropna().astype('int64').tolist()
+                conn.executemany(f'DELETE FROM "{self.source}" WHERE "İlan No" = ?', [(i,) for i in stale_ids])
+                if raw is not None and new_ids and columns:
+                    ids = pd.to_numeric(raw['İlan No'], errors='coerce')
+                    rows = raw[ids.isin(new_ids)].drop_duplicates(subset='İlan No', keep='last')
+                    rows = normalize_raw_columns(rows[[column for column in rows.columns if column in columns]].copy())
+                    rows.to_sql(self.source, conn, if_exists='append', index=False)
+        finally:
+            conn.close()
+
+    def needs_refit(self):
+        """Son eğitimden beri değişen satır oranı eşiği aştı mı?"""
+        return self._fitted_rows > 0 and self.churn / self._fitted_rows > self.drift_threshold
+
+    def _report(self, added, updated, removed, skipped, start):
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.stats["last_duration_ms"] = elapsed_ms
+        return {
+            "added": added,
+            "updated": updated,
+            "removed": removed,
+            "skipped": skipped,
+            "duration_ms": elapsed_ms,
+            "churn_ratio": self.churn / self._fitted_rows if self._fitted_rows else 0.0,
+            "needs_refit": self.needs_refit(),
+        }
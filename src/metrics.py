@@ -0,0 +1,233 @@
+# metrics.py
+import bisect
+import contextlib
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# Aşama süreleri ve aday sayıları toplansın mı (varsayılan kapalı, METRICS_ENABLED=1 ile açılır);
+# kapalıyken stage() paylaşılan boş bir bağlam yöneticisi döndürür, ölçüm maliyeti tek bir
+# bayrak kontrolüdür. /metrics yine de önbellek, havuz ve veri sürümü değerlerini döndürür
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "0") == "1"
+
+# İstek bazında örnekleyici profiler ('X-Profile: 1' başlığı); yalnızca açıkça etkinleştirilirse
+PROFILE_REQUESTS = os.getenv("PROFILE_REQUESTS", "0") == "1"
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.001"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "data/profiles")
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000, 1000000)
+
+_profile_ids = itertools.count(1)
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _labels(label, value, extra=''):
+    parts = [f'{label}="{value}"'] if label else []
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class Histogram:
+    """Sabit sınırlı, thread-safe histogram (Prometheus 'le' sınırları dahil)."""
+
+    def __init__(self, buckets):
+        self.bounds = tuple(buckets)
+        self._counts = [0] * (len(self.bounds) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+
+    def snapshot(self):
+        with self._lock:
+            return list(self._counts), self._sum
+
+
+class MetricFamily:
+    """Tek etiketli histogram veya sayaç ailesi; alt seriler ilk kullanımda oluşturulur."""
+
+    def __init__(self, name, help_text, kind, label=None, buckets=None):
+        self.name = name
+        self.help_text = help_text
+        self.kind = kind
+        self.label = label
+        self.buckets = buckets
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, value=''):
+        child = self._children.get(value)
+        if child is None:
+            with self._lock:
+                child = self._children.get(value)
+                if child is None:
+                    child = self._children[value] = Histogram(self.buckets) if self.kind == 'histogram' else [0]
+        return child
+
+    def inc(self, value='', amount=1):
+        counter = self.labels(value)
+        with self._lock:
+            counter[0] += amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        for value, child in sorted(self._children.items()):
+            if self.kind == 'counter':
+                lines.append(f"{self.name}_total{_labels(self.label, value)} {child[0]}")
+                continue
+            counts, total = child.snapshot()
+            cumulative = 0
+            for bound, count in zip(child.bounds + (float('inf'),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label, value, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label, value)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label, value)} {cumulative}")
+        return lines
+
+
+# Öneri hattındaki aşamalar: app (request, cache_lookup, scoring, batch_scoring, serialize),
+# recommendation (filter, tfidf_rows, top_k), ann (ann_probe), features (tfidf_fit, cosine_similarity,
+# cosine_similarity_batch), sql_store (sql_fetch). Aşamalar iç içe olabilir.
+STAGE_SECONDS = MetricFamily(
+    "recommend_stage_seconds", "Öneri hattındaki aşamaların süresi (saniye).", 'histogram',
+    label='stage', buckets=LATENCY_BUCKETS,
+)
+CANDIDATES = MetricFamily(
+    "recommend_candidates", "Filtrelerden geçip puanlanan aday ilan sayısı.", 'histogram',
+    label='', buckets=SIZE_BUCKETS,
+)
+REQUESTS = MetricFamily(
+    "recommend_requests", "Öneri istekleri (önbellek sonucuna göre).", 'counter', label='cache',
+)
+FAMILIES = [STAGE_SECONDS, CANDIDATES, REQUESTS]
+
+
+class _StageTimer:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+_DISABLED = contextlib.nullcontext()
+
+
+def stage(name):
+    """Bloğun süresini recommend_stage_seconds{stage=name} histogramına yazan bağlam yöneticisi."""
+    if not METRICS_ENABLED:
+        return _DISABLED
+    return _StageTimer(STAGE_SECONDS.labels(name))
+
+
+def observe_candidates(count):
+    if METRICS_ENABLED:
+        CANDIDATES.labels().observe(count)
+
+
+def count_request(cache):
+    if METRICS_ENABLED:
+        REQUESTS.inc(cache)
+
+
+def render_metrics(gauges=None):
+    """
+    Tüm metrikleri Prometheus metin biçiminde döndürür. gauges, {ad: değer} olarak
+    anlık değerleri (önbellek, havuz vb.) ekler.
+
+    Not: SCORING_MODE=process iken çalışan süreçlerde ölçülen aşamalar (filter, top_k vb.)
+    bu sürece aktarılmaz; istek düzeyindeki aşamalar yine de toplanır.
+    """
+    lines = []
+    for family in FAMILIES:
+        lines.extend(family.render())
+    for name, value in (gauges or {}).items():
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {_format_value(value)}")
+    return '\n'.join(lines) + '\n'
+
+
+class SamplingProfiler:
+    """
+    Çağıran iş parçacığını interval saniyede bir örnekleyen basit profiler.
+
+    Yığınlar fonksiyon düzeyinde 'collapsed' biçimde toplanır (flamegraph.pl ve
+    speedscope ile açılabilir). Yalnızca bağlam içindeki iş parçacığı örneklenir.
+    """
+
+    def __init__(self, interval=None):
+        self.interval = interval or PROFILE_INTERVAL
+        self.samples = Counter()
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._target = None
+        self._thread = None
+
+    def __enter__(self):
+        self._target = threading.get_ident()
+        self._start = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self._start
+        return False
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def collapsed(self):
+        return ''.join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    def write(self, directory=None):
+        """Profili PROFILE_DIR altına yazar ve dosya yolunu döndürür."""
+        directory = directory or PROFILE_DIR
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"profile-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(_profile_ids)}.txt")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"# {sum(self.samples.values())} örnek, {self.duration * 1000:.1f} ms, "
+                    f"aralık {self.interval * 1000:.1f} ms\n")
+            f.write(self.collapsed())
+        return path
+
+
+def profile_call(func, *args, **kwargs):
+    """func'u örnekleyici profiler altında çalıştırır; (sonuç, profil dosyası yolu) döndürür."""
+    with SamplingProfiler() as profiler:
+        result = func(*args, **kwargs)
+    return result, profiler.write()
@@ -0,0 +1,136 @@
+# parsers.py
+import os
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html as lxml_html
+except ImportError:  # lxml yoksa yalnızca BeautifulSoup kullanılır
+    lxml_html = None
+
+try:
+    from selectolax.parser import HTMLParser as SelectolaxHTMLParser
+except ImportError:
+    SelectolaxHTMLParser = None
+
+# Ayrıştırıcı arka ucu: 'lxml', 'selectolax' veya 'bs4' (referans). Boşsa kurulu en hızlısı seçilir.
+PARSER_BACKEND = os.getenv("PARSER_BACKEND", "")
+
+
+class SoupBackend:
+    """BeautifulSoup + html.parser; diğer arka uçların doğrulandığı referans uygulama."""
+
+    name = "bs4"
+
+    def document(self, html):
+        return BeautifulSoup(html, 'html.parser')
+
+    def select_one(self, node, css):
+        return node.select_one(css)
+
+    def select(self, node, css):
+        return node.select(css)
+
+    def text(self, node):
+        return node.text
+
+    def attr(self, node, name):
+        return node.get(name)
+
+
+def _compound_xpath(selector):
+    tag, *classes = selector.strip().split('.')
+    conditions = ''.join(f"[contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')]" for cls in classes)
+    return f"descendant::{tag or '*'}{conditions}"
+
+
+def css_to_xpath(css):
+    """
+    Scraper'ın kullandığı basit CSS seçicilerini ('etiket', '.a.b' ve virgülle gruplar)
+    XPath'e çevirir. Birleşim (|) sonuçları belge sırasında döndüğünden select_one
+    davranışı BeautifulSoup ile aynıdır.
+    """
+    return ' | '.join(_compound_xpath(part) for part in css.split(','))
+
+
+class LxmlBackend:
+    """libxml2 tabanlı ayrıştırma; seçiciler bir kez XPath'e derlenip önbelleğe alınır."""
+
+    name = "lxml"
+
+    def __init__(self):
+        self._compiled = {}
+
+    def _xpath(self, css):
+        xpath = self._compiled.get(css)
+        if xpath is None:
+            xpath = self._compiled[css] = lxml_html.etree.XPath(css_to_xpath(css))
+        return xpath
+
+    def document(self, html):
+        # Boş belge lxml'de hata verir; BeautifulSoup gibi boş bir ağaç döndür
+        return lxml_html.document_fromstring(html if html and html.strip() else "<html></html>")
+
+    def select_one(self, node, css):
+        found = self._xpath(css)(node)
+        return found[0] if found else None
+
+    def select(self, node, css):
+        return self._xpath(css)(node)
+
+    def text(self, node):
+        return node.text_content()
+
+    def attr(self, node, name):
+        return node.get(name)
+
+
+class SelectolaxBackend:
+    """Lexbor tabanlı selectolax ayrıştırıcısı."""
+
+    name = "selectolax"
+
+    def document(self, html):
+        return SelectolaxHTMLParser(html)
+
+    def select_one(self, node, css):
+        return node.css_first(css)
+
+    def select(self, node, css):
+        return node.css(css)
+
+    def text(self, node):
+        return node.text(deep=True)
+
+    def attr(self, node, name):
+        return node.attributes.get(name)
+
+
+_BACKENDS = {
+    "bs4": (SoupBackend, True),
+    "lxml": (LxmlBackend, lxml_html is not None),
+    "selectolax": (SelectolaxBackend, SelectolaxHTMLParser is not None),
+}
+_instances = {}
+
+
+def available_backends():
+    return [name for name, (_, available) in _BACKENDS.items() if available]
+
+
+def get_backend(name=None):
+    """
+    Adı verilen ayrıştırıcı arka ucunu döndürür. Ad verilmezse PARSER_BACKEND, o da boşsa
+    kurulu olanlardan lxml > selectolax > bs4 sırasıyla ilki kullanılır.
+    """
+    name = name or PARSER_BACKEND
+    if not name:
+        name = next(n for n in ("lxml", "selectolax", "bs4") if _BACKENDS[n][1])
+    if name not in _BACKENDS:
+        raise ValueError(f"Bilinmeyen ayrıştırıcı: {name} (seçenekler: {', '.join(_BACKENDS)})")
+    cls, available = _BACKENDS[name]
+    if not available:
+        raise ImportError(f"'{name}' ayrıştırıcısı için gerekli paket kurulu değil.")
+    if name not in _instances:
+        _instances[name] = cls()
+    return _instances[name]
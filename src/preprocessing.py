@@ -1,8 +1,12 @@
+import numpy as np
 import pandas as pd
 import sqlite3
 import nltk
 from nltk.corpus import stopwords
 import re
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 # NLTK stopwords ve punkt'u bir kez indirmek için
 try:
@@ -15,20 +19,120 @@ except LookupError:
     except Exception as e:
         print(f"Uyarı: NLTK indirme hatası: {e}. Stopwords kullanılmayacak.")
 
-def load_and_preprocess_from_db(conn, table_name='arabam'):
+TOKEN_PATTERN = re.compile(r'\w+')
+
+# Açıklama temizleme için paralellik ayarları; PREPROCESS_WORKERS=1 seri çalıştırır
+PREPROCESS_WORKERS = int(os.getenv("PREPROCESS_WORKERS", "0")) or (os.cpu_count() or 1)
+PREPROCESS_CHUNK_SIZE = int(os.getenv("PREPROCESS_CHUNK_SIZE", "20000"))
+
+# Ham fiyatı bölünerek ölçeklenen kaynaklar (arabam fiyatları veritabanında 10 katı tutulur)
+PRICE_DIVISORS = {'arabam': 10}
+
+# Son açıklama temizleme çalışmasının istatistikleri (satır/sn dahil)
+CLEANING_STATS = {}
+
+def _clean_chunk(args):
+    """Bir açıklama parçasını temizler; süreç havuzunda çalışabilmesi için modül seviyesinde."""
+    texts, stop_words = args
+    findall = TOKEN_PATTERN.findall
+    if stop_words:
+        return [' '.join([w for w in findall(x) if w not in stop_words]) for x in texts]
+    return [' '.join(findall(x)) for x in texts]
+
+def clean_descriptions(texts, stop_words=None, workers=None, chunk_size=None, verbose=True):
+    """
+    Küçük harfe çevrilmiş açıklamaları tokenlara ayırır ve stopword'leri çıkarır.
+    Metinler parçalara bölünüp çekirdek sayısı kadar süreçten oluşan bir havuza dağıtılır;
+    çıktı seri uygulama ile birebir aynıdır.
+
+    Args:
+        texts: Açıklama metinleri (liste veya Series).
+        stop_words: Çıkarılacak kelimeler kümesi; None ise yalnızca tokenization yapılır.
+        workers: Süreç sayısı (varsayılan PREPROCESS_WORKERS).
+        chunk_size: Parça başına satır sayısı (varsayılan PREPROCESS_CHUNK_SIZE).
+        verbose: False ise hız özeti yazdırılmaz ve CLEANING_STATS güncellenmez (istek başına
+            çalışan çağrılar için; CLEANING_STATS tam yüklemenin ölçümü kalır).
+
+    Returns:
+        list: Temizlenmiş açıklamalar, girdiyle aynı sırada.
+    """
+    texts = list(texts)
+    workers = workers or PREPROCESS_WORKERS
+    chunk_size = chunk_size or PREPROCESS_CHUNK_SIZE
+    stop_words = frozenset(stop_words) if stop_words else None
+
+    start = time.perf_counter()
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    if workers <= 1 or len(chunks) <= 1:
+        workers = 1
+        results = [_clean_chunk((chunk, stop_words)) for chunk in chunks]
+    else:
+        workers = min(workers, len(chunks))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_clean_chunk, [(chunk, stop_words) for chunk in chunks]))
+    cleaned = [text for chunk in results for text in chunk]
+
+    if verbose:
+        elapsed = time.perf_counter() - start
+        CLEANING_STATS.update({
+            'rows': len(texts),
+            'seconds': elapsed,
+            'rows_per_sec': len(texts) / elapsed if elapsed > 0 else 0.0,
+            'workers': workers,
+        })
+        print(f"Açıklama temizleme: {len(texts)} satır, {workers} süreç, "
+              f"{CLEANING_STATS['rows_per_sec']:.0f} satır/sn.")
+    return cleaned
+
+def load_and_preprocess_from_db(conn, table_name='arabam', where=None, params=None, verbose=True, workers=None):
     """
     SQLite bağlantısından veriyi yükle ve preprocess et.
 
     Args:
         conn: SQLAlchemy veya sqlite3 bağlantı objesi.
         table_name: Veritabanındaki tablo adı ('arabam' veya 'otosor').
+        where: Yalnızca eşleşen satırları okumak için '?' parametreli SQL koşulu (isteğe bağlı).
+            Satırlar tablodaki sırasıyla döner.
+        params: where içindeki '?' yer tutucularının değerleri.
+        verbose, workers: preprocess_frame'e aktarılır.
 
     Returns:
         pd.DataFrame: Temizlenmiş ve normalize edilmiş DataFrame.
     """
+    # INTEGER tanımlı sütunlar NULL içerse de float'a dönmesin diye Int64 okunur
+    schema = pd.read_sql_query(f"PRAGMA table_info({table_name})", conn)
+    integer_columns = schema.loc[schema['type'].str.upper() == 'INTEGER', 'name']
     query = f"SELECT * FROM {table_name}"
-    df = pd.read_sql_query(query, conn)
+    if where:
+        query += f" WHERE {where} ORDER BY rowid"
+    df = pd.read_sql_query(query, conn, params=params, dtype={column: 'Int64' for column in integer_columns})
+    return preprocess_frame(df, table_name, verbose=verbose, workers=workers)
 
+def digits_to_int(values):
+    """
+    "412.250 TL" / "159,023 km" gibi metinlerden rakamları alıp Int64'e çevirir. Tipli
+    veritabanından tamsayı olarak gelen sütunlar metne çevrilmeden olduğu gibi alınır.
+    """
+    if pd.api.types.is_integer_dtype(values):
+        return values.astype('Int64')
+    digits = values.astype(str).str.replace(r'[^\d]', '', regex=True).str.strip()
+    return pd.to_numeric(digits, errors='coerce').astype('Int64')
+
+def preprocess_frame(df, table_name='arabam', verbose=True, workers=None):
+    """
+    Ham ilan satırlarını temizler ve normalize eder. load_and_preprocess_from_db ve
+    artımlı veri alımı aynı mantığı kullanır.
+
+    Args:
+        df: Veritabanı tablosu veya scraper CSV'si ile aynı sütunlara sahip ham DataFrame.
+        table_name: Kaynak adı ('arabam' veya 'otosor'); fiyat ölçeklemesini belirler.
+        verbose: False ise açıklama temizleme özeti yazdırılmaz ve CLEANING_STATS güncellenmez.
+        workers: Açıklama temizleme süreç sayısı (varsayılan PREPROCESS_WORKERS); istek
+            yolunda 1 verilir, böylece istek başına süreç havuzu açılmaz.
+
+    Returns:
+        pd.DataFrame: Temizlenmiş ve normalize edilmiş DataFrame.
+    """
     # Kolon isimlerini normalleştir (otosor için)
     column_mapping = {
         'Yıl': 'Yıl',
@@ -52,11 +156,10 @@ def load_and_preprocess_from_db(conn, table_name='arabam'):
 
     # Fiyat temizleme
     if 'Fiyat' in df.columns:
-        df['Fiyat'] = df['Fiyat'].astype(str).str.replace(r'[^\d]', '', regex=True).str.strip()
-        df['Fiyat'] = pd.to_numeric(df['Fiyat'], errors='coerce').astype('Int64')
+        df['Fiyat'] = digits_to_int(df['Fiyat'])
         # Yalnızca arabam tablosu için fiyatı 10'a böl
-        if table_name == 'arabam':
-            df['Fiyat'] = df['Fiyat'] / 10
+        if table_name in PRICE_DIVISORS:
+            df['Fiyat'] = df['Fiyat'] / PRICE_DIVISORS[table_name]
 
     # Yıl temizleme
     if 'Yıl' in df.columns:
@@ -64,26 +167,145 @@ def load_and_preprocess_from_db(conn, table_name='arabam'):
 
     # Kilometre temizleme
     if 'Kilometre' in df.columns:
-        df['Kilometre'] = df['Kilometre'].astype(str).str.replace(r'[^\d]', '', regex=True).str.strip()
-        df['Kilometre'] = pd.to_numeric(df['Kilometre'], errors='coerce').astype('Int64')  # Int64
+        df['Kilometre'] = digits_to_int(df['Kilometre'])  # Int64
 
     # Açıklama temizleme
     if 'Açıklama' in df.columns:
         df['Açıklama'] = df['Açıklama'].fillna('').str.lower().str.strip()
         try:
             stop_words = set(stopwords.words("turkish"))
-            df['cleaned_description'] = df['Açıklama'].apply(
-                lambda x: ' '.join([w for w in re.findall(r'\w+', x) if w not in stop_words])
-            )
         except Exception:
-            df['cleaned_description'] = df['Açıklama'].apply(
-                lambda x: ' '.join(re.findall(r'\w+', x))
-            )
-            print("Uyarı: Stopwords kullanılamadı, basit tokenization uygulandı.")
+            stop_words = None
+            if verbose:
+                print("Uyarı: Stopwords kullanılamadı, basit tokenization uygulandı.")
+        df['cleaned_description'] = pd.Series(
+            clean_descriptions(df['Açıklama'], stop_words, workers=workers, verbose=verbose), index=df.index, dtype=object
+        )
 
     # Link temizleme: NaN veya geçersiz değerleri None yap
     if 'link' in df.columns:
-        df['link'] = df['link'].apply(lambda x: x if isinstance(x, str) and x.strip() else None)
+        df['link'] = clean_links(df['link'])
 
     # Sonuç için sadece gerekli kolonları döndür
-    return df[expected_cols + ['cleaned_description']]
\ No newline at end of file
+    return df[expected_cols + ['cleaned_description']]
+
+def clean_links(links):
+    """
+    Link sütununu vektörel olarak temizler: string olmayan veya boş değerler None olur.
+    """
+    values = links.to_numpy(dtype=object)
+    valid = np.fromiter((isinstance(x, str) and bool(x.strip()) for x in values), dtype=bool, count=len(values))
+    return pd.Series(np.where(valid, values, None), index=links.index, dtype=object)
+
+# Düşük kardinaliteli metin sütunları; depoda kategorik tipte tutulur
+CATEGORY_COLUMNS = ['Marka', 'Seri', 'Model', 'Vites Tipi', 'Yakıt Tipi', 'source']
+
+# Sayısal sütunlar için denenecek kompakt tipler (kayıpsız olan ilk tip seçilir)
+COMPACT_NUMERIC_DTYPES = {
+    'Fiyat': ['Float32', 'Float64'],
+    'Kilometre': ['Int32', 'Int64'],
+    'Yıl': ['Int16', 'Int64'],
+}
+
+def downcast_lossless(series, candidates):
+    """
+    Seriyi, değerleri birebir korunan ilk aday tipe dönüştürür; hiçbiri uymazsa
+    seriyi değiştirmeden döndürür.
+    """
+    for dtype in candidates:
+        try:
+            converted = series.astype(dtype)
+        except (TypeError, ValueError, OverflowError):
+            continue
+        if converted.astype('Float64').equals(series.astype('Float64')):
+            return converted
+    return series
+
+def compact_listings(df):
+    """
+    Bellekteki ilan tablosunu küçültür: kategorik sütunlar 'category', fiyat/km/yıl
+    kayıpsız en küçük nullable tip olur; temizlenmiş hali bulunan ham 'Açıklama' atılır.
+    """
+    for column in CATEGORY_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype('category')
+    for column, candidates in COMPACT_NUMERIC_DTYPES.items():
+        if column in df.columns:
+            df[column] = downcast_lossless(df[column], candidates)
+    if 'cleaned_description' in df.columns and 'Açıklama' in df.columns:
+        df = df.drop(columns=['Açıklama'])
+    return df
+
+def memory_report(df):
+    """
+    Sütun başına bellek kullanımını (bayt) ve toplamı döndürür.
+    """
+    usage = df.memory_usage(index=True, deep=True)
+    return {'columns': {str(col): int(size) for col, size in usage.items()}, 'total': int(usage.sum())}
+
+def build_listings_store(sources):
+    """
+    Kaynak DataFrame'lerini başlangıçta bir kez tek, değişmez bir ilan deposunda birleştirir.
+    Linkler load_and_preprocess_from_db içinde zaten temizlenmiş olarak gelir.
+
+    Args:
+        sources: {kaynak_adı: DataFrame} sözlüğü (ör. {'arabam': df1, 'otosor': df2}).
+                 None olan kaynaklar atlanır; sıralama korunur.
+
+    Returns:
+        pd.DataFrame veya None: 'source' ve 'row_id' sütunları eklenmiş, compact_listings ile
+        küçültülmüş birleşik DataFrame. row_id, satırın depodaki konumudur ve indeks ile aynıdır.
+    """
+    frames = []
+    for source, df in sources.items():
+        if df is None or df.empty:
+            continue
+        frames.append(df.assign(source=source))
+    if not frames:
+        return None
+
+    # Kategoriler kaynaklar arasında farklı olacağından tip dönüşümü birleştirmeden sonra yapılır
+    store = compact_listings(pd.concat(frames, ignore_index=True))
+    store['row_id'] = np.arange(len(store), dtype=np.int64)
+    return store
+
+def append_listings(store, frame, source):
+    """
+    Ön işlenmiş yeni satırları mevcut depoya ekleyerek yeni bir depo döndürür; mevcut
+    depo değiştirilmez. Yeni satırlar deponun sonuna eklenir ve sıradaki row_id'leri alır,
+    böylece mevcut satırların konumları ve indeksleri geçerli kalır.
+
+    Args:
+        store: build_listings_store ile oluşturulmuş depo.
+        frame: preprocess_frame çıktısı (yeni satırlar).
+        source: Yeni satırların kaynak adı (ör. 'arabam').
+
+    Returns:
+        pd.DataFrame: Genişletilmiş depo.
+    """
+    new = compact_listings(frame.assign(source=source))
+    new['row_id'] = np.arange(len(store), len(store) + len(new), dtype=np.int64)
+    new = new.reindex(columns=store.columns)
+
+    base = {}
+    for column in store.columns:
+        old_values, new_values = store[column], new[column]
+        if isinstance(old_values.dtype, pd.CategoricalDtype):
+            # Mevcut kodlar korunarak yeni kategoriler sona eklenir
+            added = pd.Index(new_values.dropna().unique()).difference(old_values.cat.categories)
+            old_values = old_values.cat.add_categories(added) if len(added) else old_values
+            new_values = pd.Series(pd.Categorical(new_values, dtype=old_values.dtype), index=new.index)
+        elif column in COMPACT_NUMERIC_DTYPES:
+            # Yeni değerler mevcut kompakt tipe sığmazsa iki taraf da geniş tipe çıkar
+            fitted = downcast_lossless(new_values, [str(old_values.dtype)])
+            if str(fitted.dtype) != str(old_values.dtype):
+                wide = COMPACT_NUMERIC_DTYPES[column][-1]
+                old_values, fitted = old_values.astype(wide), new_values.astype(wide)
+            new_values = fitted
+        base[column] = (old_values, new_values)
+
+    combined = pd.DataFrame({
+        column: pd.concat([old_values, new_values], ignore_index=True)
+        for column, (old_values, new_values) in base.items()
+    })
+    return combined
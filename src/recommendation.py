@@ -1,16 +1,14 @@
 # recommendation.py
+import numpy as np
 import pandas as pd
-from features import compute_tfidf, compute_similarity
+from features import compute_tfidf, compute_similarity, compute_similarity_batch
+from metrics import stage, observe_candidates
 
-def recommend_cars(df, user_desc, marka, seri=None, model=None,
-                   alt_fiyat=None, ust_fiyat=None, min_km=None, max_km=None,
-                   min_yil=None, max_yil=None, vites=None, yakit=None, top_n=5):
+def filter_positions(df, marka, seri=None, model=None, alt_fiyat=None, ust_fiyat=None,
+                     min_km=None, max_km=None, min_yil=None, max_yil=None, vites=None, yakit=None):
     """
-    Araba öneri fonksiyonu: Filtreleme + TF-IDF similarity.
+    İndeks kullanmadan tam sütun taramasıyla filtreler ve eşleşen satır konumlarını döndürür.
     """
-    df = df.copy()
-
-    # Filtreleme
     mask = df['Marka'].str.lower() == marka.lower()
     if seri:
         mask &= df['Seri'].str.contains(seri, case=False, na=False)
@@ -33,31 +31,164 @@ def recommend_cars(df, user_desc, marka, seri=None, model=None,
     if yakit:
         mask &= df['Yakıt Tipi'].str.contains(yakit, case=False, na=False)
 
-    filtered_df = df[mask].copy()
+    return np.flatnonzero(mask.to_numpy(dtype=bool, na_value=False))
+
+def top_k_order(similarities, prices, years, top_n):
+    """
+    Tüm adayları sıralamadan en yüksek benzerlikli top_n adayın sıralı indislerini döndürür.
+
+    np.argpartition ile sınır benzerliği bulunur; yalnızca sınırın üstündeki ve sınıra eşit
+    adaylar sıralanır. Eşitlikler fiyata (artan), sonra yıla (azalan), sonra konuma göre
+    çözülür; eksik fiyat/yıl sona düşer. top_n None ise tüm adaylar sıralanır.
+    """
+    n = len(similarities)
+    k = n if top_n is None else (max(n + top_n, 0) if top_n < 0 else min(top_n, n))
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+
+    if k < n:
+        # k. en büyük benzerlik; bundan küçük adaylar sonuca giremez
+        threshold = similarities[np.argpartition(-similarities, k - 1)[k - 1]]
+        candidates = np.flatnonzero(similarities >= threshold)
+    else:
+        candidates = np.arange(n)
+
+    # np.lexsort son anahtara göre birincil sıralar; NaN'lar doğal olarak sona gider
+    order = np.lexsort((
+        candidates,
+        -years[candidates],
+        prices[candidates],
+        -similarities[candidates],
+    ))
+    return candidates[order[:k]]
+
+def candidate_positions(df, filters, filter_engine=None):
+    """
+    recommend_cars filtre sözlüğüyle eşleşen satır konumlarını döndürür.
+    """
+    with stage('filter'):
+        positions = filter_engine.query(**filters) if filter_engine is not None else filter_positions(df, **filters)
+    observe_candidates(len(positions))
+    return positions
+
+def select_top(df, positions, similarities, top_n):
+    """
+    Puanlanmış adaylardan en iyi top_n satırı seçer ve yalnızca bu satırları çıktı
+    sütunlarıyla oluşturur. Eşitlikte ucuz olan, sonra yeni olan önde gelir.
+    """
+    with stage('top_k'):
+        prices = df['Fiyat'].iloc[positions].to_numpy(dtype=float, na_value=np.nan)
+        years = df['Yıl'].iloc[positions].to_numpy(dtype=float, na_value=np.nan)
+        top = top_k_order(similarities, prices, years, top_n)
+
+        # Çıktı için sütunları seç; yalnızca seçilen satırlar oluşturulur
+        cols = ['İlan No', 'Marka', 'Seri', 'Model', 'Fiyat', 'Kilometre', 'Yıl', 'Vites Tipi', 'Yakıt Tipi', 'link']
+        available_cols = [df.columns.get_loc(col) for col in cols if col in df.columns]
 
-    if filtered_df.empty:
+        return df.iloc[positions[top], available_cols]
+
+def recommend_cars(df, user_desc, marka, seri=None, model=None,
+                   alt_fiyat=None, ust_fiyat=None, min_km=None, max_km=None,
+                   min_yil=None, max_yil=None, vites=None, yakit=None, top_n=5,
+                   tfidf_index=None, filter_engine=None, ann_index=None):
+    """
+    Araba öneri fonksiyonu: Filtreleme + TF-IDF similarity.
+
+    df değiştirilmez ve kopyalanmaz; yalnızca filtreden geçen satırlar konum dizisiyle alınır.
+    tfidf_index verilirse (tfidf_matrix, vectorizer) satırları df ile aynı sırada
+    kabul edilir; vektörleyici yeniden eğitilmez, yalnızca filtreden geçen satırlar puanlanır.
+    filter_engine verilirse (df üzerinde kurulmuş filters.FilterEngine) filtreler tam sütun
+    taraması yerine önceden hesaplanmış indekslerle uygulanır.
+    ann_index verilirse (tfidf_index ile aynı satır sırasında kurulmuş ann.AnnIndex) büyük
+    aday kümeleri puanlanmadan önce kullanıcı metnine en yakın kümelerdeki adaylarla sınırlanır.
+    """
+    # Filtreleme
+    filters = dict(marka=marka, seri=seri, model=model, alt_fiyat=alt_fiyat, ust_fiyat=ust_fiyat,
+                   min_km=min_km, max_km=max_km, min_yil=min_yil, max_yil=max_yil, vites=vites, yakit=yakit)
+    positions = candidate_positions(df, filters, filter_engine)
+
+    if len(positions) == 0:
         return pd.DataFrame()
 
+    # Yaklaşık arama: yalnızca metne yakın kümelerdeki adaylar puanlanır; sorgu vektörü
+    # benzerlik hesabında yeniden kullanılır
+    user_vec = None
+    if ann_index is not None and tfidf_index is not None and user_desc.strip():
+        user_vec = tfidf_index[1].transform([user_desc])
+        positions = ann_index.shortlist(user_vec, positions, top_n)
+
     # TF-IDF hesaplaması ve benzerlik
-    tfidf_matrix, vectorizer = compute_tfidf(filtered_df)
+    if tfidf_index is not None:
+        # Önceden eğitilmiş global indeksten yalnızca filtreden geçen satırları al
+        with stage('tfidf_rows'):
+            tfidf_matrix, vectorizer = tfidf_index[0][positions], tfidf_index[1]
+    else:
+        tfidf_matrix, vectorizer = compute_tfidf(df.iloc[positions])
 
     # Kullanıcı açıklaması boş değilse benzerlik hesapla, aksi halde varsayılan bir değer kullan.
     if user_desc.strip():
-        similarities = compute_similarity(vectorizer, tfidf_matrix, user_desc)
+        similarities = compute_similarity(vectorizer, tfidf_matrix, user_desc, user_vec)
         # Hata kontrolü
-        if len(similarities) == len(filtered_df):
-            filtered_df.loc[:, 'similarity'] = similarities
-        else:
-            filtered_df.loc[:, 'similarity'] = 0.5  # Hata durumunda varsayılan değer
+        if len(similarities) != len(positions):
+            similarities = np.full(len(positions), 0.5)  # Hata durumunda varsayılan değer
     else:
         # Ekstra bilgi yoksa, tüm sonuçlara eşit ağırlık ver
-        filtered_df.loc[:, 'similarity'] = 1.0
+        similarities = np.ones(len(positions))
+
+    return select_top(df, positions, similarities, top_n)
+
+def recommend_cars_batch(df, queries, tfidf_index=None, filter_engine=None, ann_index=None):
+    """
+    Birden çok öneri sorgusunu tek seferde çalıştırır.
+
+    Aynı filtrelere sahip sorgular filtre motorunu bir kez çalıştırır; tüm kullanıcı
+    metinleri tek geçişte vektörleştirilir ve benzerlikler adayların birleşimi üzerinde
+    tek bir seyrek matris çarpımıyla hesaplanır.
+
+    Args:
+        df: İlan deposu.
+        queries: Her biri 'user_desc', 'top_n' ve recommend_cars filtre anahtarlarını
+                 içeren sözlüklerin listesi.
+        tfidf_index: (tfidf_matrix, vectorizer); verilmezse sorgular tek tek çalıştırılır.
+        filter_engine: df üzerinde kurulmuş filters.FilterEngine (isteğe bağlı).
+        ann_index: tfidf_index ile kurulmuş ann.AnnIndex (isteğe bağlı, recommend_cars ile aynı).
+
+    Returns:
+        list: Her sorgu için recommend_cars ile aynı biçimde bir DataFrame.
+    """
+    if tfidf_index is None:
+        return [recommend_cars(df, filter_engine=filter_engine, **query) for query in queries]
 
-    # Sonuçları benzerliğe göre sırala
-    recommended = filtered_df.sort_values(by='similarity', ascending=False).head(top_n)
+    # Aynı filtre kombinasyonları için aday kümesini bir kez hesapla
+    shared = {}
+    positions_list = []
+    for query in queries:
+        filters = {key: value for key, value in query.items() if key not in ('user_desc', 'top_n')}
+        key = tuple(sorted(filters.items()))
+        if key not in shared:
+            shared[key] = candidate_positions(df, filters, filter_engine)
+        positions_list.append(shared[key])
 
-    # Çıktı için sütunları seç
-    cols = ['İlan No', 'Marka', 'Seri', 'Model', 'Fiyat', 'Kilometre', 'Yıl', 'Vites Tipi', 'Yakıt Tipi', 'link']
-    available_cols = [col for col in cols if col in recommended.columns]
+    tfidf_matrix, vectorizer = tfidf_index
+    user_inputs = [query['user_desc'] for query in queries]
+    user_vecs = None
+    if ann_index is not None and user_inputs:
+        user_vecs = vectorizer.transform(user_inputs)
+        positions_list = [
+            ann_index.shortlist(user_vecs[i], positions, query.get('top_n', 5))
+            if len(positions) and query['user_desc'].strip() else positions
+            for i, (query, positions) in enumerate(zip(queries, positions_list))
+        ]
+    similarities_list = compute_similarity_batch(
+        vectorizer, tfidf_matrix, user_inputs, positions_list, user_vecs
+    )
 
-    return recommended[available_cols]
\ No newline at end of file
+    results = []
+    for query, positions, similarities in zip(queries, positions_list, similarities_list):
+        if len(positions) == 0:
+            results.append(pd.DataFrame())
+            continue
+        if not query['user_desc'].strip():
+            similarities = np.ones(len(positions))
+        results.append(select_top(df, positions, similarities, query.get('top_n', 5)))
+    return results
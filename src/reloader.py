@@ -0,0 +1,181 @@
+# reloader.py
+import os
+import resource
+import sys
+import threading
+import time
+
+RSS_SAMPLE_INTERVAL = 0.05
+
+
+def peak_rss_mb():
+    """İşlemin başlangıcından beri en yüksek yerleşik bellek kullanımı (MB); hiç azalmaz."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux'ta KB, macOS'ta bayt döner
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+
+
+def current_rss_mb():
+    """Şu anki yerleşik bellek kullanımı (MB); /proc olmayan sistemlerde None."""
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return resident_pages * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+
+
+class RssSampler:
+    """
+    Bağlam süresince yerleşik belleği interval saniyede bir örnekler; peak_mb bu aralıktaki
+    en yüksek değerdir (ru_maxrss'in aksine önceki ani yükselmelerden etkilenmez).
+    Örnekleme yapılamayan sistemlerde peak_mb None kalır.
+    """
+
+    def __init__(self, interval=RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.peak_mb = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        rss = current_rss_mb()
+        if rss is not None and (self.peak_mb is None or rss > self.peak_mb):
+            self.peak_mb = rss
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self._sample()
+        if self.peak_mb is not None:
+            self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._sample()
+        return False
+
+
+class DataReloader:
+    """
+    Veriyi istek sunan iş parçacıklarını bloklamadan arka planda yeniden kurar.
+
+    build() yeni veri nesnesini üretir, swap(data) onu tek bir atama ile devreye alır.
+    Aynı anda yalnızca bir yeniden yükleme çalışır. watch_interval > 0 ise fingerprint()
+    değeri her aralıkta kontrol edilir ve değiştiğinde yeniden yükleme tetiklenir.
+
+    exclusive verilirse (ör. artımlı alım kilidi) parmak izi okuma, build() ve swap() bu kilit
+    altında çalışır; kilidi tutan başka bir yazıcı varsa yeniden yükleme onun bitmesini bekler.
+    Dosya izlemeyle tetiklenen yükleme, kilit alındıktan sonra değişiklik artık bilinen parmak
+    izine eşitse (ör. alım kendi yazdığını mark_current ile işaretlediyse) yapılmaz.
+    """
+
+    def __init__(self, build, swap, fingerprint=None, watch_interval=0.0, exclusive=None):
+        self._build = build
+        self._swap = swap
+        self._fingerprint = fingerprint
+        self._exclusive = exclusive
+        self.watch_interval = watch_interval
+        self._lock = threading.Lock()
+        self._running = False
+        self._stop = threading.Event()
+        self._watch_thread = None
+        self._last_fingerprint = fingerprint() if fingerprint else None
+        self.status = {
+            "state": "idle",
+            "reloads": 0,
+            "failures": 0,
+            "last_trigger": None,
+            "last_started_at": None,
+            "last_duration_seconds": None,
+            "last_error": None,
+            # Son yeniden yükleme sırasında örneklenen en yüksek bellek
+            "last_reload_peak_rss_mb": None,
+            # İşlemin başlangıcından beri en yüksek bellek (yeniden yüklemeye özgü değildir)
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+    def trigger(self, reason="admin"):
+        """Arka planda yeniden yükleme başlatır; zaten çalışıyorsa False döner."""
+        with self._lock:
+            if self._running:
+                return False
+            self._running = True
+            self.status.update(state="running", last_trigger=reason, last_started_at=time.time())
+        threading.Thread(target=self._run, args=(reason,), name="data-reload", daemon=True).start()
+        return True
+
+    def _run(self, reason):
+        if self._exclusive is not None:
+            self._exclusive.acquire()
+        try:
+            self._reload(reason)
+        finally:
+            if self._exclusive is not None:
+                self._exclusive.release()
+
+    def _reload(self, reason):
+        start = time.perf_counter()
+        fingerprint = self._fingerprint() if self._fingerprint else None
+        if reason == "file-watch" and fingerprint == self._last_fingerprint:
+            with self._lock:
+                self._running = False
+                self.status.update(state="idle")
+            return
+        sampler = RssSampler()
+        try:
+            with sampler:
+                data = self._build()
+                self._swap(data)
+        except Exception as e:
+            with self._lock:
+                self.status.update(state="failed", last_error=str(e))
+                self.status["failures"] += 1
+            print(f"Veri yeniden yüklenemedi, eski veri kullanılmaya devam ediliyor: {e}")
+        else:
+            with self._lock:
+                self._last_fingerprint = fingerprint
+                self.status.update(state="idle", last_error=None)
+                self.status["reloads"] += 1
+        finally:
+            with self._lock:
+                self._running = False
+                self.status["last_duration_seconds"] = time.perf_counter() - start
+                self.status["last_reload_peak_rss_mb"] = sampler.peak_mb
+                self.status["peak_rss_mb"] = peak_rss_mb()
+
+    def _watch(self):
+        while not self._stop.wait(self.watch_interval):
+            # Kilidi tutan yazıcının değişiklikleri zaten devreye alınıyor; sonraki turda bakılır
+            if self._exclusive is not None and self._exclusive.locked():
+                continue
+            try:
+                if self._fingerprint() != self._last_fingerprint:
+                    self.trigger(reason="file-watch")
+            except Exception as e:
+                print(f"Uyarı: Veri dosyaları izlenirken hata: {e}")
+
+    def mark_current(self):
+        """Kaynak dosyalardaki son değişiklikler zaten uygulandı; izleme yeniden yükleme tetiklemesin."""
+        if self._fingerprint:
+            with self._lock:
+                self._last_fingerprint = self._fingerprint()
+
+    def start(self):
+        """Dosya izleme açıksa izleme iş parçacığını başlatır."""
+        if self.watch_interval > 0 and self._fingerprint and self._watch_thread is None:
+            self._watch_thread = threading.Thread(target=self._watch, name="data-watch", daemon=True)
+            self._watch_thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        with self._lock:
+            return dict(self.status, running=self._running)
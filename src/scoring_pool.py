@@ -0,0 +1,86 @@
+# scoring_pool.py
+import asyncio
+import functools
+import multiprocessing
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+
+class PoolOverloaded(Exception):
+    """Havuzdaki çalışan ve bekleyen iş sayısı sınırına ulaşıldı."""
+
+
+class ScoringPool:
+    """
+    CPU yoğun öneri hesaplamalarını olay döngüsünü bloklamadan çalıştıran sınırlı havuz.
+
+    mode='thread' iş parçacığı, mode='process' süreç havuzu kullanır. Süreç havuzu
+    'fork' ile başlatılır; veriler yüklendikten sonra oluşturulduğunda çalışanlar ilan
+    deposunu ve indeksleri copy-on-write olarak paylaşır, her çağrıda yalnızca küçük
+    sorgu argümanları ve sonuçlar aktarılır.
+
+    Çalışan + kuyruktaki iş sayısı max_workers + max_queue değerini aşarsa yeni işler
+    PoolOverloaded ile reddedilir; timeout saniyesini aşan işler asyncio.TimeoutError verir.
+    """
+
+    def __init__(self, mode='thread', max_workers=4, max_queue=32, timeout=10.0):
+        self.mode = mode
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        if mode == 'process':
+            self._executor = ProcessPoolExecutor(
+                max_workers=max_workers, mp_context=multiprocessing.get_context('fork')
+            )
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='scoring')
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.completed = 0
+
+    def _release(self, _future):
+        # Zaman aşımında bile iş gerçekten bitene kadar kapasite tutulur
+        with self._lock:
+            self._pending -= 1
+            self.completed += 1
+
+    async def run(self, func, *args, **kwargs):
+        """func(*args, **kwargs) çağrısını havuzda çalıştırır ve sonucunu bekler."""
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise PoolOverloaded()
+            self._pending += 1
+        try:
+            future = self._executor.submit(functools.partial(func, *args, **kwargs))
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            raise
+        future.add_done_callback(self._release)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            # Henüz başlamadıysa kuyruktan çıkar; çalışıyorsa arka planda tamamlanır
+            future.cancel()
+            with self._lock:
+                self.timed_out += 1
+            raise
+
+    def stats(self):
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "timeout": self.timeout,
+                "pending": self._pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+            }
+
+    def shutdown(self, wait=True, cancel_futures=True):
+        self._executor.shutdown(wait=wait, cancel_futures=cancel_futures)
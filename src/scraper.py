@@ -1,30 +1,43 @@
 import requests
-from bs4 import BeautifulSoup
 import pandas as pd
+import asyncio
+import sys
 import time
 import os
-import random
 import logging
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import re
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
+import httpx
+from crawler import AsyncFetcher
+from checkpoint import CrawlCheckpoint
+from parsers import get_backend
 
 # Loglama ayarları
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# httpx her isteği INFO seviyesinde loglar; ilan logları bunlar arasında kaybolmasın
+logging.getLogger("httpx").setLevel(logging.WARNING)
 
 BASE_URL = "https://www.arabam.com/ikinci-el/otomobil?sort=price.asc&take=50&page={page}"
 FILTER_URL = "https://www.arabam.com/ikinci-el?sort=price.asc&take=50"
+ORIGIN = "https://www.arabam.com"
+
+# Asenkron tarayıcı ayarları: host başına saniyedeki istek sayısı ve anlık patlama payı
+CRAWL_RATE = float(os.getenv("CRAWL_RATE", "5"))
+CRAWL_BURST = int(os.getenv("CRAWL_BURST", "10"))
+# Fiyat penceresi URL'si: 'url' doğrudan minPrice parametresiyle kurar, başarısız olursa
+# Selenium'a düşer; 'selenium' her pencerede filtre formunu tarayıcıyla doldurur
+CRAWL_WINDOW_MODE = os.getenv("CRAWL_WINDOW_MODE", "url")
+CRAWL_CHECKPOINT_PATH = os.getenv("CRAWL_CHECKPOINT_PATH", "data/deneme/crawl_checkpoint.db")
 
 def setup_selenium_driver():
     """Selenium WebDriver'ı başlatır."""
+    # Selenium yalnızca filtre URL'si çözülürken gerekir; tarama motoru onsuz da içe aktarılabilir
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.chrome.options import Options
+    from webdriver_manager.chrome import ChromeDriverManager
+
     options = Options()
     options.add_argument("--headless=True")  # Hız için headless mode
     options.add_argument("--disable-gpu")
@@ -53,6 +66,75 @@ def setup_session():
     session.mount("https://", adapter)
     return session
 
+def parse_detail_page(html, url, current_page=None, current_index=0, backend=None):
+    """
+    Detay sayfası HTML'inden ilan özelliklerini, fiyatı ve açıklamayı çıkarır. backend
+    verilmezse PARSER_BACKEND ile seçilen ayrıştırıcı kullanılır; 'bs4' referans uygulamadır.
+    """
+    backend = backend or get_backend()
+    detail_soup = backend.document(html)
+
+    data = {}
+    try:
+        ilan_no_text_url = url.split("/")[-1].split("?")[0].strip()
+        ilan_no_match_url = re.match(r'^(\d+)', ilan_no_text_url)
+        ilan_no_from_url = ilan_no_match_url.group(1) if ilan_no_match_url else None
+    except Exception as e:
+        logging.warning(f"[{current_page}. Sayfa] - {current_index + 1}. ilan: URL'den İlan No çıkarılamadı: {e}")
+        ilan_no_from_url = None
+
+    try:
+        props_container = backend.select_one(detail_soup, ".product-properties-details.linear-gradient")
+        if props_container is not None:
+            keys = backend.select(props_container, ".property-key")
+            values = backend.select(props_container, ".property-value")
+            if len(keys) != len(values):
+                logging.warning(f"[{current_page}. Sayfa] - {current_index + 1}. ilan: Anahtar ve değer sayıları uyuşmuyor.")
+            for k, v in zip(keys, values):
+                key = backend.text(k).strip()
+                value = backend.text(v).strip()
+                if value:
+                    value = re.sub(r'\s+', ' ', value).strip()
+                if key == "İlan No":
+                    ilan_no_match_html = re.match(r'^(\d+)', value)
+                    data[key] = ilan_no_match_html.group(1) if ilan_no_match_html else pd.NA
+                else:
+                    data[key] = value if value else pd.NA
+        else:
+            logging.warning(f"[{current_page}. Sayfa] - {current_index + 1}. ilan: Özellik konteyneri bulunamadı.")
+        if "İlan No" not in data or data["İlan No"] is pd.NA and ilan_no_from_url:
+            data["İlan No"] = ilan_no_from_url
+    except Exception as e:
+        logging.error(f"[{current_page}. Sayfa] - {current_index + 1}. ilan: Özellikler çıkarılırken hata: {e}")
+        data["İlan No"] = ilan_no_from_url if ilan_no_from_url else pd.NA
+
+    try:
+        price_elem = backend.select_one(detail_soup, ".classified-detail-price, .price, .banner-price, .desktop-information-price")
+        if price_elem is not None:
+            price_text = backend.text(price_elem).strip()
+            price_text = re.sub(r'[^\d]', '', price_text)
+            data["Fiyat"] = price_text if price_text else pd.NA
+        else:
+            data["Fiyat"] = pd.NA
+    except Exception as e:
+        logging.warning(f"[{current_page}. Sayfa] - {current_index + 1}. ilan: Fiyat çıkarılamadı: {e}")
+        data["Fiyat"] = pd.NA
+
+    try:
+        description = backend.select_one(detail_soup, ".tab-content-wrapper.tab-description")
+        if description is not None:
+            description_text = backend.text(description).strip()
+            description_text = re.sub(r'\s+', ' ', description_text).strip()
+            data["Açıklama"] = description_text if description_text else pd.NA
+        else:
+            description_alt = backend.select_one(detail_soup, ".classified-description, .description")
+            data["Açıklama"] = re.sub(r'\s+', ' ', backend.text(description_alt).strip()).strip() if description_alt is not None else pd.NA
+    except Exception as e:
+        logging.warning(f"[{current_page}. Sayfa] - {current_index + 1}. ilan: Açıklama çıkarılamadı: {e}")
+        data["Açıklama"] = pd.NA
+
+    return data
+
 def fetch_detail_page(session, url, current_page, current_index, processed_urls):
     """Detay sayfasını çeker ve verileri ayrıştırır."""
     if url in processed_urls:
@@ -63,68 +145,7 @@ def fetch_detail_page(session, url, current_page, current_index, processed_urls)
     try:
         response = session.get(url, timeout=15)
         response.raise_for_status()
-        detail_soup = BeautifulSoup(response.text, 'html.parser')
-
-        data = {}
-        try:
-            ilan_no_text_url = url.split("/")[-1].split("?")[0].strip()
-            ilan_no_match_url = re.match(r'^(\d+)', ilan_no_text_url)
-            ilan_no_from_url = ilan_no_match_url.group(1) if ilan_no_match_url else None
-        except Exception as e:
-            logging.warning(f"[{current_page}. Sayfa] - {current_index + 1}. ilan: URL'den İlan No çıkarılamadı: {e}")
-            ilan_no_from_url = None
-
-        try:
-            props_container = detail_soup.select_one(".product-properties-details.linear-gradient")
-            if props_container:
-                keys = props_container.select(".property-key")
-                values = props_container.select(".property-value")
-                if len(keys) != len(values):
-                    logging.warning(f"[{current_page}. Sayfa] - {current_index + 1}. ilan: Anahtar ve değer sayıları uyuşmuyor.")
-                for k, v in zip(keys, values):
-                    key = k.text.strip()
-                    value = v.text.strip()
-                    if value:
-                        value = re.sub(r'\s+', ' ', value).strip()
-                    if key == "İlan No":
-                        ilan_no_match_html = re.match(r'^(\d+)', value)
-                        data[key] = ilan_no_match_html.group(1) if ilan_no_match_html else pd.NA
-                    else:
-                        data[key] = value if value else pd.NA
-            else:
-                logging.warning(f"[{current_page}. Sayfa] - {current_index + 1}. ilan: Özellik konteyneri bulunamadı.")
-            if "İlan No" not in data or data["İlan No"] is pd.NA and ilan_no_from_url:
-                data["İlan No"] = ilan_no_from_url
-        except Exception as e:
-            logging.error(f"[{current_page}. Sayfa] - {current_index + 1}. ilan: Özellikler çıkarılırken hata: {e}")
-            data["İlan No"] = ilan_no_from_url if ilan_no_from_url else pd.NA
-
-        try:
-            price_elem = detail_soup.select_one(".classified-detail-price, .price, .banner-price, .desktop-information-price")
-            if price_elem:
-                price_text = price_elem.text.strip()
-                price_text = re.sub(r'[^\d]', '', price_text)
-                data["Fiyat"] = price_text if price_text else pd.NA
-            else:
-                data["Fiyat"] = pd.NA
-        except Exception as e:
-            logging.warning(f"[{current_page}. Sayfa] - {current_index + 1}. ilan: Fiyat çıkarılamadı: {e}")
-            data["Fiyat"] = pd.NA
-
-        try:
-            description = detail_soup.select_one(".tab-content-wrapper.tab-description")
-            if description:
-                description_text = description.text.strip()
-                description_text = re.sub(r'\s+', ' ', description_text).strip()
-                data["Açıklama"] = description_text if description_text else pd.NA
-            else:
-                description_alt = detail_soup.select_one(".classified-description, .description")
-                data["Açıklama"] = re.sub(r'\s+', ' ', description_alt.text.strip()).strip() if description_alt else pd.NA
-        except Exception as e:
-            logging.warning(f"[{current_page}. Sayfa] - {current_index + 1}. ilan: Açıklama çıkarılamadı: {e}")
-            data["Açıklama"] = pd.NA
-
-        return data
+        return parse_detail_page(response.text, url, current_page, current_index)
     except requests.exceptions.RequestException as e:
         logging.error(f"[{current_page}. Sayfa] - {current_index + 1}. ilan: Detay sayfası çekilemedi: {e}")
         return None
@@ -132,6 +153,20 @@ def fetch_detail_page(session, url, current_page, current_index, processed_urls)
         logging.error(f"[{current_page}. Sayfa] - {current_index + 1}. ilan: İlan işlenirken genel hata: {e}")
         return None
 
+def parse_listing_urls(html, origin=ORIGIN, backend=None):
+    """Liste sayfasındaki ilan detay linklerini döndürür."""
+    backend = backend or get_backend()
+    soup = backend.document(html)
+    urls = []
+    for listing in backend.select(soup, ".listing-list-item"):
+        link_elem = backend.select_one(listing, "a")
+        if link_elem is not None and backend.attr(link_elem, "href") is not None:
+            link = backend.attr(link_elem, "href")
+            if not link.startswith("http"):
+                link = origin + link
+            urls.append(link)
+    return urls
+
 def save_intermediate_data(data, page, file_path="data/deneme/cars_scraped_intermediate.csv"):
     """Ara verileri diske kaydeder."""
     if data:
@@ -145,169 +180,333 @@ def save_intermediate_data(data, page, file_path="data/deneme/cars_scraped_inter
             df.to_csv(file_path, index=False, encoding="utf-8-sig", mode=mode, header=not os.path.exists(file_path))
             logging.info(f"[{page}. Sayfa]: Ara veriler '{file_path}' dosyasına kaydedildi. Toplam {len(df)} ilan.")
 
-def scrape_listings_with_filter(max_pages=50, max_workers=10):
-    os.makedirs("data/deneme", exist_ok=True)
-    all_data = []
-    processed_urls = set()  # Aynı URL'lerin tekrar işlenmesini önlemek için
-    min_price = 10000  # İlk minimum fiyat 100 TL
-    total_count = 0
+def resolve_window_url(driver, min_price):
+    """
+    Selenium ile filtre formunu doldurup min_price penceresinin liste URL'sini döndürür.
+    Form doldurulamazsa None döner.
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
 
-    session = setup_session()
-    driver = setup_selenium_driver()
+    driver.get(FILTER_URL)
+    WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.CSS_SELECTOR, "input[placeholder='Min TL']")))
+
+    # Çerez popup kapatma
     try:
-        while True:
-            logging.info(f"Minimum fiyat {min_price} TL ile ilanlar çekiliyor...")
-            driver.get(FILTER_URL)
-            WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.CSS_SELECTOR, "input[placeholder='Min TL']")))
+        logging.info("Çerez popup kontrol ediliyor...")
+        cookie_button = WebDriverWait(driver, 5).until(
+            EC.element_to_be_clickable((By.XPATH, '//button[contains(text(), "Kabul Et")]'))
+        )
+        driver.execute_script("arguments[0].click();", cookie_button)
+        logging.info("Çerez popup kapatıldı.")
+        time.sleep(0.5)  # Bekleme süresi azaltıldı
+    except:
+        logging.info("Çerez popup bulunamadı veya zaten kapalı.")
 
-            # Çerez popup kapatma
-            try:
-                logging.info("Çerez popup kontrol ediliyor...")
-                cookie_button = WebDriverWait(driver, 5).until(
-                    EC.element_to_be_clickable((By.XPATH, '//button[contains(text(), "Kabul Et")]'))
-                )
-                driver.execute_script("arguments[0].click();", cookie_button)
-                logging.info("Çerez popup kapatıldı.")
-                time.sleep(0.5)  # Bekleme süresi azaltıldı
-            except:
-                logging.info("Çerez popup bulunamadı veya zaten kapalı.")
+    # Filtre formunu aç
+    try:
+        logging.info("Filtre formu açılıyor...")
+        facet_button = WebDriverWait(driver, 5).until(
+            EC.presence_of_element_located((By.CLASS_NAME, "facet-button.closed"))
+        )
+        driver.execute_script("arguments[0].click();", facet_button)
+        logging.info("Filtre formu açıldı.")
+        time.sleep(0.5)  # Bekleme süresi azaltıldı
+    except Exception as e:
+        logging.error(f"Filtre formu açılamadı: {e}")
+
+    # Minimum fiyatı gir
+    try:
+        logging.info(f"Min TL alanına {min_price} yazılıyor...")
+        min_price_input = WebDriverWait(driver, 10).until(
+            EC.element_to_be_clickable((By.CSS_SELECTOR, "input[placeholder='Min TL'][maxlength='9']"))
+        )
+        driver.execute_script("arguments[0].scrollIntoView(true);", min_price_input)
+        min_price_input.clear()
+        min_price_input.send_keys(str(min_price))
+        logging.info(f"Minimum fiyat olarak {min_price} TL girildi.")
+        time.sleep(0.5)  # Bekleme süresi azaltıldı
+    except Exception as e:
+        logging.error(f"Min TL alanına yazılırken hata: {e}")
+        return None
+
+    # Arama butonuna tıkla
+    try:
+        logging.info("Arama butonuna tıklanıyor...")
+        search_button = WebDriverWait(driver, 10).until(
+            EC.element_to_be_clickable((By.CSS_SELECTOR, "button.btn.btn-search"))
+        )
+        driver.execute_script("arguments[0].click();", search_button)
+        WebDriverWait(driver, 10).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, ".listing-list-item"))
+        )
+        logging.info("Arama yapıldı, sonuçlar yüklendi.")
+    except Exception as e:
+        logging.error(f"Arama butonuna tıklanırken hata: {e}")
+        return None
+    return driver.current_url
+
+async def crawl_window(fetcher, window_url, max_pages, max_workers, processed_urls, total_count=0,
+                       origin=ORIGIN, on_page=save_intermediate_data, start_page=1):
+    """
+    Bir fiyat penceresinin liste sayfalarını ve detay sayfalarını boru hattı şeklinde çeker.
 
-            # Filtre formunu aç
+    Liste sayfaları sırayla çekilip detay linkleri sınırlı bir kuyruğa eklenir; max_workers
+    adet detay işçisi kuyruğu paralel tüketir. Böylece bir sayfanın detayları çekilirken
+    sonraki liste sayfası da çekilir. Bir sayfanın tüm detayları bitince satırları
+    on_page(rows, page) ile kaydedilir. İstek hızı fetcher'ın host başına sınırıyla belirlenir.
+    Kontrol noktasından devam ederken start_page ile yarım kalan sayfadan başlanır.
+    on_page hata verirse (ör. CSV veya kontrol noktası yazılamazsa) işçiler kalan kuyruğu
+    işlemeden boşaltır, yeni iş eklenmez ve ilk hata yeniden fırlatılır; tarama asılı kalmaz.
+
+    Returns:
+        (rows, exhausted, total_count): Pencerede toplanan satırlar, ilanların max_pages'ten
+        önce bitip bitmediği ve güncel ilan sayacı.
+    """
+    queue = asyncio.Queue(maxsize=max_workers * 2)
+    pages = {}  # sayfa -> [bekleyen detay sayısı, satırlar]
+    rows = []
+    failures = []  # on_page hataları; ilki taramayı durdurur
+
+    def finish_detail(page, data):
+        state = pages[page]
+        if data:
+            state[1].append(data)
+        state[0] -= 1
+        if state[0] == 0:
+            on_page(state[1], page)
+            rows.extend(state[1])
+            del pages[page]
+
+    async def detail_worker():
+        while True:
+            item = await queue.get()
+            if item is None:
+                queue.task_done()
+                return
+            if failures:
+                # Tarama duruyor; üreticinin put'u bloklanmasın diye kalan işler atlanır
+                queue.task_done()
+                continue
+            url, page, idx = item
+            data = None
             try:
-                logging.info("Filtre formu açılıyor...")
-                facet_button = WebDriverWait(driver, 5).until(
-                    EC.presence_of_element_located((By.CLASS_NAME, "facet-button.closed"))
-                )
-                driver.execute_script("arguments[0].click();", facet_button)
-                logging.info("Filtre formu açıldı.")
-                time.sleep(0.5)  # Bekleme süresi azaltıldı
+                html = await fetcher.get(url)
+                data = parse_detail_page(html, url, page, idx)
+            except httpx.HTTPError as e:
+                logging.error(f"[{page}. Sayfa] - {idx + 1}. ilan: Detay sayfası çekilemedi: {e}")
             except Exception as e:
-                logging.error(f"Filtre formu açılamadı: {e}")
-
-            # Minimum fiyatı gir
+                logging.error(f"[{page}. Sayfa] - {idx + 1}. ilan: İlan işlenirken genel hata: {e}")
             try:
-                logging.info(f"Min TL alanına {min_price} yazılıyor...")
-                min_price_input = WebDriverWait(driver, 10).until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, "input[placeholder='Min TL'][maxlength='9']"))
-                )
-                driver.execute_script("arguments[0].scrollIntoView(true);", min_price_input)
-                min_price_input.clear()
-                min_price_input.send_keys(str(min_price))
-                logging.info(f"Minimum fiyat olarak {min_price} TL girildi.")
-                time.sleep(0.5)  # Bekleme süresi azaltıldı
+                finish_detail(page, data)
             except Exception as e:
-                logging.error(f"Min TL alanına yazılırken hata: {e}")
-                break
+                logging.error(f"[{page}. Sayfa]: Sayfa kaydedilemedi, tarama durduruluyor: {e}")
+                failures.append(e)
+            queue.task_done()
 
-            # Arama butonuna tıkla
+    workers = [asyncio.create_task(detail_worker()) for _ in range(max_workers)]
+    exhausted = False
+    try:
+        for page in range(start_page, max_pages + 1):
+            logging.info(f"[{page}. Sayfa] Ana liste sayfası çekiliyor...")
             try:
-                logging.info("Arama butonuna tıklanıyor...")
-                search_button = WebDriverWait(driver, 10).until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, "button.btn.btn-search"))
-                )
-                driver.execute_script("arguments[0].click();", search_button)
-                WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, ".listing-list-item"))
-                )
-                logging.info("Arama yapıldı, sonuçlar yüklendi.")
-                time.sleep(1)  # Bekleme süresi azaltıldı
-            except Exception as e:
-                logging.error(f"Arama butonuna tıklanırken hata: {e}")
+                html = await fetcher.get(f"{window_url}&page={page}")
+            except httpx.HTTPError as e:
+                logging.error(f"[{page}. Sayfa]: Ana liste sayfası çekilemedi: {e}")
+                exhausted = True
+                break
+
+            listing_urls = parse_listing_urls(html, origin)
+            if not listing_urls:
+                logging.info(f"[{page}. Sayfa]: İlan bulunamadı, döngüden çıkılıyor.")
+                exhausted = True
                 break
+            logging.info(f"[{page}. Sayfa]: {len(listing_urls)} adet ilan linki bulundu. Toplamda {total_count + len(listing_urls)} ilan...")
+
+            new_urls = []
+            for url in listing_urls:
+                if url in processed_urls:
+                    logging.info(f"[{page}. Sayfa] - {total_count + 1}. ilan zaten işlendi: {url}")
+                else:
+                    processed_urls.add(url)
+                    new_urls.append((url, total_count))
+                total_count += 1
+            if not new_urls:
+                # Tüm ilanları daha önce işlenmiş sayfa da tamamlandı olarak kaydedilir; aksi halde
+                # kontrol noktasının ardışık sayfa imleci bu sayfada takılı kalır
+                on_page([], page)
+                continue
+            pages[page] = [len(new_urls), []]
+            for url, idx in new_urls:
+                if failures:
+                    raise failures[0]
+                await queue.put((url, page, idx))
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+        if failures:
+            raise failures[0]
+    finally:
+        for worker in workers:
+            worker.cancel()
+    return rows, exhausted, total_count
+
+def build_window_url(min_price, filter_url=FILTER_URL):
+    """Filtre formunun ürettiği liste URL'sini min_price parametresinden doğrudan kurar."""
+    return f"{filter_url}&minPrice={int(min_price)}"
+
+def window_is_filtered(rows, min_price):
+    """Penceredeki ilanların fiyatları min_price'tan küçük değilse filtre uygulanmış sayılır."""
+    prices = pd.to_numeric(pd.Series([row.get("Fiyat") for row in rows], dtype=object), errors="coerce")
+    return not (prices < min_price).any()
 
-            page = 1
-            page_data = []
-            while page <= max_pages:
-                url = f"{driver.current_url}&page={page}"
-                logging.info(f"[{page}. Sayfa] Ana liste sayfası çekiliyor (Min fiyat: {min_price} TL)...")
+class WindowResolver:
+    """
+    Fiyat penceresi liste URL'lerini üretir. 'url' modunda URL doğrudan kurulur; bu mod
+    başarısız olursa (filtre uygulanmamış veya ilk pencere boş) kalan tarama için Selenium
+    moduna geçilir. Tarayıcı yalnızca gerektiğinde başlatılır.
+    """
+
+    def __init__(self, mode=CRAWL_WINDOW_MODE, filter_url=FILTER_URL):
+        self.mode = mode
+        self.filter_url = filter_url
+        self._driver = None
+        self.stats = {"url": 0, "selenium": 0, "fallbacks": 0}
+
+    async def resolve(self, min_price):
+        """min_price penceresinin liste URL'sini döndürür; çözülemezse None."""
+        if self.mode == "url":
+            self.stats["url"] += 1
+            return build_window_url(min_price, self.filter_url)
+        if self._driver is None:
+            self._driver = await asyncio.to_thread(setup_selenium_driver)
+        self.stats["selenium"] += 1
+        return await asyncio.to_thread(resolve_window_url, self._driver, min_price)
+
+    def fall_back(self, reason):
+        """URL modundan kalıcı olarak Selenium moduna geçer; zaten Selenium modundaysa False."""
+        if self.mode != "url":
+            return False
+        logging.warning(f"URL ile pencere oluşturma başarısız ({reason}), Selenium'a geçiliyor.")
+        self.mode = "selenium"
+        self.stats["fallbacks"] += 1
+        return True
+
+    def close(self):
+        if self._driver is not None:
+            self._driver.quit()
+            self._driver = None
+
+async def scrape_listings_async(max_pages=50, max_workers=10, rate=CRAWL_RATE, burst=CRAWL_BURST,
+                                window_mode=CRAWL_WINDOW_MODE, filter_url=FILTER_URL, origin=ORIGIN,
+                                checkpoint_path=CRAWL_CHECKPOINT_PATH, resume=True):
+    # Görülmüş ilanlar, satırlar, pencere ve sayfa imleci diskte tutulur; çökme sonrası
+    # resume=True ile kalınan pencere ve sayfadan devam edilir
+    checkpoint = CrawlCheckpoint(checkpoint_path)
+    if resume and checkpoint.resumable:
+        state = checkpoint.state
+        min_price, start_page, total_count = state["min_price"], state["page"] + 1, state["total_count"]
+        logging.info(f"Kontrol noktasından devam ediliyor: minimum fiyat {min_price} TL, {start_page}. sayfa, "
+                     f"{state['rows']} ilan kayıtlı.")
+        if start_page > max_pages and state["max_price"] is not None:
+            # Pencere tamamlanmış ama sonraki pencereye geçilmeden durulmuş
+            min_price, start_page = state["max_price"] + 1, 1
+    else:
+        checkpoint.reset()
+        min_price = 10000  # İlk minimum fiyat 100 TL
+        start_page = 1
+        total_count = 0
+
+    def on_page(rows, page):
+        save_intermediate_data(rows, page)
+        checkpoint.commit_page(rows, page)
+
+    resolver = WindowResolver(window_mode, filter_url)
+    crawl_start = time.perf_counter()
+    windows = 0
+    completed = False  # Pencere URL'si çözülemeyip durulursa tarama devam ettirilebilir kalır
+    try:
+        async with AsyncFetcher(rate=rate, burst=burst, max_connections=max_workers) as fetcher:
+            while True:
+                logging.info(f"Minimum fiyat {min_price} TL ile ilanlar çekiliyor...")
                 try:
-                    response = session.get(url, timeout=15)
-                    response.raise_for_status()
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                except requests.exceptions.RequestException as e:
-                    logging.error(f"[{page}. Sayfa]: Ana liste sayfası çekilemedi: {e}")
-                    save_intermediate_data(page_data, page)
+                    window_url = await resolver.resolve(min_price)
+                except Exception as e:
+                    logging.error(f"Fiyat penceresi URL'si oluşturulamadı: {e}")
                     break
-
-                listing_urls = []
-                listing_elements = soup.select(".listing-list-item")
-                if not listing_elements:
-                    logging.info(f"[{page}. Sayfa]: İlan bulunamadı, döngüden çıkılıyor.")
-                    save_intermediate_data(page_data, page)
+                if window_url is None:
                     break
 
-                for listing in listing_elements:
-                    link_elem = listing.select_one("a")
-                    if link_elem and "href" in link_elem.attrs:
-                        link = link_elem["href"]
-                        if not link.startswith("http"):
-                            link = "https://www.arabam.com" + link
-                        listing_urls.append((link, page, total_count))
-                        total_count += 1
-
-                logging.info(f"[{page}. Sayfa]: {len(listing_urls)} adet ilan linki bulundu. Toplamda {total_count} ilan...")
-
-                # Paralel olarak detay sayfalarını çek
-                with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                    future_to_url = {executor.submit(fetch_detail_page, session, url, page, idx, processed_urls): url for url, page, idx in listing_urls}
-                    for future in as_completed(future_to_url):
-                        data = future.result()
-                        if data:
-                            page_data.append(data)
-
-                # Her sayfa sonunda ara kaydetme
-                save_intermediate_data(page_data, page)
-                all_data.extend(page_data)
-                page_data = []  # Hafızayı temizle
-
-                # Sonraki sayfaya geçmeden önce bekle
-                time.sleep(random.uniform(1, 3))  # Bekleme süresi optimize edildi
-                page += 1
-
-            # Bu döngüde toplanan verilerden en yüksek fiyatı bul
-            if all_data:
-                df_temp = pd.DataFrame(all_data)
-                if "Fiyat" in df_temp.columns:
-                    df_temp["Fiyat"] = pd.to_numeric(df_temp["Fiyat"], errors="coerce")
-                    max_price = df_temp["Fiyat"].max()
-                    if pd.isna(max_price):
-                        logging.warning("Fiyatlar arasında geçerli bir maksimum bulunamadı, döngüden çıkılıyor.")
-                        break
-                    min_price = int(max_price) + 1  # Yeni minimum fiyat
-                    logging.info(f"Yeni minimum fiyat: {min_price} TL")
-                else:
-                    logging.warning("Fiyat sütunu bulunamadı, döngüden çıkılıyor.")
+                window_start = time.perf_counter()
+                if start_page == 1:
+                    checkpoint.start_window(min_price, total_count)
+                rows, exhausted, total_count = await crawl_window(
+                    fetcher, window_url, max_pages, max_workers, checkpoint.seen, total_count, origin,
+                    on_page, start_page
+                )
+                start_page = 1
+                max_price = checkpoint.state["max_price"]
+                # Pencerede min_price'a ulaşan yeni ilan yoksa minimum fiyat ilerlemez
+                progressed = max_price is not None and max_price >= min_price
+                if resolver.mode == "url":
+                    # Çekilen ilanlar kaydedildiğinden aynı pencere Selenium ile yeniden
+                    # çekilirken görülmüş ilan kümesi sayesinde atlanır
+                    if not window_is_filtered(rows, min_price) and resolver.fall_back("fiyat filtresi uygulanmadı"):
+                        continue
+                    if checkpoint.state["rows"] == 0 and resolver.fall_back("ilk pencere boş"):
+                        continue
+                    if not progressed and not exhausted and resolver.fall_back("pencere yeni ilan getirmedi"):
+                        continue
+                windows += 1
+                elapsed = time.perf_counter() - window_start
+                logging.info(f"Pencere tamamlandı: {len(rows)} ilan, {elapsed:.1f} sn "
+                             f"({len(rows) / elapsed if elapsed else 0:.1f} ilan/sn, istek: {fetcher.stats}).")
+
+                # Tüm veriler bittiyse çık
+                completed = True
+                if exhausted:
+                    logging.info("Tüm ilanlar çekildi, döngü tamamlandı.")
                     break
-            else:
-                logging.info("Hiç veri çekilemedi, döngüden çıkılıyor.")
-                break
+                if checkpoint.state["rows"] == 0:
+                    logging.info("Hiç veri çekilemedi, döngüden çıkılıyor.")
+                    break
+                if max_price is None:
+                    logging.warning("Fiyatlar arasında geçerli bir maksimum bulunamadı, döngüden çıkılıyor.")
+                    break
+                if not progressed:
+                    logging.warning("Pencere yeni ilan getirmedi, döngüden çıkılıyor.")
+                    break
+                min_price = max_price + 1  # Yeni minimum fiyat
+                completed = False
+                logging.info(f"Yeni minimum fiyat: {min_price} TL")
 
-            # Tüm veriler bittiyse çık
-            if not listing_urls:
-                logging.info("Tüm ilanlar çekildi, döngü tamamlandı.")
-                break
+        total_elapsed = time.perf_counter() - crawl_start
+        logging.info(f"{windows} pencere {total_elapsed:.1f} sn'de tarandı "
+                     f"({windows / total_elapsed * 60 if total_elapsed else 0:.1f} pencere/dk, çözümleme: {resolver.stats}).")
 
-        # Final verileri kaydet
-        if all_data:
-            df = pd.DataFrame(all_data)
-            if not df.empty and not df.columns.empty:
-                preferred_columns = ["İlan No", "Fiyat", "İlan Tarihi", "Marka", "Seri", "Model", "Yıl", "Kilometre", "Açıklama"]
-                other_columns = [col for col in df.columns if col not in preferred_columns]
-                final_columns = preferred_columns + other_columns
-                df = df.reindex(columns=[col for col in final_columns if col in df])
-                file_path = "data/deneme/cars_scraped_final.csv"
-                df.to_csv(file_path, index=False, encoding="utf-8-sig")
-                logging.info(f"Toplam {len(df)} ilan çekildi ve '{file_path}' dosyasına kaydedildi. Bulunan özellikler: {list(df.columns)}")
-            else:
-                logging.warning("Hiç veri çekilemedi. Final CSV dosyası oluşturulmadı.")
+        # Final verileri kontrol noktasından parça parça kaydet
+        file_path = "data/deneme/cars_scraped_final.csv"
+        written = checkpoint.export_csv(file_path)
+        if completed:
+            checkpoint.finish()
+        if written:
+            logging.info(f"Toplam {written} ilan çekildi ve '{file_path}' dosyasına kaydedildi. "
+                         f"Bulunan özellikler: {checkpoint.state['columns']}")
         else:
             logging.warning("Hiç veri çekilemedi. Final CSV dosyası oluşturulmadı.")
 
     except Exception as e:
-        logging.error(f"Genel hata oluştu: {e}")
-        save_intermediate_data(all_data, "final")
+        logging.error(f"Genel hata oluştu, tarama kontrol noktasından devam ettirilebilir: {e}")
     finally:
-        driver.quit()
+        resolver.close()
+        checkpoint.close()
+
+def scrape_listings_with_filter(max_pages=50, max_workers=10, rate=CRAWL_RATE, burst=CRAWL_BURST,
+                                window_mode=CRAWL_WINDOW_MODE, resume=True):
+    os.makedirs("data/deneme", exist_ok=True)
+    asyncio.run(scrape_listings_async(max_pages, max_workers, rate, burst, window_mode, resume=resume))
 
 if __name__ == "__main__":
-    scrape_listings_with_filter(max_pages=50, max_workers=10)
\ No newline at end of file
+    # --fresh: kontrol noktasını yok sayıp taramaya baştan başla
+    scrape_listings_with_filter(max_pages=50, max_workers=10, resume="--fresh" not in sys.argv)
\ No newline at end of file
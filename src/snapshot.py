@@ -0,0 +1,70 @@
+# snapshot.py
+import os
+import time
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+except ImportError:  # pyarrow yoksa anlık görüntüler devre dışı kalır
+    pa = None
+    ipc = None
+
+# Ön işleme mantığı değiştiğinde eski anlık görüntülerin geçersiz sayılması için artırılır
+SNAPSHOT_VERSION = "1"
+
+def snapshots_available():
+    return pa is not None
+
+def write_snapshot(df, path, fingerprint):
+    """
+    Ön işlenmiş DataFrame'i, kaynak dosyanın parmak izi ile birlikte tipli bir
+    Arrow IPC dosyasına yazar. Yazma geçici dosyaya yapılıp atomik olarak taşınır.
+    """
+    if pa is None:
+        return False
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[b'snapshot_fingerprint'] = fingerprint.encode()
+    metadata[b'snapshot_version'] = SNAPSHOT_VERSION.encode()
+    table = table.replace_schema_metadata(metadata)
+
+    tmp_path = f"{path}.tmp"
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+    return True
+
+def read_snapshot(path, fingerprint):
+    """
+    Anlık görüntüyü tek bir bellek eşlemeli okuma ile yükler.
+
+    Returns:
+        pd.DataFrame veya None: Dosya yoksa, okunamıyorsa ya da parmak izi/sürüm
+        güncel kaynakla uyuşmuyorsa None.
+    """
+    if pa is None or not os.path.exists(path):
+        return None
+    try:
+        start = time.perf_counter()
+        with pa.memory_map(path, 'r') as source:
+            reader = ipc.open_file(source)
+            metadata = reader.schema.metadata or {}
+            if (metadata.get(b'snapshot_fingerprint') != fingerprint.encode()
+                    or metadata.get(b'snapshot_version') != SNAPSHOT_VERSION.encode()):
+                return None
+            df = reader.read_all().to_pandas()
+        print(f"Anlık görüntü '{path}' {time.perf_counter() - start:.2f} sn'de yüklendi ({len(df)} satır).")
+        return df
+    except Exception as e:
+        print(f"Uyarı: Anlık görüntü '{path}' okunamadı ({e}), ön işleme yeniden yapılacak.")
+        return None
+
+if __name__ == "__main__":
+    # Derleme adımı: tüm kaynaklar için güncel anlık görüntüleri üret (src dizininden çalıştırın)
+    from app import DATA_SOURCES, load_source_frame
+
+    if not snapshots_available():
+        raise SystemExit("pyarrow kurulu değil; anlık görüntü oluşturulamaz.")
+    for source in DATA_SOURCES:
+        load_source_frame(*source)
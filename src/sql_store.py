@@ -0,0 +1,206 @@
+# sql_store.py
+import os
+import threading
+
+import pandas as pd
+import sqlalchemy as sa
+
+from filters import CATEGORICAL_FILTERS, RANGE_FILTERS, CategoricalIndex
+from ingest import INDEXED_COLUMNS
+from preprocessing import PRICE_DIVISORS, build_listings_store, load_and_preprocess_from_db
+from metrics import stage
+from recommendation import recommend_cars
+
+# Veritabanı başına bağlantı havuzu boyutu; 0 ise çekirdek sayısı (öneri havuzu ile aynı varsayılan)
+SQL_POOL_SIZE = int(os.getenv("SQL_POOL_SIZE", "0")) or (os.cpu_count() or 1)
+SQL_POOL_OVERFLOW = int(os.getenv("SQL_POOL_OVERFLOW", "2"))
+SQL_POOL_TIMEOUT = float(os.getenv("SQL_POOL_TIMEOUT", "10"))
+
+# Bir kategorik filtre bundan fazla farklı değerle eşleşirse IN (...) yerine yalnızca
+# pandas tarafında uygulanır (SQLite parametre sınırı ve sorgu planı için)
+SQL_MAX_IN_VALUES = int(os.getenv("SQL_MAX_IN_VALUES", "500"))
+
+# Depodaki sütun -> ham tablodaki olası adları (preprocess_frame'deki yeniden adlandırmadan önce)
+RAW_COLUMNS = {
+    'Marka': ['Marka'],
+    'Seri': ['Seri'],
+    'Model': ['Model'],
+    'Vites Tipi': ['Vites Tipi', 'Vites'],
+    'Yakıt Tipi': ['Yakıt Tipi', 'Yakıt'],
+    'Fiyat': ['Fiyat'],
+    'Kilometre': ['Kilometre', 'KM'],
+    'Yıl': ['Yıl'],
+}
+
+# Aralık filtresinin SQL'e aktarılabildiği sütun tipleri. Fiyat/kilometre yalnızca INTEGER
+# ise ham değer ön işlemeden aynen geçer (digits_to_int); metin veya REAL sütunlar eski
+# rakam ayıklama yolundan geçtiğinden bu sütunlarda filtre yalnızca pandas'ta uygulanır.
+PUSHDOWN_TYPES = {
+    'Fiyat': {'INTEGER'},
+    'Kilometre': {'INTEGER'},
+    'Yıl': {'INTEGER', 'REAL'},
+}
+
+_ENGINES = {}
+_ENGINES_LOCK = threading.Lock()
+_ENGINES_PID = os.getpid()
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def get_engine(db_path):
+    """
+    db_path için süreç içinde paylaşılan, bağlantı havuzlu SQLAlchemy engine'i döndürür.
+    fork ile başlatılan çalışanlarda üst süreçten gelen bağlantılar kullanılmaz, havuz yeniden kurulur.
+    """
+    global _ENGINES_PID
+    with _ENGINES_LOCK:
+        if _ENGINES_PID != os.getpid():
+            for engine in _ENGINES.values():
+                engine.dispose(close=False)
+            _ENGINES.clear()
+            _ENGINES_PID = os.getpid()
+        engine = _ENGINES.get(db_path)
+        if engine is None:
+            engine = _ENGINES[db_path] = sa.create_engine(
+                f'sqlite:///{db_path}',
+                pool_size=SQL_POOL_SIZE,
+                max_overflow=SQL_POOL_OVERFLOW,
+                pool_timeout=SQL_POOL_TIMEOUT,
+            )
+        return engine
+
+
+def dispose_engine(db_path):
+    """Veritabanı dosyası yeniden oluşturulduğunda havuzdaki eski bağlantıları kapatır."""
+    with _ENGINES_LOCK:
+        engine = _ENGINES.pop(db_path, None)
+    if engine is not None:
+        engine.dispose()
+
+
+class SqlListingStore:
+    """
+    İlanları belleğe yüklemeden öneri üreten kaynak (QUERY_MODE=sql).
+
+    Her istekte marka/seri/model/vites/yakıt filtreleri, tablodaki farklı değerler
+    üzerinde FilterEngine ile aynı anlamda (büyük/küçük harf duyarsız eşitlik, regex alt
+    dize) çözülüp indeksli sütunlarda IN (...) koşuluna, fiyat/km/yıl sınırları tipli
+    sütunlarda aralık koşuluna çevrilir. Yalnızca aday satırlar okunur ve ön işlenir;
+    filtreler pandas tarafında birebir yeniden uygulandığından SQL koşulları sonucu
+    yalnızca daraltır, değiştirmez. TF-IDF adaylar üzerinde eğitilir (global indeks
+    tutulmaz), böylece bellek kullanımı veri boyutundan bağımsız kalır.
+    """
+
+    def __init__(self, sources):
+        # sources: [(tablo adı, veritabanı yolu)]; sıralama bellek modundaki depo sırasıyla aynı
+        self.sources = [(table, db_path) for table, db_path in sources if os.path.exists(db_path)]
+        self._columns = {}
+        self._categories = {}
+        self._lock = threading.Lock()
+        self.stats = {"queries": 0, "rows_fetched": 0}
+        for table, db_path in self.sources:
+            self._columns[table] = self._prepare(table, db_path)
+
+    def _prepare(self, table, db_path):
+        """
+        Sütun tiplerini okur. Veritabanı değiştirilmez: indeksler stream_csv_to_sqlite'ta
+        kurulur (aksi halde bellek modunun anlık görüntü ve TF-IDF parmak izleri bozulurdu);
+        filtrelenen bir sütunda indeks yoksa yalnızca uyarı verilir.
+        """
+        with get_engine(db_path).connect() as conn:
+            schema = pd.read_sql_query(f"PRAGMA table_info({_quote(table)})", conn)
+            indexes = pd.read_sql_query(
+                "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+                conn, params=(table,)
+            )['sql']
+        columns = dict(zip(schema['name'], schema['type'].str.upper()))
+        missing = [column for column in INDEXED_COLUMNS
+                   if column in columns and not any(f'({_quote(column)})' in sql for sql in indexes)]
+        if missing:
+            print(f"Uyarı: '{db_path}' içinde {', '.join(missing)} sütunları indekssiz; filtreli sorgular "
+                  f"tam tarama yapar.")
+        return columns
+
+    def _raw_column(self, table, column):
+        return next((name for name in RAW_COLUMNS[column] if name in self._columns[table]), None)
+
+    def _category_index(self, table, db_path, raw_column):
+        """Sütunun farklı değerleri üzerinde kurulan CategoricalIndex (ilk kullanımda okunur)."""
+        key = (table, raw_column)
+        index = self._categories.get(key)
+        if index is None:
+            with self._lock:
+                index = self._categories.get(key)
+                if index is None:
+                    with get_engine(db_path).connect() as conn:
+                        values = pd.read_sql_query(
+                            f"SELECT DISTINCT {_quote(raw_column)} AS value FROM {_quote(table)} "
+                            f"WHERE {_quote(raw_column)} IS NOT NULL", conn
+                        )['value']
+                    index = self._categories[key] = CategoricalIndex(values.astype(object))
+        return index
+
+    def _where(self, table, db_path, filters):
+        """
+        Filtreleri (koşul, parametreler) çiftine çevirir. Tablo hiçbir satırla eşleşemiyorsa None.
+        """
+        clauses, params = [], []
+        for param, (column, kind) in CATEGORICAL_FILTERS.items():
+            value = filters.get(param)
+            if not value and param != 'marka':
+                continue
+            raw_column = self._raw_column(table, column)
+            if raw_column is None:
+                return None
+            index = self._category_index(table, db_path, raw_column)
+            codes = index.equals_codes(value) if kind == 'equals' else index.contains_codes(value)
+            if not codes:
+                return None
+            if len(codes) <= SQL_MAX_IN_VALUES:
+                clauses.append(f"{_quote(raw_column)} IN ({', '.join('?' for _ in codes)})")
+                params.extend(index.categories[codes].tolist())
+
+        for column, bound_params in RANGE_FILTERS.items():
+            bounds = [(op, filters.get(param)) for op, param in zip(('>=', '<='), bound_params)
+                      if filters.get(param) is not None]
+            if not bounds:
+                continue
+            raw_column = self._raw_column(table, column)
+            if raw_column is None:
+                return None
+            if self._columns[table][raw_column] not in PUSHDOWN_TYPES[column]:
+                continue
+            scale = PRICE_DIVISORS.get(table, 1) if column == 'Fiyat' else 1
+            for op, bound in bounds:
+                clauses.append(f"{_quote(raw_column)} {op} ?")
+                params.append(bound * scale)
+        return ' AND '.join(clauses), params
+
+    def fetch(self, filters):
+        """Filtrelerle eşleşebilecek aday satırların ön işlenmiş deposu; aday yoksa None."""
+        frames = {}
+        for table, db_path in self.sources:
+            where = self._where(table, db_path, filters)
+            if where is None:
+                continue
+            clause, params = where
+            with get_engine(db_path).connect() as conn:
+                frames[table] = load_and_preprocess_from_db(
+                    conn, table_name=table, where=clause or '1', params=tuple(params), verbose=False, workers=1
+                )
+        candidates = build_listings_store(frames)
+        self.stats["queries"] += 1
+        self.stats["rows_fetched"] += 0 if candidates is None else len(candidates)
+        return candidates
+
+    def recommend(self, query):
+        """recommend_cars ile aynı biçimde sonuç döndürür; query recommendation_query çıktısıdır."""
+        filters = {key: value for key, value in query.items() if key not in ('user_desc', 'top_n')}
+        with stage('sql_fetch'):
+            candidates = self.fetch(filters)
+        if candidates is None:
+            return pd.DataFrame()
+        return recommend_cars(candidates, **query)